@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, url_for
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -17,31 +17,119 @@ app = Flask(__name__)
 CORS(app)
 
 # 配置
-app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 50)) * 1024 * 1024  # 默认50MB
 app.config['UPLOAD_FOLDER'] = 'uploads'
 
 # 确保上传目录存在
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # 导入BERTopic相关模块
-from models.bertopic_analyzer import BERTopicAnalyzer
+from models.bertopic_analyzer import BERTopicAnalyzer, DEFAULT_EMBEDDING_MODEL, DOCUMENT_FIELDS
+from models.embedding_registry import get_embedding_registry
+from models.online_model_store import get_online_model_store
+from models.model_store import get_topic_model_store
+from models.warmup import ModelWarmup
 from utils.file_processor import FileProcessor
 from utils.stopwords_manager import StopwordsManager
+from utils.job_manager import JobManager, JobQueueFullError
+from utils.dataset_store import DatasetStore
+from utils.plotly_assets import PLOTLYJS_ASSET_NAME, get_plotlyjs_bundle, get_plotlyjs_encoded
+from utils.response_encoding import NumpyJSONProvider, compress_response, negotiate_encoding
+from utils.scratch_space import get_scratch_space, start_periodic_sweep
+from utils.profiling import get_metrics
 
 # 初始化组件
 file_processor = FileProcessor()
 stopwords_manager = StopwordsManager()
 bertopic_analyzer = BERTopicAnalyzer()
+job_manager = JobManager()
+dataset_store = DatasetStore(os.path.join(app.config['UPLOAD_FOLDER'], 'datasets'))
+scratch_space = get_scratch_space()
+
+_background_pid = None
+
+def start_background_tasks():
+    """启动后台任务：定期清理导出文件与过期的上传数据，background 模式下预热分析依赖（每个进程一次）
+    
+    gunicorn 预加载应用时由 gunicorn.conf.py 在 fork 之后的各 worker 中调用。
+    """
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    _background_pid = os.getpid()
+    start_periodic_sweep([scratch_space.sweep, dataset_store.sweep])
+    if WARMUP_MODE == 'background':
+        warmup.start()
+
+# JSON响应直接序列化NumPy数组，并按 Accept-Encoding 压缩
+app.json = NumpyJSONProvider(app)
+app.after_request(compress_response)
+
+# 预加载embedding模型（逗号分隔，auto 表示默认多语言模型）
+warmup_models = [
+    DEFAULT_EMBEDDING_MODEL if name.strip() == 'auto' else name.strip()
+    for name in os.environ.get('EMBEDDING_WARMUP_MODELS', '').split(',')
+    if name.strip()
+]
+# 预热方式：background 启动后在后台线程中导入机器学习依赖并加载模型，
+# preload 在导入应用时同步完成（gunicorn 预加载时由各 worker 共享），off 在首次分析时按需加载
+WARMUP_MODE = os.environ.get('WARMUP_MODE', 'background')
+warmup = ModelWarmup(warmup_models)
+if WARMUP_MODE == 'preload':
+    logger.info(f"预加载分析依赖与embedding模型: {warmup_models}")
+    warmup.run()
+
+if not os.environ.get('DEFER_BACKGROUND_TASKS'):
+    start_background_tasks()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """健康检查接口"""
+    """健康检查接口（存活检查，不等待模型加载）"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'version': '1.0.0'
     })
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查：分析依赖已导入且预热模型已加载时返回 200，否则返回 503"""
+    readiness = warmup.readiness()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
+@app.route('/api/embedding-models', methods=['GET'])
+def embedding_model_stats():
+    """embedding模型缓存统计"""
+    return jsonify(get_embedding_registry().stats())
+
+@app.route('/api/storage', methods=['GET'])
+def storage_stats():
+    """临时文件与上传数据的占用及回收情况"""
+    return jsonify({
+        'scratch': scratch_space.stats(),
+        'datasets': dataset_store.stats()
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """分析各阶段与各可视化耗时、内存的聚合指标（Prometheus 文本格式，每个进程独立统计）"""
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/online-models', methods=['GET'])
+def list_online_models():
+    """增量模型列表（模型键、embedding模型、已并入文档数、更新次数）"""
+    return jsonify(get_online_model_store().list_states())
+
+@app.route('/api/online-models/<model_key>', methods=['DELETE'])
+def delete_online_model(model_key):
+    """删除增量模型，下次分析时重新开始训练"""
+    try:
+        if not get_online_model_store().delete(model_key):
+            return jsonify({'error': '模型不存在'}), 404
+        return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """文件上传接口"""
@@ -53,22 +141,30 @@ def upload_file():
         if file.filename == '':
             return jsonify({'error': '没有选择文件'}), 400
         
-        # 保存文件（不删除，供后续分析使用）
         filename = file.filename
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in file_processor.supported_formats:
+            return jsonify({'error': f'不支持的文件格式: {ext}'}), 400
+        
+        # 按内容哈希保存到数据集存储，相同文件只保存和解析一次（过期数据集由后台定期清理）
+        dataset_id, is_new = dataset_store.save_upload(file.stream, filename)
+        meta = dataset_store.get(dataset_id)
         
-        # 处理文件获取预览信息
-        result = file_processor.process_file(file_path)
+        if is_new or 'preview' not in meta:
+            # 处理文件获取预览信息
+            preview = file_processor.process_file(dataset_store.file_path(dataset_id))
+            meta = dataset_store.update_meta(dataset_id, preview=preview)
         
-        # 添加文件路径信息
-        result['file_path'] = filename
+        result = dict(meta['preview'])
+        result['dataset_id'] = dataset_id
+        result['file_path'] = dataset_id
         result['file_type'] = result.get('file_type', 'excel')
+        result['deduplicated'] = not is_new
         
-        logger.info(f"文件上传成功: {filename}, 总行数: {result.get('total_rows', 0)}")
+        logger.info(f"文件上传成功: {filename}, 数据集: {dataset_id}, 总行数: {result.get('total_rows', 0)}")
         
         return jsonify(result)
-        
+    
     except Exception as e:
         logger.error(f"文件上传错误: {str(e)}")
         logger.error(traceback.format_exc())
@@ -95,96 +191,364 @@ def update_stopwords():
         logger.error(f"更新停用词错误: {str(e)}")
         return jsonify({'error': f'更新停用词失败: {str(e)}'}), 500
 
+def resolve_dataset(data):
+    """根据 dataset_id（或旧版 file_path）定位数据文件，不存在时返回 None"""
+    dataset_id = data.get('dataset_id') or data.get('file_path')
+    meta = dataset_store.get(dataset_id)
+    if meta is not None:
+        return {
+            'file_path': dataset_store.file_path(dataset_id),
+            'file_type': meta.get('preview', {}).get('file_type') or data.get('file_type', 'excel'),
+            'cache_dir': dataset_store.columns_dir(dataset_id)
+        }
+    
+    # 兼容直接保存在上传目录中的文件
+    if data.get('file_path'):
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], os.path.basename(data['file_path']))
+        if os.path.isfile(file_path):
+            return {
+                'file_path': file_path,
+                'file_type': data.get('file_type', 'excel'),
+                'cache_dir': None
+            }
+    
+    return None
+
+def resolve_plotlyjs(mode=None):
+    """plotly.js 引用方式：inline 内嵌完整脚本，shared 引用后端提供的共享脚本地址"""
+    mode = mode or os.environ.get('PLOTLYJS_MODE', 'inline')
+    if mode not in ('inline', 'shared'):
+        raise ValueError(f'不支持的plotly.js模式: {mode}')
+    if mode == 'shared':
+        return os.environ.get('PLOTLYJS_URL') or url_for('plotlyjs_asset', _external=True)
+    return True
+
+def run_analysis(data, progress_callback=None):
+    """读取数据并执行分析（同步请求与后台任务共用）"""
+    dataset = resolve_dataset(data)
+    if dataset is None:
+        raise ValueError('文件不存在，请重新上传')
+    
+    # 提取完整文本数据（重复分析时直接读取列式缓存）
+    text_data = file_processor.extract_texts_from_data(
+        file_path=dataset['file_path'],
+        text_column=data['text_column'],
+        timestamp_column=data.get('timestamp_column'),
+        file_type=dataset['file_type'],
+        cache_dir=dataset['cache_dir']
+    )
+    
+    logger.info(f"开始分析 {text_data['total_documents']} 个文档")
+    
+    # 执行分析
+    result = bertopic_analyzer.analyze(
+        texts=text_data['texts'],
+        config=data['config'],
+        timestamps=text_data.get('timestamps'),
+        visualization_options=data.get('visualization_options', []),
+        preprocessing_config=data.get('preprocessing_config', {}),
+        stopwords=data.get('stopwords', {}),
+        progress_callback=progress_callback,
+        lazy_visualizations=data.get('lazy_visualizations', False),
+        plotlyjs=data.get('plotlyjs_src', True)
+    )
+    
+    # 按需渲染模式：只返回可视化的访问地址
+    if data.get('lazy_visualizations'):
+        result['visualizations'] = {
+            option: {
+                'lazy': True,
+                'url': f"/api/visualizations/{result['analysis_id']}/{option}"
+            }
+            for option in data.get('visualization_options', [])
+        }
+    
+    # 不回传完整语料，文档通过分页接口按需查询
+    if not data.get('include_documents', True):
+        for key in ('texts', 'topics', 'probabilities'):
+            result.pop(key, None)
+    result['documents_url'] = f"/api/results/{result['analysis_id']}/documents"
+    
+    # 持久化模型，供 /api/models/<id>/transform 为新文档分配主题
+    if data.get('save_model'):
+        model_meta = bertopic_analyzer.save_model(result['analysis_id'])
+        result['model_id'] = model_meta['model_id']
+        result['transform_url'] = f"/api/models/{model_meta['model_id']}/transform"
+    
+    # 添加文档统计信息
+    result['document_stats'] = {
+        'total_documents': text_data['total_documents'],
+        'total_rows': text_data['total_rows'],
+        'processed_documents': len(text_data['texts'])
+    }
+    
+    return result
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_topics():
-    """BERTopic分析接口"""
+    """BERTopic分析接口（async=true 时提交后台任务并立即返回任务ID）"""
     try:
         data = request.get_json()
         
         # 验证必要参数
-        required_fields = ['file_path', 'text_column', 'config']
+        required_fields = ['text_column', 'config']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'缺少必要参数: {field}'}), 400
-        
-        # 重新上传文件进行处理（临时解决方案）
-        # 在实际应用中，应该保存文件路径或使用文件ID
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], data['file_path'])
+        if not data.get('dataset_id') and not data.get('file_path'):
+            return jsonify({'error': '缺少必要参数: dataset_id'}), 400
         
         # 检查文件是否存在
-        if not os.path.exists(file_path):
+        if resolve_dataset(data) is None:
             return jsonify({'error': '文件不存在，请重新上传'}), 400
         
-        # 提取完整文本数据
-        text_data = file_processor.extract_texts_from_data(
-            file_path=file_path,
-            text_column=data['text_column'],
-            timestamp_column=data.get('timestamp_column'),
-            file_type=data.get('file_type', 'excel')
-        )
-        
-        logger.info(f"开始分析 {text_data['total_documents']} 个文档")
-        
-        # 执行分析
-        result = bertopic_analyzer.analyze(
-            texts=text_data['texts'],
-            config=data['config'],
-            timestamps=text_data.get('timestamps'),
-            visualization_options=data.get('visualization_options', []),
-            preprocessing_config=data.get('preprocessing_config', {}),
-            stopwords=data.get('stopwords', {})
-        )
-        
-        # 添加文档统计信息
-        result['document_stats'] = {
-            'total_documents': text_data['total_documents'],
-            'total_rows': text_data['total_rows'],
-            'processed_documents': len(text_data['texts'])
-        }
+        # 后台任务中没有请求上下文，共享脚本地址需在此处确定
+        try:
+            data['plotlyjs_src'] = resolve_plotlyjs(data.get('plotlyjs'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify(result)
+        if data.get('async'):
+            try:
+                job_id = job_manager.submit(run_analysis, data)
+            except JobQueueFullError as e:
+                return jsonify({'error': str(e)}), 503
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/api/jobs/{job_id}'
+            }), 202
         
+        return jsonify(run_analysis(data))
+    
     except Exception as e:
         logger.error(f"BERTopic分析错误: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({'error': f'分析失败: {str(e)}'}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """查询分析任务状态与分阶段进度"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """获取已完成任务的分析结果"""
+    status, result = job_manager.get_result(job_id)
+    if status is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    if status != 'completed':
+        return jsonify({'error': f'任务尚未完成，当前状态: {status}', 'status': status}), 409
+    return jsonify(result)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消分析任务"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    return jsonify(job)
+
+@app.route('/api/visualizations/<analysis_id>/<viz_type>', methods=['GET'])
+def get_visualization(analysis_id, viz_type):
+    """按需渲染单个可视化（format=json|html）"""
+    try:
+        output_format = request.args.get('format', 'json')
+        if output_format not in ('json', 'html'):
+            return jsonify({'error': f'不支持的格式: {output_format}'}), 400
+        
+        # 未指定时沿用分析时的 plotly.js 引用方式
+        plotlyjs = None
+        if request.args.get('plotlyjs'):
+            try:
+                plotlyjs = resolve_plotlyjs(request.args['plotlyjs'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        content, error = bertopic_analyzer.render_visualization(analysis_id, viz_type, output_format, plotlyjs)
+        if content is None and error is None:
+            return jsonify({'error': '分析结果不存在或已过期'}), 404
+        if error is not None:
+            return jsonify({'error': error}), 422
+        
+        if output_format == 'html':
+            return Response(content, mimetype='text/html')
+        return jsonify(content)
+    
+    except Exception as e:
+        logger.error(f"可视化渲染错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'可视化渲染失败: {str(e)}'}), 500
+
+@app.route('/api/results/<analysis_id>/documents', methods=['GET'])
+def get_result_documents(analysis_id):
+    """分页查询分析结果中的文档（topic 过滤、offset/limit 分页、fields 字段选择）"""
+    try:
+        topic = request.args.get('topic', type=int)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), int(os.environ.get('RESULTS_PAGE_MAX', 1000)))
+        
+        fields = None
+        if request.args.get('fields'):
+            fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+            unknown = [field for field in fields if field not in DOCUMENT_FIELDS]
+            if unknown:
+                return jsonify({'error': f'不支持的字段: {unknown}', 'available_fields': list(DOCUMENT_FIELDS)}), 400
+        
+        page = bertopic_analyzer.query_documents(analysis_id, topic=topic, offset=offset, limit=limit, fields=fields)
+        if page is None:
+            return jsonify({'error': '分析结果不存在或已过期'}), 404
+        return jsonify(page)
+    
+    except Exception as e:
+        logger.error(f"文档查询错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'文档查询失败: {str(e)}'}), 500
+
+@app.route('/api/results/<analysis_id>/model', methods=['POST'])
+def save_result_model(analysis_id):
+    """持久化分析结果中的主题模型（模型ID与分析ID相同）"""
+    try:
+        meta = bertopic_analyzer.save_model(analysis_id)
+        if meta is None:
+            return jsonify({'error': '分析结果不存在或已过期'}), 404
+        return jsonify(meta), 201
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"模型保存错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'模型保存失败: {str(e)}'}), 500
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """已保存的主题模型列表"""
+    return jsonify({
+        'models': [
+            {key: value for key, value in meta.items() if key != 'preprocessing'}
+            for meta in get_topic_model_store().list_meta()
+        ],
+        'cache': get_topic_model_store().stats()
+    })
+
+@app.route('/api/models/<model_id>', methods=['GET'])
+def get_model(model_id):
+    """已保存模型的元数据"""
+    try:
+        meta = get_topic_model_store().get_meta(model_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if meta is None:
+        return jsonify({'error': '模型不存在'}), 404
+    return jsonify(meta)
+
+@app.route('/api/models/<model_id>', methods=['DELETE'])
+def delete_model(model_id):
+    """删除已保存的模型"""
+    try:
+        if not get_topic_model_store().delete(model_id):
+            return jsonify({'error': '模型不存在'}), 404
+        return jsonify({'success': True})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/models/<model_id>/transform', methods=['POST'])
+def transform_documents(model_id):
+    """使用已保存的模型为新文档分配主题（documents 为文本列表，不重新训练）"""
+    try:
+        data = request.get_json() or {}
+        documents = data.get('documents')
+        if not isinstance(documents, list) or not all(isinstance(doc, str) for doc in documents):
+            return jsonify({'error': 'documents 必须是文本列表'}), 400
+        max_documents = int(os.environ.get('TRANSFORM_MAX_DOCUMENTS', 10000))
+        if len(documents) > max_documents:
+            return jsonify({'error': f'单次最多分配 {max_documents} 个文档'}), 413
+        
+        result = bertopic_analyzer.transform_documents(model_id, documents, batch_size=data.get('batch_size'))
+        if result is None:
+            return jsonify({'error': '模型不存在'}), 404
+        return jsonify(result)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"主题分配错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'主题分配失败: {str(e)}'}), 500
+
+@app.route(f'/api/assets/{PLOTLYJS_ASSET_NAME}', methods=['GET'])
+def plotlyjs_asset():
+    """共享的 plotly.js（内容随 plotly 版本变化，客户端可长期缓存）"""
+    _, etag = get_plotlyjs_bundle()
+    # 返回按编码缓存的预压缩内容，不在每次请求时重新压缩
+    encoding = negotiate_encoding(request.accept_encodings)
+    response = Response(get_plotlyjs_encoded(encoding), mimetype='application/javascript')
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+        etag = f'{etag}-{encoding}'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
+
+def send_export(export_type, data):
+    """生成导出文件并返回下载响应，不支持的导出类型返回 None"""
+    exporters = {
+        'visualizations': bertopic_analyzer.export_visualizations,  # 所有可视化结果
+        'annotated_data': bertopic_analyzer.export_annotated_data,  # 带主题标注的数据
+        'topic_details': bertopic_analyzer.export_topic_details  # 主题详情
+    }
+    if export_type not in exporters:
+        return None
+    
+    result = exporters[export_type](data)
+    response = send_file(
+        result['file_path'],
+        as_attachment=True,
+        download_name=result['filename']
+    )
+    # 发送完成后删除导出文件（direct_passthrough 下 WSGI 服务器不会触发 close 回调）
+    response.direct_passthrough = False
+    response.call_on_close(lambda: scratch_space.release(result['file_path']))
+    return response
+
+@app.route('/api/results/<analysis_id>/export/<export_type>', methods=['GET'])
+def export_stored_results(analysis_id, export_type):
+    """直接从服务端保存的分析结果导出，无需客户端回传数据"""
+    try:
+        data = bertopic_analyzer.load_export_data(analysis_id)
+        if data is None:
+            return jsonify({'error': '分析结果不存在或已过期'}), 404
+        # 标注数据的文件格式：xlsx / csv / parquet
+        data['format'] = request.args.get('format')
+        
+        response = send_export(export_type, data)
+        if response is None:
+            return jsonify({'error': '不支持的导出类型'}), 400
+        return response
+    
+    except Exception as e:
+        logger.error(f"导出错误: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'导出失败: {str(e)}'}), 500
+
 @app.route('/api/export/<export_type>', methods=['POST'])
 def export_results(export_type):
-    """导出结果接口"""
+    """导出结果接口（客户端回传分析结果）"""
     try:
         data = request.get_json()
         
-        if export_type == 'visualizations':
-            # 导出所有可视化结果
-            result = bertopic_analyzer.export_visualizations(data)
-            return send_file(
-                result['file_path'],
-                as_attachment=True,
-                download_name=result['filename']
-            )
-        
-        elif export_type == 'annotated_data':
-            # 导出带标注的数据
-            result = bertopic_analyzer.export_annotated_data(data)
-            return send_file(
-                result['file_path'],
-                as_attachment=True,
-                download_name=result['filename']
-            )
-        
-        elif export_type == 'topic_details':
-            # 导出主题详情
-            result = bertopic_analyzer.export_topic_details(data)
-            return send_file(
-                result['file_path'],
-                as_attachment=True,
-                download_name=result['filename']
-            )
-        
-        else:
+        response = send_export(export_type, data)
+        if response is None:
             return jsonify({'error': '不支持的导出类型'}), 400
-            
+        return response
+    
     except Exception as e:
         logger.error(f"导出错误: {str(e)}")
         logger.error(traceback.format_exc())
@@ -192,7 +556,7 @@ def export_results(export_type):
 
 @app.errorhandler(413)
 def too_large(e):
-    return jsonify({'error': '文件大小超出限制(50MB)'}), 413
+    return jsonify({'error': f"文件大小超出限制({app.config['MAX_CONTENT_LENGTH'] // 1024 // 1024}MB)"}), 413
 
 @app.errorhandler(404)
 def not_found(e):
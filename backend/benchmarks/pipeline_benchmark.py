@@ -0,0 +1,410 @@
+"""分析流程端到端基准
+
+用合成语料（见 synthetic_corpus）和离线的哈希embedding替身模型（不下载模型、结果确定）测量：
+- analyzer: 直接调用 BERTopicAnalyzer.analyze，记录吞吐（documents/sec）、各阶段与各可视化的耗时及峰值内存
+- api: 通过 Flask 测试客户端依次调用上传、分析、文档分页、按需可视化、导出、模型保存与主题分配接口，记录各接口延迟
+
+结果写入JSON报告（含提交、Python与依赖版本），--compare 与之前的报告逐项比较。
+多个文档规模时每个规模在独立的子进程中运行，峰值内存互不影响。
+
+用法（在 backend 目录下运行）:
+    python -m benchmarks.pipeline_benchmark --documents 1000 10000 100000 --output report.json
+    python -m benchmarks.pipeline_benchmark --documents 10000 --compare report.json
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import subprocess
+from importlib import metadata
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.synthetic_corpus import generate_corpus, write_corpus, add_corpus_arguments, corpus_options
+from models.engines import REDUCTION_ENGINES, CLUSTERING_ENGINES
+from models.sampling import SAMPLING_STRATEGIES
+
+REPORT_VERSION = 1
+STAND_IN_MODEL_NAME = 'benchmark/hashing-embedder'
+SUPPORTED_MODES = ('analyzer', 'api')
+
+
+def create_stand_in_embedder(dimensions=384):
+    """离线embedding替身：词哈希到固定维度后归一化，计算量小且不依赖模型文件
+    
+    继承 BERTopic 的 BaseEmbedder，主题分配（transform）时 BERTopic 直接调用其 embed。
+    """
+    from bertopic.backend import BaseEmbedder
+    from sklearn.feature_extraction.text import HashingVectorizer
+    
+    class HashingEmbedder(BaseEmbedder):
+        def __init__(self):
+            super().__init__()
+            self.vectorizer = HashingVectorizer(
+                n_features=dimensions, token_pattern=r'(?u)\S+', ngram_range=(1, 1), norm='l2', alternate_sign=True
+            )
+        
+        def encode(self, sentences, show_progress_bar=False, batch_size=256, **kwargs):
+            return self.vectorizer.transform(list(sentences)).toarray().astype(np.float32)
+        
+        def embed(self, documents, verbose=False):
+            return self.encode(documents)
+    
+    return HashingEmbedder()
+
+
+def prepare_environment(workdir, embedding_dimensions, embedding_cache=False):
+    """在临时工作目录中运行（上传、缓存与模型文件不写入仓库），并以替身模型替换embedding模型注册表
+    
+    必须在导入 app 之前调用。
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    os.environ.setdefault('WARMUP_MODE', 'off')
+    os.environ.setdefault('DEFER_BACKGROUND_TASKS', '1')
+    os.environ.setdefault('EMBEDDING_WARMUP_MODELS', '')
+    os.environ['EMBEDDING_CACHE_ENABLED'] = '1' if embedding_cache else '0'
+    os.environ.setdefault('EMBEDDING_CACHE_DIR', os.path.join(workdir, 'cache', 'embeddings'))
+    os.environ.setdefault('MODEL_STORE_DIR', os.path.join(workdir, 'cache', 'models'))
+    os.environ.setdefault('ONLINE_MODEL_DIR', os.path.join(workdir, 'cache', 'online_models'))
+    os.environ.setdefault('SCRATCH_DIR', os.path.join(workdir, 'scratch'))
+    
+    from models import embedding_registry
+    
+    embedding_registry._registry = embedding_registry.EmbeddingModelRegistry(
+        loader=lambda model_name: create_stand_in_embedder(embedding_dimensions)
+    )
+
+
+def analysis_config(args):
+    """与前端默认参数一致的分析配置（embedding模型为替身模型，降维/聚类引擎由参数指定）"""
+    return {
+        'basic': {'minTopicSize': args.min_topic_size, 'embeddingModel': STAND_IN_MODEL_NAME},
+        'umap': {'nNeighbors': args.n_neighbors, 'nComponents': 5, 'minDist': 0.0, 'metric': 'cosine',
+                 'knnBackend': args.knn_backend},
+        'hdbscan': {'minClusterSize': args.min_cluster_size, 'metric': 'euclidean'},
+        'reduction': {'engine': args.reduction},
+        'clustering': {'engine': args.clustering, 'nClusters': args.n_clusters},
+        'sampling': {'enabled': bool(args.sample_size), 'sampleSize': args.sample_size, 'strategy': args.sample_strategy},
+        'advanced': {'nrTopics': None, 'topNWords': 10, 'calculateProbabilities': False}
+    }
+
+
+def topic_quality(labels, topics):
+    """与真实主题的一致程度（调整兰德指数）及离群文档比例"""
+    from sklearn.metrics import adjusted_rand_score
+    
+    topics = np.asarray(topics)
+    return {
+        'topics_found': int(len(set(topics.tolist()) - {-1})),
+        'outlier_ratio': round(float(np.mean(topics == -1)), 4) if len(topics) else 0.0,
+        'adjusted_rand_index': round(float(adjusted_rand_score(labels, topics)), 4)
+    }
+
+
+def run_analyzer_benchmark(documents, args):
+    """直接调用 BERTopicAnalyzer.analyze"""
+    from models.bertopic_analyzer import BERTopicAnalyzer
+    from utils.profiling import Measurement
+    
+    start = time.perf_counter()
+    corpus = generate_corpus(documents, **corpus_options(args))
+    generate_seconds = time.perf_counter() - start
+    
+    analyzer = BERTopicAnalyzer()
+    measurement = Measurement().start()
+    result = analyzer.analyze(
+        texts=corpus['texts'],
+        config=analysis_config(args),
+        timestamps=corpus['timestamps'],
+        visualization_options=args.visualizations,
+        preprocessing_config={},
+        stopwords={}
+    )
+    overall = measurement.stop()
+    
+    summary = {
+        'generate_seconds': round(generate_seconds, 4),
+        'total_seconds': result['timings']['total_seconds'],
+        'docs_per_sec': round(documents / result['timings']['total_seconds'], 1) if result['timings']['total_seconds'] else None,
+        'cpu_seconds': overall['cpu_seconds'],
+        'peak_rss_bytes': overall['peak_rss_bytes'],
+        'stages': result['timings']['stages'],
+        'visualizations': result['timings'].get('visualizations', {}),
+        'sampling': result['sampling'],
+        **topic_quality(corpus['labels'], result['topics'])
+    }
+    
+    del analyzer, result, corpus
+    gc.collect()
+    return summary
+
+
+def run_api_benchmark(documents, args, workdir):
+    """通过 Flask 测试客户端端到端调用各接口"""
+    import app as backend_app
+    from utils.profiling import Measurement
+    
+    client = backend_app.app.test_client()
+    requests = {}
+    
+    def call(name, method, url, expected=(200,), **kwargs):
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        body = response.get_data()
+        seconds = time.perf_counter() - start
+        response.close()
+        if response.status_code not in expected:
+            raise RuntimeError(f"{method} {url} 返回 {response.status_code}: {body[:500]!r}")
+        requests[name] = {'seconds': round(seconds, 4), 'status': response.status_code, 'bytes': len(body)}
+        return response
+    
+    corpus_path = os.path.join(workdir, f'corpus_{documents}.csv')
+    start = time.perf_counter()
+    write_corpus(corpus_path, documents, **corpus_options(args))
+    generate_seconds = time.perf_counter() - start
+    
+    measurement = Measurement().start()
+    
+    for name in ('upload', 'upload_repeat'):
+        with open(corpus_path, 'rb') as f:
+            response = call(name, 'POST', '/api/upload', data={'file': (f, os.path.basename(corpus_path))},
+                            content_type='multipart/form-data')
+    dataset_id = response.get_json()['dataset_id']
+    
+    response = call('analyze', 'POST', '/api/analyze', json={
+        'dataset_id': dataset_id,
+        'text_column': 'text',
+        'timestamp_column': 'timestamp',
+        'config': analysis_config(args),
+        'visualization_options': args.visualizations,
+        'lazy_visualizations': True,
+        'include_documents': False,
+        'save_model': True
+    })
+    result = response.get_json()
+    analysis_id = result['analysis_id']
+    
+    call('documents_page', 'GET', f'/api/results/{analysis_id}/documents?offset=0&limit=100')
+    call('documents_topic_page', 'GET', f'/api/results/{analysis_id}/documents?topic=0&limit=100&fields=index,topic')
+    for option in args.visualizations:
+        # 首次请求时生成，之后命中缓存
+        call(f'visualization_{option}', 'GET', f'/api/visualizations/{analysis_id}/{option}', expected=(200, 422))
+        call(f'visualization_{option}_cached', 'GET', f'/api/visualizations/{analysis_id}/{option}', expected=(200, 422))
+    call('export_annotated_csv', 'GET', f'/api/results/{analysis_id}/export/annotated_data?format=csv')
+    call('export_topic_details', 'GET', f'/api/results/{analysis_id}/export/topic_details')
+    
+    new_documents = generate_corpus(args.transform_documents, **dict(corpus_options(args), seed=args.seed + 1))['texts']
+    call('transform', 'POST', f"/api/models/{result['model_id']}/transform", json={'documents': new_documents})
+    call('transform_loaded', 'POST', f"/api/models/{result['model_id']}/transform", json={'documents': new_documents})
+    call('metrics', 'GET', '/api/metrics')
+    
+    overall = measurement.stop()
+    analyze_seconds = requests['analyze']['seconds']
+    return {
+        'generate_seconds': round(generate_seconds, 4),
+        'docs_per_sec': round(documents / analyze_seconds, 1) if analyze_seconds else None,
+        'cpu_seconds': overall['cpu_seconds'],
+        'peak_rss_bytes': overall['peak_rss_bytes'],
+        'stages': result['timings']['stages'],
+        'transform_docs_per_sec': round(args.transform_documents / requests['transform']['seconds'], 1),
+        'requests': requests
+    }
+
+
+def run_size(documents, args):
+    """在当前进程中运行一个文档规模"""
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bertopic-benchmark-')
+    prepare_environment(workdir, args.embedding_dimensions, args.embedding_cache)
+    
+    run = {'documents': documents}
+    try:
+        for mode in args.modes:
+            print(f"[{documents} 文档] {mode} ...", flush=True)
+            if mode == 'analyzer':
+                run['analyzer'] = run_analyzer_benchmark(documents, args)
+            else:
+                run['api'] = run_api_benchmark(documents, args, workdir)
+            print_run_line(documents, mode, run[mode])
+    finally:
+        os.chdir(BACKEND_DIR)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return run
+
+
+def run_isolated(documents, args):
+    """在子进程中运行一个文档规模，返回其结果"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    command = [sys.executable, '-m', 'benchmarks.pipeline_benchmark', '--documents', str(documents), '--output', output,
+               '--no-isolate', *passthrough_arguments(args)]
+    try:
+        subprocess.run(command, cwd=BACKEND_DIR, check=True)
+        with open(output, 'r', encoding='utf-8') as f:
+            return json.load(f)['runs'][0]
+    finally:
+        os.remove(output)
+
+
+def passthrough_arguments(args):
+    arguments = []
+    for key, value in vars(args).items():
+        if key in ('documents', 'output', 'compare', 'no_isolate', 'workdir', 'threshold') or value is None:
+            continue
+        flag = '--' + key.replace('_', '-')
+        if isinstance(value, bool):
+            if value:
+                arguments.append(flag)
+        elif isinstance(value, list):
+            arguments.extend([flag, *map(str, value)])
+        else:
+            arguments.extend([flag, str(value)])
+    return arguments
+
+
+def print_run_line(documents, mode, summary):
+    peak = summary['peak_rss_bytes']
+    peak_text = f"{peak / 1024 / 1024:.0f}MB" if peak else '-'
+    stages = ' '.join(f"{stage}={timing['wall_seconds']:.2f}s" for stage, timing in summary['stages'].items())
+    print(f"{mode:<8} documents={documents:<8} {summary['docs_per_sec']:>10} docs/s  peak={peak_text:<8} {stages}")
+    sampling = summary.get('sampling') or {}
+    if sampling.get('enabled'):
+        print(f"    sample={sampling['sample_size']}  fit {sampling['fit_docs_per_second']} docs/s  "
+              f"assign {sampling['assign_docs_per_second']} docs/s")
+    if mode == 'api':
+        for name, request in summary['requests'].items():
+            print(f"    {name:<32} {request['seconds'] * 1000:>10.1f} ms  {request['bytes']:>10} bytes")
+
+
+def environment_info():
+    """运行环境与依赖版本，便于判断不同报告是否可比"""
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+    
+    versions = {}
+    for package in ('numpy', 'pandas', 'scikit-learn', 'bertopic', 'umap-learn', 'hdbscan', 'flask'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    
+    return {
+        'git_commit': git('rev-parse', 'HEAD'),
+        'git_dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+
+
+def flatten_metrics(value, prefix=''):
+    """报告中的数值指标展开为 {路径: 数值}"""
+    if isinstance(value, dict):
+        metrics = {}
+        for key, item in value.items():
+            metrics.update(flatten_metrics(item, f'{prefix}.{key}' if prefix else str(key)))
+        return metrics
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare_reports(baseline, report, threshold=0.1):
+    """按文档规模逐项比较两个报告，返回变化超过 threshold 的指标"""
+    baseline_runs = {run['documents']: run for run in baseline.get('runs', [])}
+    changes = []
+    for run in report['runs']:
+        previous = baseline_runs.get(run['documents'])
+        if previous is None:
+            continue
+        old_metrics = flatten_metrics(previous)
+        for name, value in flatten_metrics(run).items():
+            old = old_metrics.get(name)
+            if name == 'documents' or old in (None, 0) or name.endswith('.status'):
+                continue
+            change = (value - old) / abs(old)
+            if abs(change) >= threshold:
+                changes.append({'documents': run['documents'], 'metric': name, 'baseline': old, 'current': value,
+                                'change': round(change, 4)})
+    
+    for item in changes:
+        print(f"{item['documents']:<8} {item['metric']:<60} {item['baseline']:>14} -> {item['current']:<14} {item['change']:+.1%}")
+    if not changes:
+        print(f"与基线相比没有超过 {threshold:.0%} 的变化")
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析流程端到端基准')
+    parser.add_argument('--documents', type=int, nargs='+', default=[1000, 10000])
+    add_corpus_arguments(parser)
+    parser.add_argument('--modes', nargs='+', choices=SUPPORTED_MODES, default=list(SUPPORTED_MODES))
+    parser.add_argument('--visualizations', nargs='*', default=['topics', 'barchart'])
+    parser.add_argument('--min-topic-size', type=int, default=10)
+    parser.add_argument('--min-cluster-size', type=int, default=15)
+    parser.add_argument('--n-neighbors', type=int, default=15)
+    parser.add_argument('--reduction', choices=REDUCTION_ENGINES, default='umap')
+    parser.add_argument('--clustering', choices=CLUSTERING_ENGINES, default='hdbscan')
+    parser.add_argument('--n-clusters', type=int, default=50, help='K-Means / BIRCH 的主题数')
+    parser.add_argument('--sample-size', type=int, default=0, help='抽样训练的样本文档数（0 表示在全部文档上训练）')
+    parser.add_argument('--sample-strategy', choices=SAMPLING_STRATEGIES, default='random')
+    parser.add_argument('--knn-backend', choices=('auto', 'nndescent', 'hnsw', 'off'), default='auto')
+    parser.add_argument('--embedding-dimensions', type=int, default=384, help='替身模型的向量维度')
+    parser.add_argument('--embedding-cache', action='store_true', help='启用embedding磁盘缓存（默认关闭，每次都编码）')
+    parser.add_argument('--transform-documents', type=int, default=1000, help='主题分配接口每次提交的文档数')
+    parser.add_argument('--workdir', help='工作目录（上传与缓存文件），默认新建临时目录')
+    parser.add_argument('--no-isolate', action='store_true', help='所有文档规模在同一进程中运行')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    parser.add_argument('--compare', help='用于比较的基线报告')
+    parser.add_argument('--threshold', type=float, default=0.1, help='比较时输出的最小相对变化')
+    args = parser.parse_args()
+    # 运行时会切换到工作目录，相对路径按启动时的目录解析
+    for key in ('output', 'compare', 'workdir'):
+        if getattr(args, key):
+            setattr(args, key, os.path.abspath(getattr(args, key)))
+    
+    if args.no_isolate or len(args.documents) == 1:
+        runs = [run_size(documents, args) for documents in args.documents]
+    else:
+        runs = [run_isolated(documents, args) for documents in args.documents]
+    
+    report = {
+        'benchmark': 'pipeline',
+        'version': REPORT_VERSION,
+        'environment': environment_info(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'workdir', 'no_isolate')},
+        'runs': runs
+    }
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        baseline_commit = baseline.get('environment', {}).get('git_commit')
+        print(f"与基线报告比较（提交 {baseline_commit}）:")
+        report['comparison'] = {
+            'baseline_commit': baseline_commit,
+            'threshold': args.threshold,
+            'changes': compare_reports(baseline, report, args.threshold)
+        }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
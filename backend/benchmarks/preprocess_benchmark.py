@@ -0,0 +1,79 @@
+"""中文预处理吞吐基准
+
+比较各分词器在不同进程数下的文档处理速度（documents/sec）。
+
+用法（在 backend 目录下运行）:
+    python -m benchmarks.preprocess_benchmark --documents 100000 --workers 1 2 4 8
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_preprocessor import TextPreprocessor, SUPPORTED_SEGMENTERS
+
+SAMPLE_SENTENCES = [
+    '这款产品的质量非常好，物流速度也很快，下次还会购买。',
+    '客服态度很差，问题一直没有得到解决，非常失望。',
+    '价格有点贵，但是包装精美，适合送人。',
+    '手机电池续航时间太短了，一天要充两次电。',
+    '酒店位置便利，离地铁站只有5分钟步行距离。',
+    '这部电影的剧情紧凑，演员演技在线，值得一看。',
+    'The delivery was fast and the product works as expected.',
+    '系统升级之后运行速度明显提升，界面也更加简洁。'
+]
+
+
+def generate_corpus(num_documents, seed=42):
+    """生成合成中文语料"""
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 4)))
+        for _ in range(num_documents)
+    ]
+
+
+def run_benchmark(num_documents, workers_list, segmenters):
+    texts = generate_corpus(num_documents)
+    results = []
+    
+    for segmenter in segmenters:
+        cleaning_config = {'segmenter': segmenter}
+        for workers in workers_list:
+            preprocessor = TextPreprocessor(workers=workers, parallel_threshold=0)
+            start = time.perf_counter()
+            preprocessor.process(texts, cleaning_config)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'segmenter': segmenter,
+                'workers': workers,
+                'documents': num_documents,
+                'seconds': round(elapsed, 3),
+                'docs_per_sec': round(num_documents / elapsed, 1) if elapsed else None
+            })
+            print(f"{segmenter:<8} workers={workers:<2} {results[-1]['docs_per_sec']:>10} docs/s ({elapsed:.2f}s)")
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='中文预处理吞吐基准')
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--segmenters', nargs='+', default=list(SUPPORTED_SEGMENTERS))
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+    
+    results = run_benchmark(args.documents, args.workers, args.segmenters)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
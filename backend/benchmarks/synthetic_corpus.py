@@ -0,0 +1,231 @@
+"""合成语料生成器
+
+按给定的文档数、主题数与主题结构生成中文/英文（或混合）语料，相同参数与随机种子生成完全相同的语料，
+用于在不同提交之间比较分析流程的扩展性。每个主题有独立的词表，文档中 purity 比例的词来自所属主题，
+其余来自共享的背景词表（按齐普夫分布抽取）；noise 比例的文档全部由背景词组成（离群文档）。
+
+用法（在 backend 目录下运行）:
+    python -m benchmarks.synthetic_corpus --documents 100000 --topics 50 --language zh --output corpus.csv
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 用于组合中文合成词的常用字
+ZH_CHARACTERS = (
+    '人民国家中心发展经济市场企业产品服务质量价格技术创新数据系统网络平台用户客户体验设计研究学校学生老师课程'
+    '考试教育医院医生健康疾病治疗药物运动饮食环境污染能源气候绿色保护城市交通道路地铁汽车旅游酒店景点航班'
+    '电影音乐游戏比赛球队体育新闻媒体政策法律安全金融银行投资股票基金保险房屋租金装修家具手机电脑电池屏幕'
+    '软件硬件算法模型智能机器工厂生产制造材料物流快递包装仓库销售广告品牌营销会员活动优惠评价投诉售后退款'
+    '农业粮食水果蔬菜天气温度雨水森林河流海洋动物植物科学实验历史文化艺术文学书籍语言社会社区家庭儿童老人'
+)
+# 用于组合英文合成词的音节
+EN_SYLLABLES = (
+    'ka', 'lo', 'mi', 'ra', 'ne', 'to', 'su', 'vi', 'de', 'ba', 'ri', 'ko', 'na', 'pe', 'lu', 'ma', 'ti', 'go',
+    'ze', 'fa', 'ho', 'ny', 'qu', 'sa', 'we', 'xi', 'yo', 'bu', 'ce', 'da', 'el', 'fo', 'gi', 'ju', 'ke', 'ly'
+)
+# 背景词（与主题无关的常见词）
+ZH_BACKGROUND = [
+    '我们', '这个', '一个', '没有', '可以', '非常', '已经', '还是', '因为', '所以', '但是', '如果', '今天', '觉得',
+    '时候', '比较', '问题', '情况', '东西', '大家', '一直', '真的', '感觉', '之后', '之前', '而且', '其实', '然后',
+    '可能', '需要', '希望', '看到', '知道', '一些', '这样', '那么', '现在', '以后', '每天', '一起'
+]
+EN_BACKGROUND = [
+    'the', 'really', 'very', 'just', 'about', 'still', 'because', 'always', 'today', 'thing', 'people', 'time',
+    'maybe', 'something', 'quite', 'overall', 'again', 'actually', 'pretty', 'after', 'before', 'every', 'little',
+    'other', 'good', 'great', 'bad', 'much', 'well', 'many', 'first', 'last', 'long', 'new', 'old', 'same'
+]
+SUPPORTED_LANGUAGES = ('zh', 'en', 'mixed')
+
+
+def build_vocabulary(language, topics, words_per_topic, seed=42):
+    """为每个主题生成互不重复的合成词表，返回 [主题][词] 列表"""
+    rng = np.random.default_rng(seed)
+    needed = topics * words_per_topic
+    characters = list(ZH_CHARACTERS)
+    words = []
+    seen = set(ZH_BACKGROUND if language == 'zh' else EN_BACKGROUND)
+    
+    while len(words) < needed:
+        if language == 'zh':
+            word = ''.join(rng.choice(characters, size=rng.integers(2, 4)))
+        else:
+            word = ''.join(rng.choice(EN_SYLLABLES, size=rng.integers(2, 5)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    
+    return [words[i * words_per_topic:(i + 1) * words_per_topic] for i in range(topics)]
+
+
+def iter_corpus(documents, topics=20, language='zh', purity=0.6, noise=0.1, min_length=20, max_length=60,
+                words_per_topic=30, topic_skew=0.0, with_timestamps=True, days=365, seed=42, chunk_size=100000):
+    """按块生成语料，每块为 {'texts', 'labels', 'timestamps'}（labels 为真实主题，-1 表示离群文档）
+    
+    topic_skew 为主题规模的齐普夫指数（0 表示各主题文档数相同）；
+    时间戳围绕各主题的随机中心日期分布，便于主题随时间变化的可视化呈现结构。
+    """
+    if language not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"不支持的语言: {language}")
+    if topics < 1 or documents < 0:
+        raise ValueError("主题数必须大于0，文档数不能为负")
+    
+    rng = np.random.default_rng(seed)
+    languages = ('zh', 'en') if language == 'mixed' else (language,)
+    
+    # 词表：各语言的主题词在前、背景词在后，拼成一个数组按下标取词
+    vocab = []
+    topic_offsets = []
+    background_offsets = []
+    background_sizes = []
+    for lang in languages:
+        topic_offsets.append(len(vocab))
+        for topic_words in build_vocabulary(lang, topics, words_per_topic, seed=seed):
+            vocab.extend(topic_words)
+        background = ZH_BACKGROUND if lang == 'zh' else EN_BACKGROUND
+        background_offsets.append(len(vocab))
+        background_sizes.append(len(background))
+        vocab.extend(background)
+    vocab = np.array(vocab, dtype=object)
+    topic_offsets = np.array(topic_offsets)
+    background_offsets = np.array(background_offsets)
+    background_sizes = np.array(background_sizes)
+    separators = ['' if lang == 'zh' else ' ' for lang in languages]
+    
+    topic_weights = 1.0 / np.arange(1, topics + 1) ** topic_skew
+    topic_weights /= topic_weights.sum()
+    topic_centers = rng.uniform(0, days, size=topics)
+    start_date = datetime(2024, 1, 1)
+    
+    for chunk_start in range(0, documents, chunk_size):
+        n = min(chunk_size, documents - chunk_start)
+        labels = rng.choice(topics, size=n, p=topic_weights)
+        labels[rng.random(n) < noise] = -1
+        doc_languages = rng.integers(0, len(languages), size=n)
+        lengths = rng.integers(min_length, max_length + 1, size=n)
+        
+        # 逐词决定来源（主题词或背景词），全部以向量化方式计算
+        doc_of_word = np.repeat(np.arange(n), lengths)
+        word_labels = labels[doc_of_word]
+        word_languages = doc_languages[doc_of_word]
+        from_topic = (word_labels >= 0) & (rng.random(len(doc_of_word)) < purity)
+        
+        topic_base = topic_offsets[word_languages]
+        background_base = background_offsets[word_languages]
+        # 背景词按齐普夫分布：少数常见词出现频繁
+        background_rank = np.minimum(rng.zipf(1.5, size=len(doc_of_word)) - 1, background_sizes[word_languages] - 1)
+        
+        word_index = np.where(
+            from_topic,
+            topic_base + np.maximum(word_labels, 0) * words_per_topic + rng.integers(0, words_per_topic, size=len(doc_of_word)),
+            background_base + background_rank
+        )
+        tokens = vocab[word_index].tolist()
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+        texts = [
+            separators[doc_languages[i]].join(tokens[bounds[i]:bounds[i + 1]])
+            for i in range(n)
+        ]
+        
+        timestamps = None
+        if with_timestamps:
+            centers = np.where(labels >= 0, topic_centers[np.maximum(labels, 0)], rng.uniform(0, days, size=n))
+            offsets = np.clip(centers + rng.normal(0, days / 20, size=n), 0, days)
+            timestamps = [(start_date + timedelta(days=float(offset))).strftime('%Y-%m-%d') for offset in offsets]
+        
+        yield {'texts': texts, 'labels': labels.tolist(), 'timestamps': timestamps}
+
+
+def generate_corpus(documents, **kwargs):
+    """生成完整语料，返回 {'texts', 'labels', 'timestamps'}"""
+    corpus = {'texts': [], 'labels': [], 'timestamps': []}
+    for chunk in iter_corpus(documents, **kwargs):
+        corpus['texts'].extend(chunk['texts'])
+        corpus['labels'].extend(chunk['labels'])
+        if chunk['timestamps'] is not None:
+            corpus['timestamps'].extend(chunk['timestamps'])
+    if not corpus['timestamps']:
+        corpus['timestamps'] = None
+    return corpus
+
+
+def write_corpus(path, documents, **kwargs):
+    """按块写出语料文件（.csv / .jsonl / .parquet / .xlsx），列为 text、label 与 timestamp"""
+    import pandas as pd
+    
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ('.csv', '.jsonl', '.parquet', '.xlsx'):
+        raise ValueError(f"不支持的文件格式: {ext}")
+    
+    frames = (
+        pd.DataFrame({
+            'text': chunk['texts'],
+            'label': chunk['labels'],
+            **({'timestamp': chunk['timestamps']} if chunk['timestamps'] is not None else {})
+        })
+        for chunk in iter_corpus(documents, **kwargs)
+    )
+    
+    if ext in ('.parquet', '.xlsx'):
+        # 这两种格式不便追加写入，合并后一次写出
+        df = pd.concat(list(frames), ignore_index=True) if documents else pd.DataFrame({'text': []})
+        if ext == '.parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_excel(path, index=False)
+        return path
+    
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for index, frame in enumerate(frames):
+            if ext == '.csv':
+                frame.to_csv(f, index=False, header=index == 0)
+            else:
+                for record in frame.to_dict(orient='records'):
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return path
+
+
+def add_corpus_arguments(parser):
+    """语料参数（合成语料与流程基准共用）"""
+    parser.add_argument('--topics', type=int, default=20)
+    parser.add_argument('--language', choices=SUPPORTED_LANGUAGES, default='zh')
+    parser.add_argument('--purity', type=float, default=0.6, help='文档中来自所属主题的词的比例')
+    parser.add_argument('--noise', type=float, default=0.1, help='离群文档比例')
+    parser.add_argument('--min-length', type=int, default=20)
+    parser.add_argument('--max-length', type=int, default=60)
+    parser.add_argument('--topic-skew', type=float, default=0.0, help='主题规模的齐普夫指数')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def corpus_options(args):
+    return {
+        'topics': args.topics,
+        'language': args.language,
+        'purity': args.purity,
+        'noise': args.noise,
+        'min_length': args.min_length,
+        'max_length': args.max_length,
+        'topic_skew': args.topic_skew,
+        'seed': args.seed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合成语料生成器')
+    parser.add_argument('--documents', type=int, default=10000)
+    add_corpus_arguments(parser)
+    parser.add_argument('--output', required=True, help='输出文件路径（.csv/.jsonl/.parquet/.xlsx）')
+    args = parser.parse_args()
+    
+    write_corpus(args.output, args.documents, **corpus_options(args))
+    print(f"已生成 {args.documents} 个文档: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
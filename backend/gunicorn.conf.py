@@ -0,0 +1,61 @@
+"""gunicorn 生产环境配置（在 backend 目录下运行 `gunicorn app:app` 时自动加载）
+
+主进程预加载应用后再 fork 出 worker。单 worker 时分析依赖与embedding模型在 worker 启动后由后台线程预热，
+服务立即可以响应；多 worker 时默认在主进程中同步预加载（WARMUP_MODE=preload），
+模型内存以写时复制方式共享，worker 重启时也无需重新加载模型。
+"""
+import os
+import gc
+import sys
+import multiprocessing
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+
+# 分析会话与后台任务保存在进程内存中，多个 worker 时需要负载均衡按会话粘滞路由；
+# 默认单 worker，以线程处理并发请求（各分析状态相互独立）
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# 后台线程（清理、预热）在 fork 之后由各 worker 启动（见 post_fork），避免 fork 时继承持有中的锁
+os.environ.setdefault('DEFER_BACKGROUND_TASKS', '1')
+# 预热默认embedding模型；多 worker 时在 fork 前预加载以共享内存
+os.environ.setdefault('EMBEDDING_WARMUP_MODELS', 'auto')
+os.environ.setdefault('WARMUP_MODE', 'preload' if workers > 1 else 'background')
+# 各 worker 平分CPU，避免多个进程的计算线程相互争抢（未预加载时由预热线程在导入 torch 后设置）
+os.environ.setdefault('TORCH_THREADS', str(max(1, cpu_count // max(workers, 1))))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', max(4, 2 * cpu_count // max(workers, 1))))
+
+# 同步分析请求可能持续数分钟
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 900))
+# 重启或停止时等待进行中的请求完成
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 300))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# 定期重启 worker 回收内存（默认关闭，重启会中断该 worker 中运行的后台任务）
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 50))
+
+preload_app = True
+# 心跳文件放在内存文件系统中，避免容器磁盘IO阻塞导致 worker 被误判超时
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # 预加载的对象移入永久代，减少 worker 中垃圾回收触碰共享内存页导致的复制
+    gc.freeze()
+    server.log.info(f"gunicorn 就绪: {workers} 个worker，每个 {threads} 个线程")
+
+
+def post_fork(server, worker):
+    # 只在主进程已预加载 torch 时设置，不在 worker 中同步导入 torch 拖慢启动
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(int(os.environ['TORCH_THREADS']))
+    
+    from app import start_background_tasks
+    start_background_tasks()
@@ -0,0 +1,66 @@
+import os
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisStore:
+    """保留最近的分析结果（含训练好的模型），供按分析ID访问
+    
+    超出数量上限时淘汰最久未访问的分析，超过保留时间的分析在访问时清理。
+    """
+    
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        if max_entries is None:
+            max_entries = int(os.environ.get('ANALYSIS_STORE_SIZE', 5))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('ANALYSIS_TTL_HOURS', 24)) * 3600
+        
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def save(self, session):
+        """保存分析会话，返回分析ID"""
+        analysis_id = session.get('analysis_id') or uuid.uuid4().hex
+        now = time.time()
+        session.update({
+            'analysis_id': analysis_id,
+            'created_at': session.get('created_at', now),
+            'last_access': now
+        })
+        session.setdefault('rendered', {})
+        
+        with self._lock:
+            self._entries[analysis_id] = session
+            self._entries.move_to_end(analysis_id)
+            while len(self._entries) > self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                logger.info(f"分析结果已淘汰: {evicted_id}")
+        return analysis_id
+    
+    def get(self, analysis_id):
+        """获取分析会话，不存在或已过期时返回 None"""
+        with self._lock:
+            self._purge_expired()
+            session = self._entries.get(analysis_id)
+            if session is not None:
+                session['last_access'] = time.time()
+                self._entries.move_to_end(analysis_id)
+            return session
+    
+    def _purge_expired(self):
+        if not self.ttl_seconds:
+            return
+        now = time.time()
+        expired = [
+            analysis_id for analysis_id, session in self._entries.items()
+            if now - session['last_access'] > self.ttl_seconds
+        ]
+        for analysis_id in expired:
+            del self._entries[analysis_id]
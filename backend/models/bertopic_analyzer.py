@@ -1,57 +1,119 @@
 import os
-import tempfile
+import time
 import zipfile
 import json
 import logging
 from datetime import datetime
 import pandas as pd
 import numpy as np
-from bertopic import BERTopic
-from sentence_transformers import SentenceTransformer
-from umap import UMAP
-from hdbscan import HDBSCAN
-import jieba
-import re
+from contextlib import contextmanager
+
+from models.embedding_registry import get_embedding_registry
+from models.embedding_cache import get_embedding_cache
+from models.knn_graph import build_knn_graph, get_knn_graph_cache, resolve_knn_backend
+from models.engines import (
+    reduction_engine, clustering_engine, create_reduction_model, create_clustering_model, prepare_transform
+)
+from models.sampling import sampling_settings, sample_indices
+from models.analysis_store import AnalysisStore
+from models.online_model_store import get_online_model_store
+from models.model_store import get_topic_model_store
+from utils.text_preprocessor import TextPreprocessor
+from utils.export_writers import EXPORT_FORMATS, write_table
+from utils.scratch_space import get_scratch_space
+from utils.plotly_assets import PLOTLYJS_ASSET_NAME, get_plotlyjs_bundle, plotlyjs_size, point_to_local_plotlyjs
+from utils.profiling import Measurement, StageProfiler, get_metrics
+from utils.job_manager import JobCancelledError
 
 logger = logging.getLogger(__name__)
 
+# 本地模型路径
+LOCAL_EMBEDDING_MODEL_PATH = os.environ.get('LOCAL_EMBEDDING_MODEL_PATH', '/Users/eviane/Downloads/all-MiniLM-L6-v2')
+DEFAULT_EMBEDDING_MODEL = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# 文档查询接口可返回的字段
+DOCUMENT_FIELDS = ('index', 'text', 'processed_text', 'topic', 'probability', 'timestamp')
+
+# 支持的可视化类型（其余选项不生成、不计时）
+VISUALIZATION_TYPES = ('topics', 'barchart', 'heatmap', 'documents', 'hierarchy', 'topics_over_time')
+
 class BERTopicAnalyzer:
-    """BERTopic分析器"""
+    """BERTopic分析器
+    
+    实例只持有各分析共享的只读资源（预处理器、分析结果存储；embedding模型由进程级注册表提供），
+    每次分析的模型、embedding与结果都保存在该分析自己的会话中，可在多个线程中并发分析。
+    """
     
     def __init__(self):
-        self.topic_model = None
-        self.embeddings = None
-        self.docs = None
-        self.timestamps = None
+        self.text_preprocessor = TextPreprocessor()
+        self.analysis_store = AnalysisStore()
     
-    def analyze(self, texts, config, timestamps=None, visualization_options=None, preprocessing_config=None, stopwords=None):
-        """执行BERTopic分析"""
+    def analyze(self, texts, config, timestamps=None, visualization_options=None, preprocessing_config=None, stopwords=None,
+                progress_callback=None, lazy_visualizations=False, plotlyjs=True):
+        """执行BERTopic分析
+        
+        progress_callback(stage, progress) 在各阶段（preprocess/embed/sample/knn/umap/hdbscan/ctfidf/assign/visualizations）
+        开始及推进时被调用，可在回调中抛出异常以中止分析。
+        lazy_visualizations 为 True 时不生成可视化，之后通过 render_visualization 按需渲染。
+        plotlyjs 为 True 时HTML内嵌完整的 plotly.js，为脚本地址时引用共享的 plotly.js。
+        config['online']['enabled'] 为 True 时使用增量模式（见 _analyze_online）；
+        config['sampling']['enabled'] 为 True 时只用抽样文档训练，其余文档分批分配主题（见 models/sampling.py）。
+        结果中的 timings 给出各阶段及各可视化的墙钟时间、CPU时间与峰值内存。
+        """
+        profiler = StageProfiler()
+        report = profiler.wrap(progress_callback)
         try:
-            self.docs = texts
-            self.timestamps = timestamps
+            if config.get('online', {}).get('enabled'):
+                result = self._analyze_online(
+                    texts, config, timestamps, visualization_options, preprocessing_config, stopwords,
+                    report, lazy_visualizations, plotlyjs
+                )
+                result['timings'].update(profiler.finish())
+                return result
             
             # 文本预处理
+            report('preprocess')
             processed_texts = self._preprocess_texts(texts, config, preprocessing_config, stopwords)
             
+            # 机器学习依赖在首次分析时导入（或由启动预热提前导入），不拖慢服务启动
+            from bertopic import BERTopic
+            
             # 选择embedding模型
-            embedding_model = self._select_embedding_model(config)
-            
-            # 配置UMAP
-            umap_model = UMAP(
-                n_neighbors=config.get('umap', {}).get('nNeighbors', 15),
-                n_components=config.get('umap', {}).get('nComponents', 5),
-                min_dist=config.get('umap', {}).get('minDist', 0.0),
-                metric=config.get('umap', {}).get('metric', 'cosine')
-            )
+            embedding_model_name, embedding_model = self._select_embedding_model(config)
             
-            # 配置HDBSCAN
-            hdbscan_model = HDBSCAN(
-                min_cluster_size=config.get('hdbscan', {}).get('minClusterSize', 15),
-                metric=config.get('hdbscan', {}).get('metric', 'euclidean')
+            # 计算embedding（命中缓存的文本不再重复编码）
+            report('embed')
+            embeddings, embedding_cache_stats = self._compute_embeddings(
+                embedding_model_name, embedding_model, processed_texts,
+                progress_callback=lambda done, total: report('embed', done / total)
             )
             
+            # 降维与聚类引擎（默认 UMAP + HDBSCAN，大语料可选线性扩展的引擎，见 models/engines.py）
+            engines = {'reduction': reduction_engine(config), 'clustering': clustering_engine(config)}
+            
+            # 抽样训练：只用样本文档训练模型
+            sampling = sampling_settings(config, len(processed_texts))
+            fit_texts, fit_embeddings, fit_indices = processed_texts, embeddings, None
+            if sampling is not None:
+                report('sample')
+                fit_indices = sample_indices(
+                    len(processed_texts), sampling['sample_size'], sampling['strategy'],
+                    embeddings=embeddings, timestamps=timestamps, strata=sampling['strata'], seed=sampling['seed']
+                )
+                fit_texts = [processed_texts[i] for i in fit_indices]
+                fit_embeddings = embeddings[fit_indices]
+            
+            # 大语料预先构建（或从缓存读取）近邻图，调整其他UMAP参数重新分析时不再重复计算；
+            # 抽样训练后要 transform 其余文档，由UMAP自行构建近邻（同时得到检索索引）
+            knn_graph, knn_stats = None, {'backend': None}
+            if engines['reduction'] == 'umap' and sampling is None:
+                knn_graph, knn_stats = self._knn_graph(embeddings, config, report)
+            
+            umap_model = create_reduction_model(config, precomputed_knn=knn_graph)
+            hdbscan_model = create_clustering_model(config, num_documents=len(fit_texts))
+            
             # 创建BERTopic模型
-            self.topic_model = BERTopic(
+            topic_model = BERTopic(
                 embedding_model=embedding_model,
                 umap_model=umap_model,
                 hdbscan_model=hdbscan_model,
@@ -61,46 +123,305 @@ class BERTopicAnalyzer:
                 calculate_probabilities=config.get('advanced', {}).get('calculateProbabilities', False)
             )
             
-            # 训练模型
-            logger.info(f"开始训练BERTopic模型，文档数量: {len(processed_texts)}")
-            topics, probabilities = self.topic_model.fit_transform(processed_texts)
+            # 训练模型（降维/聚类阶段沿用 umap/hdbscan 的阶段名）
+            logger.info(f"开始训练BERTopic模型，文档数量: {len(fit_texts)}, 引擎: {engines}")
+            fit_start = time.perf_counter()
+            with self._track_fit_stages(report, [(umap_model, 'umap', None), (hdbscan_model, 'hdbscan', 'ctfidf')]):
+                topics, probabilities = topic_model.fit_transform(fit_texts, embeddings=fit_embeddings)
+            fit_seconds = time.perf_counter() - fit_start
+            
+            sampling_stats = {'enabled': False}
+            if sampling is not None:
+                topics, probabilities, sampling_stats = self._assign_remaining(
+                    topic_model, processed_texts, embeddings, fit_indices, topics, probabilities,
+                    sampling['batch_size'], report
+                )
+                sampling_stats.update({
+                    'strategy': sampling['strategy'],
+                    'fit_seconds': round(fit_seconds, 3),
+                    'fit_docs_per_second': round(len(fit_indices) / fit_seconds, 1) if fit_seconds else None
+                })
+                logger.info(
+                    f"抽样训练: {sampling_stats['sample_size']}/{len(processed_texts)} 个文档, "
+                    f"训练 {sampling_stats['fit_docs_per_second']} 文档/s, 分配 {sampling_stats['assign_docs_per_second']} 文档/s"
+                )
             
             # 记录实际的主题数量
             unique_topics = set(topics)
             logger.info(f"训练完成，实际主题数量: {len(unique_topics)}, 主题列表: {sorted(unique_topics)}")
             logger.info(f"主题分布: {dict(zip(*np.unique(topics, return_counts=True)))}")
             
-            # 生成可视化结果
+            result = self._finish_analysis(
+                {
+                    'topic_model': topic_model,
+                    'texts': texts,
+                    'processed_texts': processed_texts,
+                    'topics': topics,
+                    'probabilities': probabilities,
+                    'timestamps': timestamps,
+                    'embeddings': embeddings,
+                    'model_settings': {
+                        'embedding_model': embedding_model_name,
+                        'preprocessing': self._preprocessing_settings(config, preprocessing_config, stopwords)
+                    }
+                },
+                visualization_options, report, lazy_visualizations, plotlyjs, embedding_cache_stats
+            )
+            result['knn_graph'] = knn_stats
+            result['engines'] = engines
+            result['sampling'] = sampling_stats
+            result['timings'].update(profiler.finish())
+            stage_seconds = {stage: timing['wall_seconds'] for stage, timing in result['timings']['stages'].items()}
+            logger.info(f"分析耗时: {result['timings']['total_seconds']:.1f}s, 各阶段: {stage_seconds}")
+            return result
+        
+        except JobCancelledError:
+            # 用户取消不计入失败数
+            profiler.finish(status='cancelled')
+            raise
+        
+        except Exception as e:
+            profiler.finish(status='failed')
+            logger.error(f"BERTopic分析错误: {str(e)}")
+            raise
+    
+    def _assign_remaining(self, topic_model, texts, embeddings, fit_indices, fit_topics, fit_probabilities,
+                          batch_size, report):
+        """抽样训练后按批为其余文档分配主题（transform 复用已计算的embedding）
+        
+        Returns:
+            (全部文档的主题, 概率或None, 抽样统计)，主题规模按全部文档更新
+        """
+        num_documents = len(texts)
+        remaining = np.setdiff1d(np.arange(num_documents), fit_indices, assume_unique=True)
+        topics = np.empty(num_documents, dtype=int)
+        topics[fit_indices] = fit_topics
+        probabilities = None
+        if fit_probabilities is not None:
+            fit_probabilities = np.asarray(fit_probabilities, dtype=float)
+            probabilities = np.full((num_documents,) + fit_probabilities.shape[1:], np.nan)
+            probabilities[fit_indices] = fit_probabilities
+        
+        report('assign')
+        start = time.perf_counter()
+        prepare_transform(topic_model)
+        for offset in range(0, len(remaining), batch_size):
+            batch = remaining[offset:offset + batch_size]
+            batch_topics, batch_probabilities = topic_model.transform(
+                [texts[i] for i in batch], embeddings=embeddings[batch]
+            )
+            topics[batch] = batch_topics
+            if probabilities is not None:
+                if batch_probabilities is None or np.shape(batch_probabilities)[1:] != probabilities.shape[1:]:
+                    logger.warning("分配主题时未得到与训练一致的主题概率，结果不包含概率")
+                    probabilities = None
+                else:
+                    probabilities[batch] = batch_probabilities
+            report('assign', (offset + len(batch)) / len(remaining))
+        assign_seconds = time.perf_counter() - start
+        
+        # topics_ 与主题规模按全部文档更新，主题信息中的文档数与全量训练一致
+        topic_model._update_topic_size(pd.DataFrame({'Topic': topics}))
+        
+        return topics, probabilities, {
+            'enabled': True,
+            'documents': num_documents,
+            'sample_size': len(fit_indices),
+            'assigned_documents': len(remaining),
+            'batch_size': batch_size,
+            'assign_seconds': round(assign_seconds, 3),
+            'assign_docs_per_second': round(len(remaining) / assign_seconds, 1) if assign_seconds else None
+        }
+    
+    def _analyze_online(self, texts, config, timestamps, visualization_options, preprocessing_config, stopwords,
+                        report, lazy_visualizations, plotlyjs):
+        """增量模式：按模型键加载已保存的模型，只将尚未处理过的文档并入（partial_fit）
+        
+        使用支持增量训练的组件（IncrementalPCA / MiniBatchKMeans / OnlineCountVectorizer），
+        每次更新的耗时只与新增文档数量相关。新增文档少于一个批次的最小样本数时只做主题分配，
+        留待下次与更多文档一起并入模型。
+        """
+        from sklearn.decomposition import IncrementalPCA
+        from sklearn.cluster import MiniBatchKMeans
+        from bertopic import BERTopic
+        from bertopic.vectorizers import OnlineCountVectorizer
+        
+        online_config = config['online']
+        model_key = online_config.get('modelKey')
+        store = get_online_model_store()
+        store.validate_key(model_key)
+        
+        with store.locked(model_key):
+            state = store.load_state(model_key)
+            seen = store.load_seen(model_key)
+            
+            # 跳过已并入模型的文档（重复提交累积数据时只处理新增部分）
+            fingerprints = store.fingerprints(texts)
+            if online_config.get('skipSeen', True):
+                new_indices = np.flatnonzero(~np.isin(fingerprints, seen))
+            else:
+                new_indices = np.arange(len(texts))
+            new_texts = [texts[i] for i in new_indices]
+            new_timestamps = [timestamps[i] for i in new_indices] if timestamps is not None else None
+            logger.info(f"增量模型 {model_key}: 新增文档 {len(new_texts)}，跳过已处理文档 {len(texts) - len(new_texts)}")
+            
+            report('preprocess')
+            processed_texts = self._preprocess_texts(new_texts, config, preprocessing_config, stopwords)
+            
+            # 已有模型沿用首次训练时的embedding模型，保证向量空间一致
+            if state is not None:
+                embedding_model_name = state['embedding_model']
+                embedding_model = get_embedding_registry().get(embedding_model_name)
+            else:
+                embedding_model_name, embedding_model = self._select_embedding_model(config)
+            
+            report('embed')
+            embedding_cache_stats = {'documents': 0}
+            embeddings = None
+            if processed_texts:
+                embeddings, embedding_cache_stats = self._compute_embeddings(
+                    embedding_model_name, embedding_model, processed_texts,
+                    progress_callback=lambda done, total: report('embed', done / total)
+                )
+            
+            if state is None:
+                state = {
+                    'model_key': model_key,
+                    'embedding_model': embedding_model_name,
+                    'n_components': online_config.get('nComponents', 5),
+                    'n_clusters': online_config.get('nClusters', 20),
+                    'documents': 0,
+                    'updates': 0,
+                    'created_at': time.time()
+                }
+                if len(processed_texts) < max(state['n_components'], state['n_clusters']):
+                    raise ValueError(f"首次训练增量模型至少需要 {max(state['n_components'], state['n_clusters'])} 个文档")
+                topic_model = BERTopic(
+                    embedding_model=embedding_model,
+                    umap_model=IncrementalPCA(n_components=state['n_components']),
+                    hdbscan_model=MiniBatchKMeans(n_clusters=state['n_clusters'], random_state=42, n_init=3),
+                    vectorizer_model=OnlineCountVectorizer(decay=online_config.get('decay', 0.01)),
+                    top_n_words=config.get('advanced', {}).get('topNWords', 10)
+                )
+            else:
+                topic_model = store.load_model(model_key, embedding_model)
+            
+            folded = len(processed_texts) >= state['n_components']
+            topics = []
+            if folded:
+                # 分批并入，每批不少于 batchSize 个文档
+                batch_size = max(int(online_config.get('batchSize', 5000)), state['n_components'], state['n_clusters'])
+                batches = np.array_split(np.arange(len(processed_texts)), max(1, len(processed_texts) // batch_size))
+                for index, batch in enumerate(batches):
+                    report('umap', index / len(batches))
+                    # 增量组件在各批次间要求一致的 float64 输入
+                    topic_model.partial_fit(
+                        [processed_texts[i] for i in batch],
+                        embeddings=embeddings[batch].astype(np.float64)
+                    )
+                    topics.extend(topic_model.topics_)
+                
+                report('ctfidf')
+                seen = np.union1d(seen, fingerprints[new_indices])
+                state['documents'] += len(processed_texts)
+                state['updates'] += 1
+                store.save(model_key, topic_model, state, seen)
+            elif processed_texts:
+                topics, _ = topic_model.transform(processed_texts, embeddings=embeddings.astype(np.float64))
+        
+        result = self._finish_analysis(
+            {
+                'topic_model': topic_model,
+                'texts': new_texts,
+                'processed_texts': processed_texts,
+                'topics': np.asarray(topics, dtype=int),
+                'probabilities': None,
+                'timestamps': new_timestamps,
+                'embeddings': embeddings,
+                'model_settings': {
+                    'embedding_model': embedding_model_name,
+                    'preprocessing': self._preprocessing_settings(config, preprocessing_config, stopwords)
+                }
+            },
+            visualization_options, report, lazy_visualizations, plotlyjs, embedding_cache_stats
+        )
+        result['online'] = {
+            'model_key': model_key,
+            'new_documents': len(new_texts),
+            'skipped_documents': len(texts) - len(new_texts),
+            'folded_into_model': bool(folded),
+            'total_documents': state['documents'],
+            'updates': state['updates']
+        }
+        return result
+    
+    def _finish_analysis(self, session, visualization_options, report, lazy_visualizations, plotlyjs, embedding_cache_stats):
+        """保存分析会话、生成可视化并组装分析结果
+        
+        session 为本次分析独有的状态：topic_model、texts、processed_texts、topics、probabilities、
+        timestamps、embeddings，以及保存模型（save_model）时使用的 model_settings（embedding模型名称与预处理设置）。
+        """
+        session.update({
+            'plotlyjs': plotlyjs,
+            'visualization_options': list(visualization_options or [])
+        })
+        # 保存分析会话，供按需渲染可视化、查询文档与导出
+        analysis_id = self.analysis_store.save(session)
+        
+        texts = session['texts']
+        topics = session['topics']
+        probabilities = session['probabilities']
+        
+        # 生成可视化结果
+        visualizations = {}
+        visualization_timings = {}
+        if not lazy_visualizations:
+            report('visualizations')
             visualizations = self._generate_visualizations(
                 visualization_options or [],
-                processed_texts,
+                session['processed_texts'],
                 topics,
                 probabilities,
-                timestamps
+                session['timestamps'],
+                progress_callback=lambda done, total: report('visualizations', done / total),
+                topic_model=session['topic_model'],
+                embeddings=session['embeddings'],
+                plotlyjs=plotlyjs,
+                timings=visualization_timings
             )
-            
-            return {
-                'success': True,
-                'texts': texts,  # 返回原始文本
-                'topics': topics.tolist() if hasattr(topics, 'tolist') else list(topics),
-                'probabilities': probabilities.tolist() if probabilities is not None and hasattr(probabilities, 'tolist') else (list(probabilities) if probabilities is not None else None),
-                'topic_info': self.topic_model.get_topic_info().to_dict('records'),
-                'visualizations': visualizations,
-                'model_info': {
-                    'num_topics': len(set(topics)) - (1 if -1 in topics else 0),
-                    'num_documents': len(texts),
-                    'num_noise': list(topics).count(-1)
-                }
+        
+        return {
+            'success': True,
+            'analysis_id': analysis_id,
+            'texts': texts,  # 返回原始文本
+            # 数组由响应编码器直接序列化，避免生成中间列表
+            'topics': np.asarray(topics),
+            'probabilities': np.asarray(probabilities) if probabilities is not None else None,
+            'topic_info': session['topic_model'].get_topic_info().to_dict('records'),
+            'visualizations': visualizations,
+            'visualization_bytes': self._visualization_bytes(visualizations, plotlyjs),
+            'embedding_cache': embedding_cache_stats,
+            # 各阶段耗时由 analyze 在分析结束时补充
+            'timings': {'visualizations': visualization_timings},
+            'model_info': {
+                'num_topics': len(set(topics)) - (1 if -1 in topics else 0),
+                'num_documents': len(texts),
+                'num_noise': int(np.count_nonzero(np.asarray(topics) == -1))
             }
-            
-        except Exception as e:
-            logger.error(f"BERTopic分析错误: {str(e)}")
-            raise
+        }
     
     def _preprocess_texts(self, texts, config, preprocessing_config=None, stopwords=None):
         """文本预处理"""
-        processed_texts = []
-        
+        settings = self._preprocessing_settings(config, preprocessing_config, stopwords)
+        return self.text_preprocessor.process(
+            texts,
+            settings['cleaning'],
+            settings['stopwords'],
+            workers=settings['cleaning'].get('workers')
+        )
+    
+    def _preprocessing_settings(self, config, preprocessing_config=None, stopwords=None):
+        """合并后的清洗配置与停用词（随模型保存，新文档按相同方式预处理）"""
         # 合并配置
         cleaning_config = {}
         if preprocessing_config:
@@ -113,92 +434,119 @@ class BERTopicAnalyzer:
         if stopwords and stopwords.get('final'):
             stopwords_list = stopwords['final']
         
-        for text in texts:
-            # 基本清理
-            if cleaning_config.get('removeNumbers', True):
-                text = re.sub(r'\d+', '', text)
-            
-            if cleaning_config.get('removePunctuation', True):
-                text = re.sub(r'[^\w\s]', '', text)
-            
-            if cleaning_config.get('toLowerCase', True):
-                text = text.lower()
-            
-            # 去除英文字符（中文文档）
-            if cleaning_config.get('removeEnglishChars', False):
-                text = re.sub(r'[a-zA-Z]', '', text)
-            
-            # 中文分词
-            segmenter = cleaning_config.get('segmenter', 'jieba')
-            if segmenter == 'jieba':
-                text = ' '.join(jieba.cut(text))
-            elif segmenter == 'pkuseg':
-                try:
-                    import pkuseg
-                    seg = pkuseg.pkuseg()
-                    text = ' '.join(seg.cut(text))
-                except ImportError:
-                    logger.warning("pkuseg未安装，使用jieba替代")
-                    text = ' '.join(jieba.cut(text))
-            elif segmenter == 'thulac':
-                try:
-                    import thulac
-                    thu = thulac.thulac(seg_only=True)
-                    text = ' '.join(thu.cut(text))
-                except ImportError:
-                    logger.warning("thulac未安装，使用jieba替代")
-                    text = ' '.join(jieba.cut(text))
-            
-            # 应用停用词
-            if stopwords_list:
-                words = text.split()
-                words = [word for word in words if word not in stopwords_list]
-                text = ' '.join(words)
-            
-            processed_texts.append(text)
-        
-        return processed_texts
+        return {'cleaning': cleaning_config, 'stopwords': stopwords_list}
     
     def _select_embedding_model(self, config):
-        """选择embedding模型"""
-        # 本地模型路径
-        local_model_path = '/Users/eviane/Downloads/all-MiniLM-L6-v2'
+        """选择embedding模型（从进程级注册表获取，避免每次请求重复加载）"""
+        registry = get_embedding_registry()
         
-        # 检查本地模型是否存在
-        if os.path.exists(local_model_path):
+        for model_name in self._resolve_embedding_model_names(config):
             try:
-                logger.info(f"使用本地模型: {local_model_path}")
-                return SentenceTransformer(local_model_path)
+                logger.info(f"使用embedding模型: {model_name}")
+                return model_name, registry.get(model_name)
             except Exception as e:
-                logger.error(f"本地模型加载失败: {str(e)}")
-                logger.info("回退到在线模型")
+                logger.error(f"模型加载失败: {model_name}, {str(e)}")
+        
+        raise RuntimeError("没有可用的embedding模型")
+    
+    @contextmanager
+    def _track_fit_stages(self, report, stage_models):
+        """在BERTopic内部的降维/聚类步骤开始（及结束）时回调进度
+        
+        stage_models: [(模型, 开始阶段, 结束后进入的阶段或None)]
+        """
+        for model, stage, next_stage in stage_models:
+            original_fit = model.fit
+            
+            def tracked_fit(*args, _fit=original_fit, _stage=stage, _next=next_stage, **kwargs):
+                report(_stage)
+                fitted = _fit(*args, **kwargs)
+                if _next:
+                    report(_next)
+                return fitted
+            
+            model.fit = tracked_fit
+        try:
+            yield
+        finally:
+            # 移除实例上的包装，避免影响模型序列化
+            for model, _, _ in stage_models:
+                model.__dict__.pop('fit', None)
+    
+    def _compute_embeddings(self, model_name, embedding_model, texts, progress_callback=None):
+        """通过磁盘缓存计算embedding，返回 (embeddings, 缓存统计)"""
+        cache = get_embedding_cache()
+        if cache is None:
+            embeddings = np.asarray(embedding_model.encode(texts, show_progress_bar=False), dtype=np.float32)
+            return embeddings, {'enabled': False}
+        
+        try:
+            embeddings, stats = cache.encode(embedding_model, model_name, texts, progress_callback=progress_callback)
+            stats['enabled'] = True
+            return embeddings, stats
+        except (OSError, ValueError) as e:
+            # 只处理缓存读写错误；进度回调抛出的取消等异常直接向上传递
+            logger.warning(f"embedding缓存不可用，直接编码: {str(e)}")
+            embeddings = np.asarray(embedding_model.encode(texts, show_progress_bar=False), dtype=np.float32)
+            return embeddings, {'enabled': False, 'error': str(e)}
+    
+    def _knn_graph(self, embeddings, config, report):
+        """UMAP 使用的预计算近邻图，返回 ((indices, distances) 或 None, 统计信息)
+        
+        config['umap']['knnBackend']: auto（默认，按文档数决定）、nndescent、hnsw 或 off。
+        构建失败时返回 None，由 UMAP 自行计算近邻。
+        """
+        umap_config = config.get('umap', {})
+        n_neighbors = umap_config.get('nNeighbors', 15)
+        metric = umap_config.get('metric', 'cosine')
+        
+        backend = resolve_knn_backend(umap_config.get('knnBackend'), len(embeddings))
+        if backend is None or n_neighbors >= len(embeddings):
+            return None, {'backend': None}
+        
+        report('knn')
+        try:
+            cache = get_knn_graph_cache()
+            if cache is not None:
+                return cache.get_or_build(embeddings, n_neighbors, metric, backend)
+            
+            start = time.perf_counter()
+            graph = build_knn_graph(embeddings, n_neighbors, metric, backend)
+            return graph, {'backend': backend, 'n_neighbors': n_neighbors, 'hit': False,
+                           'elapsed': round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            logger.warning(f"近邻图构建失败，由UMAP计算近邻: {str(e)}")
+            return None, {'backend': backend, 'error': str(e)}
+    
+    def _resolve_embedding_model_names(self, config):
+        """按优先级返回候选embedding模型名称/路径"""
+        candidates = []
+        
+        # 本地模型存在时优先使用
+        if os.path.exists(LOCAL_EMBEDDING_MODEL_PATH):
+            candidates.append(LOCAL_EMBEDDING_MODEL_PATH)
         
         # 根据配置选择模型
         model_name = config.get('basic', {}).get('embeddingModel', 'auto')
-        
         if model_name == 'auto':
             # 自动选择多语言模型
-            model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
-        elif model_name == 'all-MiniLM-L6-v2':
-            # 尝试使用本地路径
-            if os.path.exists(local_model_path):
-                try:
-                    return SentenceTransformer(local_model_path)
-                except Exception as e:
-                    logger.error(f"本地模型加载失败: {str(e)}")
-                    logger.info("回退到在线模型")
+            model_name = DEFAULT_EMBEDDING_MODEL
+        candidates.append(model_name)
         
-        try:
-            logger.info(f"使用在线模型: {model_name}")
-            return SentenceTransformer(model_name)
-        except Exception as e:
-            logger.error(f"模型加载失败: {str(e)}")
-            # 最后的回退方案
-            logger.info("使用默认多语言模型")
-            return SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        # 最后的回退方案
+        candidates.append(DEFAULT_EMBEDDING_MODEL)
+        
+        return list(dict.fromkeys(candidates))
     
-    def _generate_visualizations(self, options, texts, topics, probabilities, timestamps=None):
-        """生成可视化结果"""
+    def _generate_visualizations(self, options, texts, topics, probabilities, timestamps=None, progress_callback=None,
+                                 topic_model=None, embeddings=None, formats=('html', 'data'), plotlyjs=True, timings=None):
+        """生成可视化结果
+        
+        topic_model 与 embeddings 来自所属分析的会话。
+        成功时每项为 {'html': ..., 'data': ...}（只包含 formats 中的格式），失败时为说明原因的字符串。
+        plotlyjs 决定HTML内嵌 plotly.js 还是引用共享脚本地址。
+        每个可视化的耗时记录到全局指标，传入 timings 字典时同时写入其中。
+        """
         visualizations = {}
         
         # 检查主题数量
@@ -207,7 +555,13 @@ class BERTopicAnalyzer:
         
         logger.info(f"开始生成可视化，主题数量: {num_topics}, 文档数量: {len(texts)}")
         
-        for option in options:
+        measurement = None
+        for index, option in enumerate(options):
+            self._record_visualization_timing(measurement, timings)
+            if progress_callback:
+                progress_callback(index, len(options))
+            # 只为支持的类型计时，避免任意选项名产生新的指标序列
+            measurement = (option, Measurement().start()) if option in VISUALIZATION_TYPES else None
             try:
                 logger.info(f"正在生成 {option} 可视化...")
                 
@@ -218,11 +572,8 @@ class BERTopicAnalyzer:
                     
                     try:
                         # 使用标准BERTopic方法
-                        fig = self.topic_model.visualize_topics()
-                        visualizations['topics'] = {
-                            'html': self._fig_to_html(fig),
-                            'data': self._fig_to_json(fig)
-                        }
+                        fig = topic_model.visualize_topics()
+                        visualizations['topics'] = self._figure_entry(fig, formats, plotlyjs)
                         logger.info("Topic visualization generated successfully")
                     except Exception as e:
                         logger.warning(f"Topic visualization failed: {str(e)}")
@@ -235,11 +586,8 @@ class BERTopicAnalyzer:
                     
                     try:
                         # 使用标准BERTopic方法
-                        fig = self.topic_model.visualize_barchart()
-                        visualizations['barchart'] = {
-                            'html': self._fig_to_html(fig),
-                            'data': self._fig_to_json(fig)
-                        }
+                        fig = topic_model.visualize_barchart()
+                        visualizations['barchart'] = self._figure_entry(fig, formats, plotlyjs)
                         logger.info("Bar chart generated successfully")
                     except Exception as e:
                         logger.warning(f"Bar chart generation failed: {str(e)}")
@@ -252,11 +600,8 @@ class BERTopicAnalyzer:
                     
                     try:
                         # 使用标准BERTopic方法
-                        fig = self.topic_model.visualize_heatmap()
-                        visualizations['heatmap'] = {
-                            'html': self._fig_to_html(fig),
-                            'data': self._fig_to_json(fig)
-                        }
+                        fig = topic_model.visualize_heatmap()
+                        visualizations['heatmap'] = self._figure_entry(fig, formats, plotlyjs)
                         logger.info("Heatmap generated successfully")
                     except Exception as e:
                         logger.warning(f"Heatmap generation failed: {str(e)}")
@@ -265,11 +610,8 @@ class BERTopicAnalyzer:
                 elif option == 'documents':
                     try:
                         # 使用标准BERTopic方法
-                        fig = self.topic_model.visualize_documents(texts)
-                        visualizations['documents'] = {
-                            'html': self._fig_to_html(fig),
-                            'data': self._fig_to_json(fig)
-                        }
+                        fig = topic_model.visualize_documents(texts, embeddings=embeddings)
+                        visualizations['documents'] = self._figure_entry(fig, formats, plotlyjs)
                         logger.info("Documents visualization generated successfully")
                     except Exception as e:
                         logger.warning(f"Documents visualization failed: {str(e)}")
@@ -285,20 +627,14 @@ class BERTopicAnalyzer:
                         import scipy
                         if hasattr(scipy, 'array'):
                             # 使用标准BERTopic方法
-                            fig = self.topic_model.visualize_hierarchy()
-                            visualizations['hierarchy'] = {
-                                'html': self._fig_to_html(fig),
-                                'data': self._fig_to_json(fig)
-                            }
+                            fig = topic_model.visualize_hierarchy()
+                            visualizations['hierarchy'] = self._figure_entry(fig, formats, plotlyjs)
                             logger.info("Hierarchy visualization generated successfully")
                         else:
                             # 创建简单的层次结构可视化
                             fig = self._create_fallback_hierarchy_visualization(texts, topics)
                             if fig is not None:
-                                visualizations['hierarchy'] = {
-                                    'html': self._fig_to_html(fig),
-                                    'data': self._fig_to_json(fig)
-                                }
+                                visualizations['hierarchy'] = self._figure_entry(fig, formats, plotlyjs)
                                 logger.info("Hierarchy visualization generated using fallback method")
                             else:
                                 visualizations['hierarchy'] = "Hierarchy visualization failed: fallback method error"
@@ -307,10 +643,7 @@ class BERTopicAnalyzer:
                         # 使用备用方法
                         fig = self._create_fallback_hierarchy_visualization(texts, topics)
                         if fig is not None:
-                            visualizations['hierarchy'] = {
-                                'html': self._fig_to_html(fig),
-                                'data': self._fig_to_json(fig)
-                            }
+                            visualizations['hierarchy'] = self._figure_entry(fig, formats, plotlyjs)
                         else:
                             visualizations['hierarchy'] = "Hierarchy visualization failed: fallback method error"
                 
@@ -329,48 +662,263 @@ class BERTopicAnalyzer:
                                 timestamps = timestamps[:len(texts)]
                             else:
                                 # 用最后一个时间戳填充
-                                timestamps.extend([timestamps[-1]] * (len(texts) - len(timestamps)))
+                                timestamps = list(timestamps) + [timestamps[-1]] * (len(texts) - len(timestamps))
                         
                         # 使用标准BERTopic方法
-                        topics_over_time = self.topic_model.topics_over_time(texts, timestamps, global_tuning=False, evolution_tuning=False)
-                        fig = self.topic_model.visualize_topics_over_time(topics_over_time)
-                        visualizations['topics_over_time'] = self._fig_to_html(fig)
+                        topics_over_time = topic_model.topics_over_time(texts, timestamps, global_tuning=False, evolution_tuning=False)
+                        fig = topic_model.visualize_topics_over_time(topics_over_time)
+                        visualizations['topics_over_time'] = self._figure_entry(fig, formats, plotlyjs)
                         logger.info("Topics over time visualization generated successfully")
                     except Exception as e:
                         logger.warning(f"Topics over time visualization failed: {str(e)}")
                         visualizations['topics_over_time'] = f"Topics over time visualization failed: {str(e)}"
-                
+            
             except Exception as e:
                 logger.error(f"生成可视化 {option} 错误: {str(e)}")
                 visualizations[option] = f"生成失败: {str(e)}"
+        self._record_visualization_timing(measurement, timings)
         
         logger.info(f"可视化生成完成，成功生成 {len([v for v in visualizations.values() if not str(v).startswith('无法生成') and not str(v).startswith('生成失败')])} 个可视化")
         return visualizations
     
-    def _fig_to_html(self, fig):
-        """将plotly图形转换为HTML字符串"""
-        return fig.to_html(include_plotlyjs=True, div_id="plotly-div")
+    def _record_visualization_timing(self, measurement, timings=None):
+        """结束单个可视化的计时（measurement 为 (可视化类型, Measurement)）"""
+        if measurement is None:
+            return
+        option, running = measurement
+        result = running.stop()
+        get_metrics().observe_visualization(option, result['wall_seconds'])
+        if timings is not None:
+            timings[option] = result
     
-    def _fig_to_json(self, fig):
-        """将plotly图形转换为JSON数据"""
-        import json
-        import numpy as np
-        
-        def convert_numpy(obj):
-            """递归转换numpy数组为Python列表"""
-            if isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, dict):
-                return {key: convert_numpy(value) for key, value in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_numpy(item) for item in obj]
-            elif isinstance(obj, (np.integer, np.floating)):
-                return obj.item()
+    def render_visualization(self, analysis_id, option, output_format='json', plotlyjs=None):
+        """按需渲染已保存分析的单个可视化（结果按格式缓存）
+        
+        plotlyjs 为 None 时沿用分析时的 plotly.js 引用方式。
+        
+        Returns:
+            (内容, 错误信息)，分析不存在时返回 (None, None)
+        """
+        session = self.analysis_store.get(analysis_id)
+        if session is None:
+            return None, None
+        
+        if option not in VISUALIZATION_TYPES:
+            return None, f"不支持的可视化类型: {option}"
+        if plotlyjs is None:
+            plotlyjs = session.get('plotlyjs', True)
+        key = (option, output_format, plotlyjs if output_format == 'html' else None)
+        if key not in session['rendered']:
+            entry_format = 'data' if output_format == 'json' else 'html'
+            entry = self._generate_visualizations(
+                [option],
+                session['processed_texts'],
+                session['topics'],
+                session['probabilities'],
+                session['timestamps'],
+                topic_model=session['topic_model'],
+                embeddings=session['embeddings'],
+                formats=(entry_format,),
+                plotlyjs=plotlyjs
+            ).get(option, f"不支持的可视化类型: {option}")
+            session['rendered'][key] = (entry[entry_format], None) if isinstance(entry, dict) else (None, entry)
+        
+        return session['rendered'][key]
+    
+    def query_documents(self, analysis_id, topic=None, offset=0, limit=50, fields=None):
+        """分页查询已保存分析的文档
+        
+        Args:
+            topic: 只返回该主题的文档，None 表示全部
+            fields: 返回的字段（DOCUMENT_FIELDS 的子集），None 表示全部
+        
+        Returns:
+            {'total', 'offset', 'limit', 'documents'}，分析不存在时返回 None
+        """
+        session = self.analysis_store.get(analysis_id)
+        if session is None:
+            return None
+        
+        topics = np.asarray(session['topics'])
+        indices = np.arange(len(topics)) if topic is None else np.flatnonzero(topics == topic)
+        page = indices[offset:offset + limit]
+        fields = fields or DOCUMENT_FIELDS
+        
+        columns = {}
+        if 'index' in fields:
+            columns['index'] = page
+        if 'text' in fields:
+            columns['text'] = [session['texts'][i] for i in page]
+        if 'processed_text' in fields:
+            columns['processed_text'] = [session['processed_texts'][i] for i in page]
+        if 'topic' in fields:
+            columns['topic'] = topics[page]
+        if 'probability' in fields:
+            probabilities = session['probabilities']
+            if probabilities is None:
+                columns['probability'] = [None] * len(page)
             else:
-                return obj
+                columns['probability'] = self._document_probabilities(probabilities)[page]
+        if 'timestamp' in fields:
+            timestamps = session['timestamps']
+            columns['timestamp'] = [timestamps[i] for i in page] if timestamps is not None else [None] * len(page)
+        
+        columns = {name: values.tolist() if isinstance(values, np.ndarray) else values for name, values in columns.items()}
+        documents = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        return {
+            'total': int(len(indices)),
+            'offset': offset,
+            'limit': limit,
+            'documents': documents
+        }
+    
+    def load_export_data(self, analysis_id):
+        """从已保存的分析构造导出所需的数据，分析不存在时返回 None
+        
+        与客户端回传的导出数据结构相同，可直接交给各 export_* 方法。
+        """
+        session = self.analysis_store.get(analysis_id)
+        if session is None:
+            return None
+        
+        topics = np.asarray(session['topics'])
+        probabilities = session['probabilities']
+        return {
+            'analysis_id': analysis_id,
+            'texts': session['texts'],
+            'topics': topics,
+            'probabilities': self._document_probabilities(probabilities) if probabilities is not None else None,
+            'topic_info': session['topic_model'].get_topic_info().to_dict('records'),
+            'model_info': {
+                'num_topics': len(set(topics.tolist())) - (1 if -1 in topics else 0),
+                'num_documents': len(session['texts']),
+                'num_noise': int(np.count_nonzero(topics == -1))
+            },
+            # 可视化在导出时按需渲染
+            'visualizations': {option: {'lazy': True} for option in session.get('visualization_options', [])}
+        }
+    
+    def _document_probabilities(self, probabilities):
+        """每个文档一个概率值：计算了完整概率矩阵时取每个文档的最大主题概率"""
+        probabilities = np.asarray(probabilities)
+        return probabilities.max(axis=1) if probabilities.ndim == 2 else probabilities
+    
+    def save_model(self, analysis_id):
+        """持久化已保存分析中的主题模型（模型ID与分析ID相同），已保存过时直接返回
+        
+        Returns:
+            模型元数据，分析不存在时返回 None
+        """
+        store = get_topic_model_store()
+        meta = store.get_meta(analysis_id)
+        if meta is not None:
+            return meta
+        
+        session = self.analysis_store.get(analysis_id)
+        if session is None:
+            return None
+        if not session.get('model_settings'):
+            raise ValueError('该分析缺少embedding模型与预处理设置，无法保存模型')
+        
+        topics = np.asarray(session['topics'])
+        return store.save(analysis_id, session['topic_model'], {
+            'analysis_id': analysis_id,
+            'embedding_model': session['model_settings']['embedding_model'],
+            'preprocessing': session['model_settings']['preprocessing'],
+            'num_topics': len(set(topics.tolist())) - (1 if -1 in topics else 0),
+            'num_documents': len(session['texts'])
+        })
+    
+    def transform_documents(self, model_id, documents, batch_size=None):
+        """使用已保存的模型为新文档分配主题，不重新训练
         
-        fig_dict = fig.to_dict()
-        return convert_numpy(fig_dict)
+        文档按模型保存时的预处理设置处理，分批计算embedding并分配主题。
+        
+        Returns:
+            {'model_id', 'topics', 'probabilities', 'topic_names', 'timings'}，模型不存在时返回 None
+        """
+        registry = get_embedding_registry()
+        topic_model, meta = get_topic_model_store().get(model_id, registry.get)
+        if topic_model is None:
+            return None
+        prepare_transform(topic_model)
+        if batch_size is None:
+            batch_size = int(os.environ.get('TRANSFORM_BATCH_SIZE', 256))
+        batch_size = max(1, int(batch_size))
+        
+        timings = {'preprocess': 0.0, 'embed': 0.0, 'assign': 0.0}
+        start = time.perf_counter()
+        preprocessing = meta['preprocessing']
+        processed_texts = self.text_preprocessor.process(
+            documents,
+            preprocessing['cleaning'],
+            preprocessing['stopwords'],
+            workers=preprocessing['cleaning'].get('workers')
+        )
+        timings['preprocess'] = time.perf_counter() - start
+        
+        # 新到达的文档很少重复，直接编码，不经过embedding磁盘缓存
+        embedding_model = registry.get(meta['embedding_model'])
+        topics = np.empty(len(processed_texts), dtype=int)
+        probabilities = np.full(len(processed_texts), np.nan)
+        for offset in range(0, len(processed_texts), batch_size):
+            batch = processed_texts[offset:offset + batch_size]
+            start = time.perf_counter()
+            embeddings = np.asarray(embedding_model.encode(batch, show_progress_bar=False), dtype=np.float32)
+            timings['embed'] += time.perf_counter() - start
+            
+            start = time.perf_counter()
+            batch_topics, batch_probabilities = topic_model.transform(batch, embeddings=embeddings)
+            timings['assign'] += time.perf_counter() - start
+            
+            topics[offset:offset + len(batch)] = batch_topics
+            if batch_probabilities is not None:
+                probabilities[offset:offset + len(batch)] = self._document_probabilities(batch_probabilities)
+        
+        labels = topic_model.topic_labels_ or {}
+        return {
+            'model_id': model_id,
+            'topics': topics,
+            'probabilities': None if np.isnan(probabilities).all() else probabilities,
+            'topic_names': {int(topic): labels.get(int(topic), str(topic)) for topic in np.unique(topics)},
+            'timings': {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+        }
+    
+    def _figure_entry(self, fig, formats=('html', 'data'), plotlyjs=True):
+        """将图形转换为指定格式，html_bytes 记录HTML的字节数"""
+        entry = {}
+        if 'html' in formats:
+            entry['html'] = self._fig_to_html(fig, plotlyjs)
+            entry['html_bytes'] = len(entry['html'].encode('utf-8'))
+        if 'data' in formats:
+            entry['data'] = self._fig_to_json(fig)
+        return entry
+    
+    def _fig_to_html(self, fig, plotlyjs=True):
+        """将plotly图形转换为HTML字符串（plotlyjs 为脚本地址时不内嵌 plotly.js）"""
+        return fig.to_html(include_plotlyjs=plotlyjs, div_id="plotly-div")
+    
+    def _visualization_bytes(self, visualizations, plotlyjs=True):
+        """统计各可视化HTML的字节数，以及共享 plotly.js 相比内嵌节省的字节数"""
+        per_visualization = {
+            option: entry['html_bytes']
+            for option, entry in visualizations.items()
+            if isinstance(entry, dict) and 'html_bytes' in entry
+        }
+        shared = plotlyjs is not True
+        bundle_bytes = plotlyjs_size() if per_visualization else 0
+        return {
+            'plotlyjs': 'shared' if shared else 'inline',
+            'plotlyjs_bytes': bundle_bytes,
+            'html_bytes': per_visualization,
+            'total_html_bytes': sum(per_visualization.values()),
+            # 共享模式下 plotly.js 只需下载一次
+            'saved_bytes': bundle_bytes * max(len(per_visualization) - 1, 0) if shared else 0
+        }
+    
+    def _fig_to_json(self, fig):
+        """将plotly图形转换为JSON数据（保留numpy数组，由响应编码器直接序列化）"""
+        return fig.to_dict()
     
     def _create_fallback_topics_visualization(self, texts, topics):
         """创建备用的主题可视化"""
@@ -400,7 +948,7 @@ class BERTopicAnalyzer:
             )
             
             return fig
-            
+        
         except Exception as e:
             logger.error(f"备用可视化生成失败: {str(e)}")
             return None
@@ -429,7 +977,7 @@ class BERTopicAnalyzer:
             )
             
             return fig
-            
+        
         except Exception as e:
             logger.error(f"备用层级可视化生成失败: {str(e)}")
             return None
@@ -479,6 +1027,26 @@ class BERTopicAnalyzer:
 """
         return html_content
     
+    def _resolve_export_visualizations(self, analysis_id, visualizations):
+        """准备导出用的可视化HTML（按需渲染的句柄替换为HTML内容）
+        
+        分析会话仍在时，所有可视化按引用同目录 plotly.min.js 的方式重新渲染，避免每个文件内嵌 plotly.js。
+        """
+        resolved = {}
+        session_available = bool(analysis_id) and self.analysis_store.get(analysis_id) is not None
+        for viz_name, viz_data in visualizations.items():
+            if session_available:
+                html, error = self.render_visualization(analysis_id, viz_name, 'html', plotlyjs=PLOTLYJS_ASSET_NAME)
+                resolved[viz_name] = {'html': html} if html is not None else error
+            elif isinstance(viz_data, dict) and viz_data.get('lazy'):
+                html, error = self.render_visualization(analysis_id, viz_name, 'html')
+                if html is None:
+                    error = error or f"{viz_name} visualization failed: analysis not found"
+                resolved[viz_name] = {'html': html} if html is not None else error
+            else:
+                resolved[viz_name] = viz_data
+        return resolved
+    
     def export_visualizations(self, data):
         """导出可视化结果为ZIP压缩包，包含HTML文件"""
         try:
@@ -491,82 +1059,118 @@ class BERTopicAnalyzer:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f'BERTopic_Visualizations_{timestamp}.zip'
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
-                with zipfile.ZipFile(tmp_file.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    # 创建主页面
-                    main_html = self._create_visualization_index(data.get('visualizations', {}))
-                    zipf.writestr('index.html', main_html)
+            visualizations = self._resolve_export_visualizations(data.get('analysis_id'), data.get('visualizations', {}))
+            uses_shared_plotlyjs = False
+            
+            file_path = get_scratch_space().create('.zip')
+            with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                # 创建主页面
+                main_html = self._create_visualization_index(visualizations)
+                zipf.writestr('index.html', main_html)
+                
+                # 添加每个可视化文件
+                for viz_name, viz_data in visualizations.items():
+                    # 处理新的字典格式和旧的字符串格式
+                    if isinstance(viz_data, dict) and 'html' in viz_data:
+                        viz_html = viz_data['html']
+                    else:
+                        viz_html = viz_data
                     
-                    # 添加每个可视化文件
-                    for viz_name, viz_data in data.get('visualizations', {}).items():
-                        # 处理新的字典格式和旧的字符串格式
-                        if isinstance(viz_data, dict) and 'html' in viz_data:
-                            viz_html = viz_data['html']
-                        else:
-                            viz_html = viz_data
-                        
-                        if viz_html and isinstance(viz_html, str) and not viz_html.startswith('failed') and not viz_html.startswith('Cannot generate'):
-                            safe_name = viz_name.replace(' ', '_').replace('/', '_')
-                            zipf.writestr(f'{safe_name}.html', viz_html)
-                            logger.info(f"Added {safe_name}.html to ZIP")
+                    if viz_html and isinstance(viz_html, str) and not viz_html.startswith('failed') and not viz_html.startswith('Cannot generate'):
+                        safe_name = viz_name.replace(' ', '_').replace('/', '_')
+                        viz_html, shared = point_to_local_plotlyjs(viz_html)
+                        uses_shared_plotlyjs = uses_shared_plotlyjs or shared
+                        zipf.writestr(f'{safe_name}.html', viz_html)
+                        logger.info(f"Added {safe_name}.html to ZIP")
                 
-            logger.info(f"ZIP export completed: {tmp_file.name}")
+                # 共享的 plotly.js 只写入一次
+                if uses_shared_plotlyjs:
+                    zipf.writestr(PLOTLYJS_ASSET_NAME, get_plotlyjs_bundle()[0])
+            
+            logger.info(f"ZIP export completed: {file_path}")
             return {
-                'file_path': tmp_file.name,
+                'file_path': file_path,
                 'filename': filename
             }
-            
+        
         except Exception as e:
             logger.error(f"Export visualizations error: {str(e)}")
             # Fallback to text format
             return self._export_visualizations_text(data)
     
     def export_annotated_data(self, data):
-        """导出带主题标注的数据"""
+        """导出带主题标注的数据
+        
+        按块流式写入（format: xlsx / csv / parquet，默认 xlsx），内存占用不随文档数量增长；
+        未提供概率时概率列为空。
+        """
+        file_path = None
         try:
+            file_format = data.get('format') or 'xlsx'
+            if file_format not in EXPORT_FORMATS:
+                raise ValueError(f"不支持的导出格式: {file_format}")
+            
             # 获取原始数据和主题信息
-            texts = data.get('texts', [])
-            topics = data.get('topics', [])
-            probabilities = data.get('probabilities', [])
+            texts = data.get('texts')
+            texts = [] if texts is None else texts
+            topics = data.get('topics')
+            topics = [] if topics is None else topics
+            probabilities = data.get('probabilities')
+            if probabilities is not None and len(probabilities) == 0 and len(texts) > 0:
+                probabilities = None
+            if probabilities is not None:
+                # 计算了完整概率矩阵时客户端提交的是二维概率，与已保存结果一样按文档取最大值
+                probabilities = self._document_probabilities(np.asarray(probabilities, dtype=float))
             
             # 确保所有列表长度一致
-            min_length = min(len(texts), len(topics), len(probabilities))
-            texts = texts[:min_length]
-            topics = topics[:min_length]
-            probabilities = probabilities[:min_length]
-            
-            # 创建DataFrame
-            df = pd.DataFrame({
-                'text': texts,
-                'topic_id': topics,
-                'topic_probability': probabilities
-            })
+            lengths = [len(texts), len(topics)] + ([len(probabilities)] if probabilities is not None else [])
+            total = min(lengths)
             
             # 添加主题名称列（如果有主题信息）
             topic_info = data.get('topic_info', [])
-            if topic_info:
-                topic_name_map = {}
-                for topic in topic_info:
-                    topic_id = topic.get('Topic', -1)
-                    topic_name = topic.get('Name', f'Topic_{topic_id}')
-                    topic_name_map[topic_id] = topic_name
-                
-                df['topic_name'] = df['topic_id'].map(topic_name_map).fillna('Unknown_Topic')
+            topic_name_map = {
+                topic.get('Topic', -1): topic.get('Name', f"Topic_{topic.get('Topic', -1)}")
+                for topic in topic_info
+            }
+            columns = ['text', 'topic_id', 'topic_probability'] + (['topic_name'] if topic_info else [])
+            column_types = {'text': 'string', 'topic_id': 'int', 'topic_probability': 'float', 'topic_name': 'string'}
+            chunk_size = int(os.environ.get('EXPORT_CHUNK_SIZE', 50000))
+            
+            def chunks():
+                for start in range(0, total, chunk_size):
+                    end = min(start + chunk_size, total)
+                    chunk_topics = np.asarray(topics[start:end]).tolist()
+                    chunk = {
+                        'text': [str(text) if text is not None else None for text in texts[start:end]],
+                        'topic_id': chunk_topics,
+                        'topic_probability': (
+                            probabilities[start:end].tolist()
+                            if probabilities is not None else [None] * (end - start)
+                        )
+                    }
+                    if topic_info:
+                        chunk['topic_name'] = [topic_name_map.get(topic, 'Unknown_Topic') for topic in chunk_topics]
+                    yield chunk
             
             # 保存到临时文件
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'BERTopic_Annotated_Data_{timestamp}.xlsx'
+            suffix = EXPORT_FORMATS[file_format]
+            filename = f'BERTopic_Annotated_Data_{timestamp}{suffix}'
+            
+            file_path = get_scratch_space().create(suffix)
+            rows = write_table(file_path, columns, chunks(), file_format, column_types)
+            logger.info(f"标注数据导出完成: {rows} 行, 格式 {file_format}")
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                df.to_excel(tmp_file.name, index=False, engine='openpyxl')
-                
             return {
-                'file_path': tmp_file.name,
+                'file_path': file_path,
                 'filename': filename
             }
-            
+        
         except Exception as e:
             logger.error(f"导出标注数据错误: {str(e)}")
+            # 写入失败的半成品文件不必等到过期清理
+            if file_path is not None:
+                get_scratch_space().release(file_path)
             raise
     
     def _export_visualizations_text(self, data):
@@ -574,7 +1178,8 @@ class BERTopicAnalyzer:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'BERTopic_Visualizations_{timestamp}.txt'
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.txt', mode='w', encoding='utf-8') as tmp_file:
+        file_path = get_scratch_space().create('.txt')
+        with open(file_path, 'w', encoding='utf-8') as tmp_file:
             tmp_file.write('BERTopic分析结果\n')
             tmp_file.write(f'生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n\n')
             tmp_file.write('可视化结果:\n')
@@ -592,7 +1197,7 @@ class BERTopicAnalyzer:
                     tmp_file.write(f'- {viz_name}可视化: 生成失败\n')
         
         return {
-            'file_path': tmp_file.name,
+            'file_path': file_path,
             'filename': filename
         }
     
@@ -604,17 +1209,21 @@ class BERTopicAnalyzer:
             # 获取主题信息
             topic_info = data.get('topic_info', [])
             
+            # 关键词缺失时从所属分析的模型中获取
+            session = self.analysis_store.get(data['analysis_id']) if data.get('analysis_id') else None
+            topic_model = session['topic_model'] if session is not None else None
+            
             if not topic_info:
                 # 创建空的Excel文件
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 filename = f'BERTopic_Topic_Details_{timestamp}.xlsx'
                 
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                    df = pd.DataFrame({'Topic': ['No topics found'], 'Count': [0], 'Percentage': ['0%'], 'Words': ['']})
-                    df.to_excel(tmp_file.name, index=False, engine='openpyxl')
+                file_path = get_scratch_space().create('.xlsx')
+                df = pd.DataFrame({'Topic': ['No topics found'], 'Count': [0], 'Percentage': ['0%'], 'Words': ['']})
+                df.to_excel(file_path, index=False, engine='openpyxl')
                 
                 return {
-                    'file_path': tmp_file.name,
+                    'file_path': file_path,
                     'filename': filename
                 }
             
@@ -622,49 +1231,49 @@ class BERTopicAnalyzer:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f'BERTopic_Topic_Details_{timestamp}.xlsx'
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                # 准备数据
-                topic_data = []
-                for topic in topic_info:
-                    topic_id = topic.get('Topic', '')
-                    count = topic.get('Count', 0)
-                    percentage = topic.get('Percentage', 0)
-                    
-                    # 尝试多种方式获取关键词
-                    words = []
-                    if 'Words' in topic and topic['Words']:
-                        words = topic['Words'][:10]  # 前10个关键词
-                    elif 'Name' in topic and topic['Name']:
-                        # 如果Words字段为空，尝试使用Name字段
-                        words = [topic['Name']]
-                    else:
-                        # 如果都没有，尝试从topic_model获取
-                        try:
-                            if hasattr(self, 'topic_model') and self.topic_model is not None:
-                                topic_words = self.topic_model.get_topic(topic_id)
-                                if topic_words:
-                                    words = [word for word, _ in topic_words[:10]]
-                        except Exception as e:
-                            logger.warning(f"无法获取主题 {topic_id} 的关键词: {str(e)}")
-                    
-                    words_str = ', '.join(words) if words else 'No keywords available'
-                    
-                    topic_data.append({
-                        'Topic': topic_id,
-                        'Count': count,
-                        'Percentage': f'{percentage:.1f}%',
-                        'Words': words_str
-                    })
+            # 准备数据
+            topic_data = []
+            for topic in topic_info:
+                topic_id = topic.get('Topic', '')
+                count = topic.get('Count', 0)
+                percentage = topic.get('Percentage', 0)
                 
-                # 创建DataFrame并导出
-                df = pd.DataFrame(topic_data)
-                df.to_excel(tmp_file.name, index=False, engine='openpyxl')
+                # 尝试多种方式获取关键词
+                words = []
+                if 'Words' in topic and topic['Words']:
+                    words = topic['Words'][:10]  # 前10个关键词
+                elif 'Name' in topic and topic['Name']:
+                    # 如果Words字段为空，尝试使用Name字段
+                    words = [topic['Name']]
+                else:
+                    # 如果都没有，尝试从topic_model获取
+                    try:
+                        if topic_model is not None:
+                            topic_words = topic_model.get_topic(topic_id)
+                            if topic_words:
+                                words = [word for word, _ in topic_words[:10]]
+                    except Exception as e:
+                        logger.warning(f"无法获取主题 {topic_id} 的关键词: {str(e)}")
                 
+                words_str = ', '.join(words) if words else 'No keywords available'
+                
+                topic_data.append({
+                    'Topic': topic_id,
+                    'Count': count,
+                    'Percentage': f'{percentage:.1f}%',
+                    'Words': words_str
+                })
+            
+            # 创建DataFrame并导出
+            df = pd.DataFrame(topic_data)
+            file_path = get_scratch_space().create('.xlsx')
+            df.to_excel(file_path, index=False, engine='openpyxl')
+            
             return {
-                'file_path': tmp_file.name,
+                'file_path': file_path,
                 'filename': filename
             }
-            
+        
         except Exception as e:
             logger.error(f"导出主题详情错误: {str(e)}")
             raise
@@ -0,0 +1,388 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 文本键为预处理后文本的 SHA-1 摘要（20字节）
+KEY_BYTES = 20
+# 每条记录在访问时间文件中占用的字节数（float64 时间戳）
+ACCESS_BYTES = 8
+
+
+class EmbeddingCache:
+    """基于内容寻址的磁盘embedding缓存
+    
+    以 (模型标识, 预处理后文本哈希) 为键。每个模型一个只追加的定长记录文件，每条记录依次为
+    文本键与向量，键与向量在同一次写入中落盘；追加前先截断到整条记录，进程崩溃留下的半条记录不会错位后续行号。
+    最近访问时间单独保存（只影响淘汰顺序）。各进程在内存中维护键到行号的映射，
+    每次只读取其他进程新追加的记录，不随缓存总量重复读写索引。
+    """
+    
+    ENTRIES_FILE = 'entries.bin'
+    ACCESS_FILE = 'access.bin'
+    META_FILE = 'meta.json'
+    LOCK_FILE = '.lock'
+    # 旧版本的JSON索引格式，遇到时直接丢弃
+    LEGACY_FILES = ('index.json', 'vectors.bin')
+    
+    def __init__(self, cache_dir=None, max_bytes=None, dtype=None, batch_size=256):
+        if cache_dir is None:
+            cache_dir = os.environ.get('EMBEDDING_CACHE_DIR', os.path.join('cache', 'embeddings'))
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('EMBEDDING_CACHE_MAX_MB', 2048)) * 1024 * 1024)
+        if dtype is None:
+            dtype = os.environ.get('EMBEDDING_CACHE_DTYPE', 'float32')
+        if dtype not in ('float32', 'float16'):
+            raise ValueError(f"不支持的缓存数据类型: {dtype}")
+        
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        # store_dir -> {'rows': {键: 行号}, 'count': 已读取的记录数, 'file_id': 记录文件的 (st_dev, st_ino)}
+        self._key_maps = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def encode(self, embedding_model, model_id, texts, progress_callback=None):
+        """返回文本的embedding矩阵，仅对缓存未命中的文本调用模型编码
+        
+        Returns:
+            (embeddings, stats)，embeddings 为 float32 数组，行顺序与 texts 一致
+        """
+        start = time.perf_counter()
+        keys = [self._text_key(text) for text in texts]
+        store_dir = self._store_dir(model_id)
+        
+        with self._locked(store_dir):
+            meta = self._read_meta(store_dir)
+            rows = self._refresh_rows(store_dir, meta)
+            hit_positions = [i for i, key in enumerate(keys) if key in rows]
+            hit_rows = [rows[keys[i]] for i in hit_positions]
+            
+            # 同一批次内重复文本只编码一次
+            missing = {}
+            for i, key in enumerate(keys):
+                if key not in rows and key not in missing:
+                    missing[key] = texts[i]
+            
+            cached = self._read_vectors(store_dir, meta, hit_rows)
+        
+        new_vectors = self._encode_missing(embedding_model, list(missing.values()), progress_callback)
+        
+        dim = (meta or {}).get('dim') or (new_vectors.shape[1] if len(new_vectors) else 0)
+        embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+        if len(hit_positions):
+            embeddings[hit_positions] = cached
+        if missing:
+            new_rows = dict(zip(missing.keys(), new_vectors))
+            for i, key in enumerate(keys):
+                if key in new_rows:
+                    embeddings[i] = new_rows[key]
+        
+        with self._locked(store_dir):
+            # 重新读取，其他进程可能已写入（或压缩了缓存）
+            meta = self._read_meta(store_dir)
+            rows = self._refresh_rows(store_dir, meta)
+            now = time.time()
+            self._touch(store_dir, [rows[keys[i]] for i in hit_positions if keys[i] in rows], now)
+            new_keys = [key for key in missing if key not in rows]
+            if new_keys:
+                new_index = {key: offset for offset, key in enumerate(missing)}
+                self._append(store_dir, meta, model_id, new_keys, new_vectors[[new_index[key] for key in new_keys]], now)
+        
+        self._enforce_budget(keep=store_dir)
+        
+        hits = len(hit_positions)
+        stats = {
+            'model_id': model_id,
+            'documents': len(texts),
+            'hits': hits,
+            'misses': len(texts) - hits,
+            'encoded': len(missing),
+            'hit_ratio': round(hits / len(texts), 4) if texts else 0.0,
+            'elapsed': round(time.perf_counter() - start, 3)
+        }
+        logger.info(f"embedding缓存: 命中 {hits}/{len(texts)}, 新编码 {len(missing)} 条")
+        return embeddings, stats
+    
+    def stats(self):
+        """缓存占用统计"""
+        stores = []
+        for store_dir in self._store_dirs():
+            meta = self._read_meta(store_dir)
+            stores.append({
+                'model_id': meta.get('model_id') if meta else None,
+                'entries': self._record_count(store_dir, meta),
+                'bytes': self._store_bytes(store_dir)
+            })
+        return {
+            'cache_dir': self.cache_dir,
+            'max_bytes': self.max_bytes,
+            'dtype': self.dtype.name,
+            'total_bytes': sum(store['bytes'] for store in stores),
+            'stores': stores
+        }
+    
+    def _encode_missing(self, embedding_model, texts, progress_callback=None):
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        
+        batches = []
+        for offset in range(0, len(texts), self.batch_size):
+            batch = texts[offset:offset + self.batch_size]
+            batches.append(np.asarray(
+                embedding_model.encode(batch, show_progress_bar=False),
+                dtype=np.float32
+            ))
+            if progress_callback:
+                progress_callback(min(offset + self.batch_size, len(texts)), len(texts))
+        return np.vstack(batches)
+    
+    @staticmethod
+    def _record_dtype(meta):
+        # 键按字节数组保存（定长字节串类型会去掉末尾的零字节）
+        return np.dtype([('key', np.uint8, (KEY_BYTES,)), ('vector', np.dtype(meta['dtype']), (meta['dim'],))])
+    
+    def _record_count(self, store_dir, meta):
+        """记录文件中完整记录的数量（末尾不完整的半条记录不计）"""
+        path = os.path.join(store_dir, self.ENTRIES_FILE)
+        if meta is None or not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // self._record_dtype(meta).itemsize
+    
+    def _records(self, store_dir, meta, count, mode='r'):
+        return np.memmap(
+            os.path.join(store_dir, self.ENTRIES_FILE),
+            dtype=self._record_dtype(meta),
+            mode=mode,
+            shape=(count,)
+        )
+    
+    def _refresh_rows(self, store_dir, meta):
+        """返回键到行号的映射，只读取上次之后追加的记录；记录文件被替换（压缩）时重新读取"""
+        path = os.path.join(store_dir, self.ENTRIES_FILE)
+        count = self._record_count(store_dir, meta)
+        if not count:
+            self._key_maps.pop(store_dir, None)
+            return {}
+        
+        stat = os.stat(path)
+        file_id = (stat.st_dev, stat.st_ino)
+        key_map = self._key_maps.get(store_dir)
+        if key_map is None or key_map['file_id'] != file_id or key_map['count'] > count:
+            key_map = {'rows': {}, 'count': 0, 'file_id': file_id}
+            self._key_maps[store_dir] = key_map
+        
+        if key_map['count'] < count:
+            start = key_map['count']
+            blob = np.ascontiguousarray(self._records(store_dir, meta, count)['key'][start:count]).tobytes()
+            rows = key_map['rows']
+            for offset in range(count - start):
+                rows[blob[offset * KEY_BYTES:(offset + 1) * KEY_BYTES]] = start + offset
+            key_map['count'] = count
+        return key_map['rows']
+    
+    def _read_vectors(self, store_dir, meta, row_ids):
+        if not row_ids:
+            return np.zeros((0, meta['dim'] if meta else 0), dtype=np.float32)
+        records = self._records(store_dir, meta, self._record_count(store_dir, meta))
+        return np.asarray(records['vector'][np.asarray(row_ids)], dtype=np.float32)
+    
+    def _append(self, store_dir, meta, model_id, keys, vectors, now):
+        count = self._record_count(store_dir, meta)
+        if meta is None:
+            meta = {'model_id': model_id, 'dim': int(vectors.shape[1]), 'dtype': self.dtype.name}
+            self._write_meta(store_dir, meta)
+        elif meta['dim'] != vectors.shape[1]:
+            raise ValueError(f"embedding维度不一致: 缓存 {meta['dim']}, 新向量 {vectors.shape[1]}")
+        
+        records = np.empty(len(keys), dtype=self._record_dtype(meta))
+        records['key'] = np.frombuffer(b''.join(keys), dtype=np.uint8).reshape(len(keys), KEY_BYTES)
+        records['vector'] = vectors
+        
+        with open(os.path.join(store_dir, self.ENTRIES_FILE), 'ab') as f:
+            # 截掉崩溃时写了一半的记录，新记录从完整记录之后开始
+            f.truncate(count * records.dtype.itemsize)
+            f.write(records.tobytes())
+        
+        access_path = os.path.join(store_dir, self.ACCESS_FILE)
+        with open(access_path, 'ab') as f:
+            # 访问时间与记录一一对应：多出的截掉，缺少的以0补齐
+            access_count = os.path.getsize(access_path) // ACCESS_BYTES
+            f.truncate(min(access_count, count) * ACCESS_BYTES)
+            f.write(np.zeros(max(0, count - access_count)).tobytes() + np.full(len(keys), now).tobytes())
+    
+    def _access_times(self, store_dir, count):
+        """各记录的最近访问时间，长度与记录数不一致时（写入中断）截断或以0补齐"""
+        path = os.path.join(store_dir, self.ACCESS_FILE)
+        access = np.fromfile(path, dtype=np.float64) if os.path.exists(path) else np.zeros(0)
+        if len(access) < count:
+            access = np.concatenate([access, np.zeros(count - len(access))])
+        return access[:count]
+    
+    def _touch(self, store_dir, row_ids, now):
+        """更新命中记录的访问时间（原地写入，只涉及命中的行）"""
+        meta_path = os.path.join(store_dir, self.META_FILE)
+        if os.path.exists(meta_path):
+            # 元数据文件的修改时间记录整个模型缓存的最近使用时间
+            os.utime(meta_path)
+        path = os.path.join(store_dir, self.ACCESS_FILE)
+        if not row_ids or not os.path.exists(path) or not os.path.getsize(path):
+            return
+        access = np.memmap(path, dtype=np.float64, mode='r+')
+        row_ids = np.asarray(row_ids)
+        access[row_ids[row_ids < len(access)]] = now
+        access.flush()
+    
+    def _enforce_budget(self, keep=None):
+        """超出容量时按最近访问时间淘汰条目"""
+        if not self.max_bytes:
+            return
+        
+        with self._lock:
+            store_dirs = self._store_dirs()
+            total = sum(self._store_bytes(store_dir) for store_dir in store_dirs)
+            if total <= self.max_bytes:
+                return
+            
+            # 先淘汰最久未使用的其他模型整体缓存
+            others = sorted(
+                (store_dir for store_dir in store_dirs if store_dir != keep),
+                key=lambda store_dir: os.path.getmtime(os.path.join(store_dir, self.META_FILE))
+            )
+            for store_dir in others:
+                if total <= self.max_bytes:
+                    return
+                total -= self._store_bytes(store_dir)
+                self._remove_store(store_dir)
+            
+            if keep and total > self.max_bytes:
+                self._compact(keep, target_bytes=int(self.max_bytes * 0.8))
+    
+    def _compact(self, store_dir, target_bytes):
+        """保留最近访问的条目并重写记录文件"""
+        with self._locked(store_dir):
+            meta = self._read_meta(store_dir)
+            count = self._record_count(store_dir, meta)
+            if not count:
+                return
+            record_dtype = self._record_dtype(meta)
+            # 每条记录同时占用记录文件与访问时间文件
+            keep_count = max(0, target_bytes // (record_dtype.itemsize + ACCESS_BYTES))
+            
+            access = self._access_times(store_dir, count)
+            kept = np.sort(np.argsort(-access, kind='stable')[:keep_count])
+            records = np.asarray(self._records(store_dir, meta, count)[kept])
+            
+            # 记录文件整体替换（键与向量一起），访问时间文件随后替换；两者之间中断只影响淘汰顺序
+            for name, content in ((self.ENTRIES_FILE, records), (self.ACCESS_FILE, access[kept])):
+                tmp_path = os.path.join(store_dir, name + '.tmp')
+                with open(tmp_path, 'wb') as f:
+                    f.write(content.tobytes())
+                os.replace(tmp_path, os.path.join(store_dir, name))
+            self._key_maps.pop(store_dir, None)
+            logger.info(f"embedding缓存已压缩: 淘汰 {count - len(kept)} 条")
+    
+    def _remove_store(self, store_dir):
+        with self._locked(store_dir):
+            for name in (self.ENTRIES_FILE, self.ACCESS_FILE, self.META_FILE):
+                path = os.path.join(store_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            self._key_maps.pop(store_dir, None)
+        logger.info(f"embedding缓存已淘汰: {store_dir}")
+    
+    def _read_meta(self, store_dir):
+        """模型缓存的元数据（模型标识、向量维度与精度），尚未写入任何向量时返回 None"""
+        path = os.path.join(store_dir, self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"embedding缓存元数据损坏，重建: {str(e)}")
+            for name in (self.ENTRIES_FILE, self.ACCESS_FILE, self.META_FILE):
+                if os.path.exists(os.path.join(store_dir, name)):
+                    os.remove(os.path.join(store_dir, name))
+            self._key_maps.pop(store_dir, None)
+            return None
+    
+    def _write_meta(self, store_dir, meta):
+        path = os.path.join(store_dir, self.META_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+    
+    def _store_dir(self, model_id):
+        digest = hashlib.sha1(str(model_id).encode('utf-8')).hexdigest()[:16]
+        store_dir = os.path.join(self.cache_dir, digest)
+        os.makedirs(store_dir, exist_ok=True)
+        for name in self.LEGACY_FILES:
+            path = os.path.join(store_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+        return store_dir
+    
+    def _store_dirs(self):
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if os.path.exists(os.path.join(self.cache_dir, name, self.META_FILE))
+        ]
+    
+    def _store_bytes(self, store_dir):
+        total = 0
+        for name in (self.ENTRIES_FILE, self.ACCESS_FILE):
+            path = os.path.join(store_dir, name)
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+    
+    @contextmanager
+    def _locked(self, store_dir):
+        """线程锁 + 文件锁，保证多worker进程写入安全"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(store_dir, self.LOCK_FILE), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _text_key(text):
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """获取进程级共享的embedding缓存，EMBEDDING_CACHE_ENABLED=0 时返回 None"""
+    global _cache
+    if os.environ.get('EMBEDDING_CACHE_ENABLED', '1') == '0':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
@@ -0,0 +1,175 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# 加载锁按模型名称哈希分组，锁的数量固定，不随请求中出现过的模型名称增长
+LOADING_LOCK_STRIPES = 16
+
+
+class EmbeddingModelRegistry:
+    """进程级embedding模型注册表
+    
+    按模型名称/路径缓存已加载的SentenceTransformer，每个worker只加载一次；
+    超出模型数量或内存预算时按LRU顺序淘汰。
+    """
+    
+    def __init__(self, max_models=None, memory_budget_mb=None, loader=None):
+        if max_models is None:
+            max_models = int(os.environ.get('EMBEDDING_MODEL_CACHE_SIZE', 2))
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.environ.get('EMBEDDING_MODEL_MEMORY_MB', 2048))
+        
+        self.max_models = max(1, max_models)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else 0
+        self._loader = loader or self._load_sentence_transformer
+        
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading_locks = [threading.Lock() for _ in range(LOADING_LOCK_STRIPES)]
+        
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'load_errors': 0,
+            'evictions': 0,
+            'load_times': {}
+        }
+    
+    def get(self, model_name):
+        """获取模型，未加载时加载并缓存"""
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is not None:
+                self._models.move_to_end(model_name)
+                self._stats['hits'] += 1
+                return entry['model']
+            loading_lock = self._loading_locks[hash(model_name) % LOADING_LOCK_STRIPES]
+        
+        # 同一模型只允许一个线程加载，其余线程等待后直接命中（同组的其他模型加载也会排队）
+        with loading_lock:
+            with self._lock:
+                entry = self._models.get(model_name)
+                if entry is not None:
+                    self._models.move_to_end(model_name)
+                    self._stats['hits'] += 1
+                    return entry['model']
+                self._stats['misses'] += 1
+            
+            start = time.perf_counter()
+            try:
+                model = self._loader(model_name)
+            except Exception:
+                with self._lock:
+                    self._stats['load_errors'] += 1
+                raise
+            load_time = time.perf_counter() - start
+            size = self._estimate_model_bytes(model)
+            
+            with self._lock:
+                self._models[model_name] = {
+                    'model': model,
+                    'bytes': size,
+                    'load_time': load_time,
+                    'loaded_at': time.time()
+                }
+                self._stats['load_times'][model_name] = round(load_time, 3)
+                self._evict(keep=model_name)
+            
+            logger.info(f"embedding模型加载完成: {model_name}, 耗时 {load_time:.2f}s, 约 {size / 1024 / 1024:.1f}MB")
+            return model
+    
+    def warm_up(self, model_names):
+        """预加载模型（启动时调用），返回成功加载的模型列表"""
+        loaded = []
+        for model_name in model_names:
+            try:
+                self.get(model_name)
+                loaded.append(model_name)
+            except Exception as e:
+                logger.error(f"预加载embedding模型失败: {model_name}, {str(e)}")
+        return loaded
+    
+    def is_loaded(self, model_name):
+        """模型是否已在内存中"""
+        with self._lock:
+            return model_name in self._models
+    
+    def clear(self):
+        """清空所有已加载模型"""
+        with self._lock:
+            self._models.clear()
+    
+    def stats(self):
+        """获取命中率与加载耗时统计"""
+        with self._lock:
+            total = self._stats['hits'] + self._stats['misses']
+            return {
+                'hits': self._stats['hits'],
+                'misses': self._stats['misses'],
+                'hit_ratio': round(self._stats['hits'] / total, 4) if total else 0.0,
+                'load_errors': self._stats['load_errors'],
+                'evictions': self._stats['evictions'],
+                'max_models': self.max_models,
+                'memory_budget_bytes': self.memory_budget,
+                'memory_bytes': sum(entry['bytes'] for entry in self._models.values()),
+                'load_times': dict(self._stats['load_times']),
+                'loaded_models': [
+                    {
+                        'name': name,
+                        'bytes': entry['bytes'],
+                        'load_time': round(entry['load_time'], 3)
+                    }
+                    for name, entry in self._models.items()
+                ]
+            }
+    
+    def _evict(self, keep=None):
+        """按LRU顺序淘汰超出数量或内存预算的模型（调用方持有锁）"""
+        def over_budget():
+            if len(self._models) > self.max_models:
+                return True
+            if self.memory_budget:
+                return sum(entry['bytes'] for entry in self._models.values()) > self.memory_budget
+            return False
+        
+        while over_budget():
+            candidates = [name for name in self._models if name != keep]
+            if not candidates:
+                break
+            name = candidates[0]
+            self._models.pop(name)
+            self._stats['evictions'] += 1
+            logger.info(f"embedding模型已从缓存淘汰: {name}")
+    
+    @staticmethod
+    def _load_sentence_transformer(model_name):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    
+    @staticmethod
+    def _estimate_model_bytes(model):
+        """根据参数与缓冲区估算模型占用内存"""
+        try:
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            size += sum(b.numel() * b.element_size() for b in model.buffers())
+            return int(size)
+        except Exception:
+            return 0
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_embedding_registry():
+    """获取进程级共享的模型注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = EmbeddingModelRegistry()
+    return _registry
@@ -0,0 +1,118 @@
+"""降维与聚类引擎
+
+analyze 通过 config['reduction']['engine'] 与 config['clustering']['engine'] 选择 BERTopic 使用的降维/聚类模型。
+各引擎的扩展性（n 为文档数，d 为embedding维度，k 为降维后维度或主题数）：
+
+降维
+- umap: 近邻图 O(n log n)（可预计算并缓存，见 knn_graph）+ 布局优化 O(n·epochs)，内存随 n×nNeighbors 增长；
+  保留局部结构，聚类效果最好，数十万文档以上在CPU上需要数十分钟到数小时
+- pca: 随机化SVD O(n·d·k)，需要一次载入全部embedding；百万级文档约数十秒
+- incremental_pca: 按批（batchSize）计算，内存只与批大小相关，速度与 pca 相近
+- truncated_svd: 不中心化的随机化SVD，O(n·d·k)，比 pca 略省内存
+
+聚类
+- hdbscan: O(n log n)，低维时较快但大语料上内存与耗时增长明显；自动确定主题数并识别离群文档（主题 -1），支持主题概率
+- minibatch_kmeans: 每轮 O(batchSize·k)，内存与文档数线性相关；需指定主题数（nClusters），不产生离群文档
+- birch: 单遍构建CF树 O(n)，再对子簇做层次聚类；需指定主题数，子簇粒度由 threshold 控制，不产生离群文档
+"""
+import logging
+
+from models.knn_graph import attach_search_index
+
+logger = logging.getLogger(__name__)
+
+REDUCTION_ENGINES = ('umap', 'pca', 'incremental_pca', 'truncated_svd')
+CLUSTERING_ENGINES = ('hdbscan', 'minibatch_kmeans', 'birch')
+
+
+def reduction_engine(config):
+    engine = config.get('reduction', {}).get('engine') or 'umap'
+    if engine not in REDUCTION_ENGINES:
+        raise ValueError(f"不支持的降维引擎: {engine}")
+    return engine
+
+
+def clustering_engine(config):
+    engine = config.get('clustering', {}).get('engine') or 'hdbscan'
+    if engine not in CLUSTERING_ENGINES:
+        raise ValueError(f"不支持的聚类引擎: {engine}")
+    return engine
+
+
+def create_reduction_model(config, precomputed_knn=None):
+    """按配置创建降维模型（降维维度默认沿用 config['umap']['nComponents']）"""
+    engine = reduction_engine(config)
+    umap_config = config.get('umap', {})
+    reduction_config = config.get('reduction', {})
+    n_components = reduction_config.get('nComponents') or umap_config.get('nComponents', 5)
+    
+    if engine == 'umap':
+        from umap import UMAP
+        
+        return UMAP(
+            n_neighbors=umap_config.get('nNeighbors', 15),
+            n_components=n_components,
+            min_dist=umap_config.get('minDist', 0.0),
+            metric=umap_config.get('metric', 'cosine'),
+            precomputed_knn=precomputed_knn or (None, None, None)
+        )
+    
+    if engine == 'pca':
+        from sklearn.decomposition import PCA
+        
+        return PCA(n_components=n_components, svd_solver='randomized', random_state=42)
+    
+    if engine == 'incremental_pca':
+        from sklearn.decomposition import IncrementalPCA
+        
+        return IncrementalPCA(n_components=n_components, batch_size=max(int(reduction_config.get('batchSize', 10000)), n_components))
+    
+    from sklearn.decomposition import TruncatedSVD
+    
+    return TruncatedSVD(n_components=n_components, algorithm='randomized', random_state=42)
+
+
+def create_clustering_model(config, num_documents=None):
+    """按配置创建聚类模型（HDBSCAN 参数沿用 config['hdbscan']，主题数不超过文档数）"""
+    engine = clustering_engine(config)
+    clustering_config = config.get('clustering', {})
+    n_clusters = int(clustering_config.get('nClusters', 50))
+    if num_documents:
+        n_clusters = max(1, min(n_clusters, num_documents))
+    
+    if engine == 'hdbscan':
+        from hdbscan import HDBSCAN
+        
+        hdbscan_config = config.get('hdbscan', {})
+        return HDBSCAN(
+            min_cluster_size=hdbscan_config.get('minClusterSize', 15),
+            metric=hdbscan_config.get('metric', 'euclidean')
+        )
+    
+    if engine == 'minibatch_kmeans':
+        from sklearn.cluster import MiniBatchKMeans
+        
+        return MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=int(clustering_config.get('batchSize', 4096)),
+            n_init=3,
+            random_state=42
+        )
+    
+    from sklearn.cluster import Birch
+    
+    return Birch(n_clusters=n_clusters, threshold=float(clustering_config.get('threshold', 0.05)))
+
+
+def prepare_transform(topic_model):
+    """补齐为新文档分配主题（BERTopic.transform）所需的模型状态
+    
+    使用预计算近邻图训练的 UMAP 缺少近邻检索索引；HDBSCAN 未生成预测数据时无法 approximate_predict。
+    两者都只在首次调用时补建，之后直接返回。
+    """
+    attach_search_index(topic_model.umap_model)
+    
+    hdbscan_model = topic_model.hdbscan_model
+    if hasattr(hdbscan_model, 'generate_prediction_data') and getattr(hdbscan_model, 'prediction_data_', None) is None:
+        hdbscan_model.generate_prediction_data()
+        logger.info("已为HDBSCAN生成预测数据")
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+import logging
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_KNN_BACKENDS = ('nndescent', 'hnsw')
+# hnswlib 支持的距离（UMAP 的度量名称 -> hnswlib 的空间名称）
+HNSW_SPACES = {'cosine': 'cosine', 'euclidean': 'l2'}
+
+
+def resolve_knn_backend(requested, num_documents):
+    """根据配置与文档数确定近邻图后端，不使用预计算近邻图时返回 None
+    
+    requested 为 auto 时，文档数达到 KNN_GRAPH_MIN_DOCUMENTS（默认 4096，低于该值时UMAP直接精确计算）
+    才使用 KNN_GRAPH_BACKEND（默认 nndescent）。
+    """
+    requested = requested or 'auto'
+    if requested == 'off':
+        return None
+    if requested == 'auto':
+        if num_documents < int(os.environ.get('KNN_GRAPH_MIN_DOCUMENTS', 4096)):
+            return None
+        requested = os.environ.get('KNN_GRAPH_BACKEND', 'nndescent')
+        if requested == 'off':
+            return None
+    if requested not in SUPPORTED_KNN_BACKENDS:
+        raise ValueError(f"不支持的近邻图后端: {requested}")
+    return requested
+
+
+def build_knn_graph(embeddings, n_neighbors, metric='cosine', backend='nndescent'):
+    """构建近似k近邻图，返回 (indices, distances)，每个点的第一个近邻为其自身（与UMAP一致）"""
+    if backend == 'hnsw' and (hnswlib is None or metric not in HNSW_SPACES):
+        logger.warning(f"hnswlib 未安装或不支持 {metric} 距离，改用 nndescent 构建近邻图")
+        backend = 'nndescent'
+    
+    if backend == 'hnsw':
+        index = hnswlib.Index(space=HNSW_SPACES[metric], dim=embeddings.shape[1])
+        index.init_index(
+            max_elements=len(embeddings),
+            ef_construction=int(os.environ.get('HNSW_EF_CONSTRUCTION', 200)),
+            M=int(os.environ.get('HNSW_M', 16))
+        )
+        index.set_ef(max(2 * n_neighbors, 50))
+        index.add_items(embeddings, num_threads=-1)
+        indices, distances = index.knn_query(embeddings, k=n_neighbors, num_threads=-1)
+        if metric == 'euclidean':
+            # hnswlib 的 l2 空间返回距离的平方
+            distances = np.sqrt(np.maximum(distances, 0))
+        return indices.astype(np.int32), distances.astype(np.float32)
+    
+    indices, distances = build_search_index(embeddings, n_neighbors, metric).neighbor_graph
+    return indices.astype(np.int32), distances.astype(np.float32)
+
+
+def build_search_index(data, n_neighbors, metric='cosine', random_state=None):
+    """构建 pynndescent 近邻索引（参数与 UMAP 内部构建近邻图时一致）"""
+    from pynndescent import NNDescent
+    
+    num_documents = len(data)
+    return NNDescent(
+        data,
+        n_neighbors=n_neighbors,
+        metric=metric,
+        random_state=random_state,
+        n_trees=min(64, 5 + int(round(num_documents ** 0.5 / 20.0))),
+        n_iters=max(5, int(round(np.log2(num_documents)))),
+        max_candidates=60,
+        low_memory=True,
+        n_jobs=-1,
+        compressed=False,
+        verbose=False
+    )
+
+
+def attach_search_index(umap_model):
+    """为使用预计算近邻图训练的 UMAP 补建近邻检索索引，返回是否补建
+    
+    UMAP 以 (indices, distances) 形式接收预计算近邻图时不保留检索索引，transform 新文档会报错；
+    补建的索引基于训练数据（umap_model._raw_data），与 UMAP 自行计算近邻时得到的索引等价。
+    """
+    if getattr(umap_model, '_knn_search_index', False) is not None:
+        return False
+    
+    start = time.perf_counter()
+    umap_model._knn_search_index = build_search_index(
+        umap_model._raw_data,
+        umap_model._n_neighbors,
+        metric=umap_model.metric,
+        random_state=umap_model.random_state
+    )
+    logger.info(f"已为UMAP补建近邻检索索引，耗时 {time.perf_counter() - start:.2f}s")
+    return True
+
+
+class KNNGraphCache:
+    """按embedding集合缓存的k近邻图
+    
+    以 (embedding内容哈希, 距离度量, 后端) 为键保存近邻下标与距离，UMAP 以 precomputed_knn 使用；
+    同一组embedding调整 minDist / nComponents（或不超过已缓存近邻数的 nNeighbors）时不再重新构建。
+    超出容量上限时按最近使用时间淘汰。
+    """
+    
+    INDICES_FILE = 'indices.npy'
+    DISTANCES_FILE = 'distances.npy'
+    META_FILE = 'meta.json'
+    
+    def __init__(self, cache_dir=None, max_bytes=None):
+        if cache_dir is None:
+            cache_dir = os.environ.get('KNN_CACHE_DIR', os.path.join('cache', 'knn'))
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('KNN_CACHE_MAX_MB', 2048)) * 1024 * 1024)
+        
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._stats = {'hits': 0, 'misses': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def graph_key(embeddings, metric, backend):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{embeddings.shape}|{embeddings.dtype}|{metric}|{backend}'.encode('utf-8'))
+        digest.update(np.ascontiguousarray(embeddings).data)
+        return digest.hexdigest()
+    
+    def get_or_build(self, embeddings, n_neighbors, metric='cosine', backend='nndescent'):
+        """返回 ((indices, distances), 统计信息)，近邻数不足 n_neighbors 的缓存会被重新构建"""
+        start = time.perf_counter()
+        key = self.graph_key(embeddings, metric, backend)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # 同一组embedding只构建一次，并发分析等待构建完成
+        with key_lock:
+            graph = self._load(key, n_neighbors)
+            hit = graph is not None
+            if not hit:
+                build_neighbors = max(n_neighbors, int(os.environ.get('KNN_GRAPH_NEIGHBORS', 0)))
+                build_neighbors = min(build_neighbors, len(embeddings) - 1)
+                indices, distances = build_knn_graph(embeddings, build_neighbors, metric, backend)
+                self._save(key, indices, distances, {
+                    'n_neighbors': build_neighbors,
+                    'documents': len(embeddings),
+                    'metric': metric,
+                    'backend': backend,
+                    'build_seconds': round(time.perf_counter() - start, 3)
+                })
+                graph = (np.array(indices[:, :n_neighbors]), np.array(distances[:, :n_neighbors]))
+        
+        with self._lock:
+            self._stats['hits' if hit else 'misses'] += 1
+        self._enforce_budget(keep=key)
+        
+        stats = {
+            'backend': backend,
+            'n_neighbors': n_neighbors,
+            'hit': hit,
+            'elapsed': round(time.perf_counter() - start, 3)
+        }
+        logger.info(f"近邻图{'命中缓存' if hit else '已构建'}: {backend}, k={n_neighbors}, 耗时 {stats['elapsed']:.2f}s")
+        return graph, stats
+    
+    def stats(self):
+        """缓存占用与命中统计"""
+        entries = []
+        for key in self._keys():
+            meta = self._read_meta(key)
+            if meta is not None:
+                entries.append(dict(meta, key=key, bytes=self._entry_bytes(key)))
+        with self._lock:
+            counters = dict(self._stats)
+        return {
+            'cache_dir': self.cache_dir,
+            'max_bytes': self.max_bytes,
+            'total_bytes': sum(entry['bytes'] for entry in entries),
+            'entries': entries,
+            **counters
+        }
+    
+    def _load(self, key, n_neighbors):
+        meta = self._read_meta(key)
+        if meta is None or meta['n_neighbors'] < n_neighbors:
+            return None
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            indices = np.load(os.path.join(entry_dir, self.INDICES_FILE), mmap_mode='r')
+            distances = np.load(os.path.join(entry_dir, self.DISTANCES_FILE), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"近邻图缓存损坏，重新构建: {str(e)}")
+            return None
+        # 记录最近使用时间，供淘汰时排序
+        os.utime(os.path.join(entry_dir, self.META_FILE))
+        # UMAP 会原地修改近邻数组，返回可写的副本
+        return np.array(indices[:, :n_neighbors]), np.array(distances[:, :n_neighbors])
+    
+    def _save(self, key, indices, distances, meta):
+        # 先写入临时目录再替换，其他进程不会读到写了一半的近邻图
+        tmp_dir = os.path.join(self.cache_dir, f'.{key}.{uuid.uuid4().hex}.tmp')
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            os.makedirs(tmp_dir)
+            np.save(os.path.join(tmp_dir, self.INDICES_FILE), indices)
+            np.save(os.path.join(tmp_dir, self.DISTANCES_FILE), distances)
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning(f"近邻图缓存写入失败: {str(e)}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def _enforce_budget(self, keep=None):
+        if not self.max_bytes:
+            return
+        entries = sorted(
+            ((key, self._entry_mtime(key), self._entry_bytes(key)) for key in self._keys()),
+            key=lambda entry: entry[1]
+        )
+        total = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            total -= size
+            logger.info(f"近邻图缓存已淘汰: {key}")
+    
+    def _keys(self):
+        return [
+            name for name in os.listdir(self.cache_dir)
+            if not name.startswith('.') and os.path.exists(os.path.join(self.cache_dir, name, self.META_FILE))
+        ]
+    
+    def _read_meta(self, key):
+        path = os.path.join(self.cache_dir, key, self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _entry_mtime(self, key):
+        try:
+            return os.path.getmtime(os.path.join(self.cache_dir, key, self.META_FILE))
+        except OSError:
+            return 0
+    
+    def _entry_bytes(self, key):
+        entry_dir = os.path.join(self.cache_dir, key)
+        total = 0
+        for name in (self.INDICES_FILE, self.DISTANCES_FILE):
+            path = os.path.join(entry_dir, name)
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_knn_graph_cache():
+    """获取进程级共享的近邻图缓存，KNN_CACHE_ENABLED=0 时返回 None"""
+    global _cache
+    if os.environ.get('KNN_CACHE_ENABLED', '1') == '0':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = KNNGraphCache()
+    return _cache
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MODEL_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class TopicModelStore:
+    """已保存的主题模型，供不重新训练的主题分配（transform）使用
+    
+    模型以 BERTopic 的 safetensors 格式保存（主题向量、主题表示与 c-TF-IDF），不使用 pickle；
+    embedding模型只记录名称，加载时从进程级注册表获取。模型在首次使用时加载，
+    超出数量上限时淘汰最久未使用的已加载模型。
+    """
+    
+    META_FILE = 'meta.json'
+    
+    def __init__(self, root, max_loaded=None):
+        if max_loaded is None:
+            max_loaded = int(os.environ.get('MODEL_CACHE_SIZE', 3))
+        
+        self.root = root
+        self.max_loaded = max(1, max_loaded)
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading_locks = {}
+        self._stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+        os.makedirs(self.root, exist_ok=True)
+    
+    @staticmethod
+    def validate_id(model_id):
+        if not isinstance(model_id, str) or not MODEL_ID_PATTERN.match(model_id):
+            raise ValueError(f"无效的模型ID: {model_id}")
+        return model_id
+    
+    def model_dir(self, model_id):
+        return os.path.join(self.root, self.validate_id(model_id))
+    
+    def save(self, model_id, topic_model, meta):
+        """保存模型及其元数据（embedding模型名称、预处理设置等），返回元数据"""
+        model_dir = self.model_dir(model_id)
+        meta = dict(meta, model_id=model_id, saved_at=time.time())
+        
+        # 先写入临时目录，完整写完后再替换，加载方不会读到写了一半的模型
+        tmp_dir = os.path.join(self.root, f'.{model_id}.{uuid.uuid4().hex}.tmp')
+        try:
+            save_ctfidf = self._ctfidf_serializable(topic_model.vectorizer_model)
+            if not save_ctfidf:
+                # 增量模式的 OnlineCountVectorizer 等无法按 c-TF-IDF 格式保存配置，
+                # 此时只保存主题分配所需的主题向量与主题表示
+                logger.warning(f"向量化器 {type(topic_model.vectorizer_model).__name__} 无法保存 c-TF-IDF，模型 {model_id} 不含 c-TF-IDF")
+            topic_model.save(tmp_dir, serialization='safetensors', save_ctfidf=save_ctfidf, save_embedding_model=False)
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            
+            with self._lock:
+                if os.path.isdir(model_dir):
+                    shutil.rmtree(model_dir)
+                os.replace(tmp_dir, model_dir)
+                self._loaded.pop(model_id, None)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        logger.info(f"主题模型已保存: {model_id}")
+        return meta
+    
+    @staticmethod
+    def _ctfidf_serializable(vectorizer_model):
+        """BERTopic 按 CountVectorizer 的参数保存 c-TF-IDF 配置，只暴露自身参数的子类（如 OnlineCountVectorizer）无法保存"""
+        return {'tokenizer', 'preprocessor', 'dtype', 'analyzer'} <= set(vectorizer_model.get_params())
+    
+    def get_meta(self, model_id):
+        """读取模型元数据，模型不存在时返回 None"""
+        path = os.path.join(self.model_dir(model_id), self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def list_meta(self):
+        """所有已保存模型的元数据"""
+        metas = []
+        for model_id in sorted(os.listdir(self.root)):
+            if MODEL_ID_PATTERN.match(model_id):
+                meta = self.get_meta(model_id)
+                if meta is not None:
+                    metas.append(meta)
+        return metas
+    
+    def get(self, model_id, embedding_loader):
+        """获取已加载的模型，未加载时从磁盘加载
+        
+        Args:
+            embedding_loader: 根据embedding模型名称返回模型实例的函数
+        
+        Returns:
+            (模型, 元数据)，模型不存在时返回 (None, None)
+        """
+        self.validate_id(model_id)
+        with self._lock:
+            entry = self._loaded.get(model_id)
+            if entry is not None:
+                self._loaded.move_to_end(model_id)
+                self._stats['hits'] += 1
+                return entry
+            loading_lock = self._loading_locks.setdefault(model_id, threading.Lock())
+        
+        # 同一模型只加载一次，并发请求等待加载完成
+        with loading_lock:
+            with self._lock:
+                entry = self._loaded.get(model_id)
+                if entry is not None:
+                    self._loaded.move_to_end(model_id)
+                    self._stats['hits'] += 1
+                    return entry
+            
+            meta = self.get_meta(model_id)
+            if meta is None:
+                return None, None
+            
+            from bertopic import BERTopic
+            
+            start = time.perf_counter()
+            topic_model = BERTopic.load(self.model_dir(model_id), embedding_model=embedding_loader(meta['embedding_model']))
+            logger.info(f"主题模型加载完成: {model_id}, 耗时 {time.perf_counter() - start:.2f}s")
+            
+            with self._lock:
+                entry = (topic_model, meta)
+                self._loaded[model_id] = entry
+                self._stats['loads'] += 1
+                while len(self._loaded) > self.max_loaded:
+                    evicted_id, _ = self._loaded.popitem(last=False)
+                    self._stats['evictions'] += 1
+                    logger.info(f"已加载的主题模型被淘汰: {evicted_id}")
+            return entry
+    
+    def delete(self, model_id):
+        """删除模型，不存在时返回 False"""
+        model_dir = self.model_dir(model_id)
+        with self._lock:
+            self._loaded.pop(model_id, None)
+            if not os.path.isdir(model_dir):
+                return False
+            shutil.rmtree(model_dir, ignore_errors=True)
+        return True
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': list(self._loaded),
+                'max_loaded': self.max_loaded,
+                **self._stats
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_topic_model_store():
+    """进程内共享的主题模型存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TopicModelStore(os.environ.get('MODEL_STORE_DIR', os.path.join('cache', 'models')))
+        return _store
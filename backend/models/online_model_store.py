@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import shutil
+import time
+import hashlib
+import threading
+import logging
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 不允许以 . 开头，避免 . / .. 指向存储目录本身或其上级
+MODEL_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}$')
+
+
+class OnlineModelStore:
+    """增量（在线）主题模型的持久化存储
+    
+    每个模型键一个目录，包含 BERTopic 模型、状态文件（embedding模型、已处理文档数等）
+    以及已并入模型的文档指纹，用于在重复提交累积数据时只处理新增文档。
+    """
+    
+    MODEL_FILE = 'model.pkl'
+    STATE_FILE = 'state.json'
+    SEEN_FILE = 'seen.npy'
+    LOCK_FILE = '.lock'
+    
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(self.root, exist_ok=True)
+    
+    @staticmethod
+    def validate_key(model_key):
+        if not isinstance(model_key, str) or not MODEL_KEY_PATTERN.match(model_key):
+            raise ValueError(f"无效的模型键: {model_key}（只允许字母、数字、_.-，不能以 . 开头，最长64个字符）")
+        return model_key
+    
+    def model_dir(self, model_key):
+        return os.path.join(self.root, self.validate_key(model_key))
+    
+    @contextmanager
+    def locked(self, model_key):
+        """同一模型键的更新串行执行（线程锁 + 文件锁，兼容多worker进程）"""
+        model_dir = self.model_dir(model_key)
+        os.makedirs(model_dir, exist_ok=True)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(model_key, threading.Lock())
+        
+        with key_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(model_dir, self.LOCK_FILE), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def load_state(self, model_key):
+        """读取模型状态，模型不存在时返回 None"""
+        path = os.path.join(self.model_dir(model_key), self.STATE_FILE)
+        if not os.path.exists(os.path.join(self.model_dir(model_key), self.MODEL_FILE)) or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def load_model(self, model_key, embedding_model=None):
+        from bertopic import BERTopic
+        
+        path = os.path.join(self.model_dir(model_key), self.MODEL_FILE)
+        return BERTopic.load(path, embedding_model=embedding_model)
+    
+    def save(self, model_key, topic_model, state, seen):
+        """原子地保存模型、状态与文档指纹"""
+        model_dir = self.model_dir(model_key)
+        state = dict(state, updated_at=time.time())
+        
+        model_path = os.path.join(model_dir, self.MODEL_FILE)
+        topic_model.save(model_path + '.tmp', serialization='pickle', save_embedding_model=False)
+        os.replace(model_path + '.tmp', model_path)
+        
+        seen_path = os.path.join(model_dir, self.SEEN_FILE)
+        with open(seen_path + '.tmp', 'wb') as f:
+            np.save(f, seen)
+        os.replace(seen_path + '.tmp', seen_path)
+        
+        state_path = os.path.join(model_dir, self.STATE_FILE)
+        with open(state_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(state_path + '.tmp', state_path)
+    
+    def list_states(self):
+        """所有增量模型的状态"""
+        states = []
+        for model_key in sorted(os.listdir(self.root)):
+            if MODEL_KEY_PATTERN.match(model_key):
+                state = self.load_state(model_key)
+                if state is not None:
+                    states.append(state)
+        return states
+    
+    def delete(self, model_key):
+        """删除增量模型，不存在时返回 False"""
+        model_dir = self.model_dir(model_key)
+        if not os.path.isdir(model_dir):
+            return False
+        with self.locked(model_key):
+            shutil.rmtree(model_dir, ignore_errors=True)
+        return True
+    
+    def load_seen(self, model_key):
+        """已并入模型的文档指纹（有序 uint64 数组）"""
+        path = os.path.join(self.model_dir(model_key), self.SEEN_FILE)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=np.uint64)
+        return np.load(path)
+    
+    @staticmethod
+    def fingerprints(texts):
+        """文档内容指纹（64位）"""
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(str(text).encode('utf-8'), digest_size=8).digest(), 'little') for text in texts),
+            dtype=np.uint64,
+            count=len(texts)
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_online_model_store():
+    """进程内共享的增量模型存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = OnlineModelStore(os.environ.get('ONLINE_MODEL_DIR', os.path.join('cache', 'online_models')))
+        return _store
@@ -0,0 +1,106 @@
+"""抽样训练
+
+数百万文档的语料不必在全部文档上训练降维与聚类：config['sampling']['enabled'] 为 True 且文档数超过
+sampleSize 时，analyze 只用抽样文档训练BERTopic，其余文档按批通过 transform 分配主题（复用已计算的embedding），
+总耗时近似随embedding计算量线性增长。c-TF-IDF 主题词基于样本文档计算，主题规模按全部文档统计。
+
+抽样方式（config['sampling']['strategy']）：
+- random: 简单随机抽样
+- time: 按时间戳分位数分层（没有可解析的时间戳时退化为随机抽样），各时间段都有文档参与训练
+- embedding: 用 MiniBatchKMeans 将embedding粗聚为 strata 层后按层比例抽样，降低小主题漏抽的概率
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_STRATEGIES = ('random', 'time', 'embedding')
+DEFAULT_SAMPLE_SIZE = 100000
+DEFAULT_ASSIGN_BATCH_SIZE = 50000
+DEFAULT_STRATA = 50
+# embedding 分层时用于训练 MiniBatchKMeans 的最大文档数
+STRATA_FIT_DOCUMENTS = 100000
+
+
+def sampling_settings(config, num_documents):
+    """解析抽样设置，未启用或文档数不超过抽样规模时返回 None"""
+    sampling_config = config.get('sampling', {})
+    if not sampling_config.get('enabled'):
+        return None
+    
+    strategy = sampling_config.get('strategy') or 'random'
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"不支持的抽样方式: {strategy}")
+    sample_size = int(sampling_config.get('sampleSize') or DEFAULT_SAMPLE_SIZE)
+    if sample_size < 1:
+        raise ValueError("抽样规模必须大于0")
+    if num_documents <= sample_size:
+        return None
+    
+    return {
+        'strategy': strategy,
+        'sample_size': sample_size,
+        'batch_size': max(1, int(sampling_config.get('batchSize') or DEFAULT_ASSIGN_BATCH_SIZE)),
+        'strata': max(1, int(sampling_config.get('strata') or DEFAULT_STRATA)),
+        'seed': int(sampling_config.get('seed', 42))
+    }
+
+
+def sample_indices(num_documents, sample_size, strategy='random', embeddings=None, timestamps=None,
+                   strata=DEFAULT_STRATA, seed=42):
+    """返回升序的抽样文档下标，分层抽样时各层按文档数比例分配名额"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(sample_size, num_documents)
+    
+    labels = None
+    if strategy == 'time' and timestamps is not None:
+        if len(timestamps) == num_documents:
+            labels = _time_strata(timestamps, strata)
+        else:
+            # 空文本与空时间戳分别被过滤时两者不再一一对应，无法按时间分层
+            logger.warning(f"时间戳数量（{len(timestamps)}）与文档数（{num_documents}）不一致")
+    elif strategy == 'embedding' and embeddings is not None:
+        labels = _embedding_strata(embeddings, strata, seed)
+    if labels is None:
+        if strategy != 'random':
+            logger.warning(f"无法按 {strategy} 分层，改用随机抽样")
+        return np.sort(rng.choice(num_documents, size=sample_size, replace=False))
+    
+    _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    # 最大余数法分配各层名额，名额之和等于抽样规模且不超过该层文档数
+    exact = counts * sample_size / num_documents
+    quotas = np.floor(exact).astype(int)
+    quotas[np.argsort(quotas - exact)[:sample_size - quotas.sum()]] += 1
+    
+    # 打乱后按层稳定排序，每层取前 quota 个
+    order = rng.permutation(num_documents)
+    order = order[np.argsort(inverse[order], kind='stable')]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    selected = np.concatenate([order[start:start + quota] for start, quota in zip(starts, quotas)])
+    return np.sort(selected)
+
+
+def _time_strata(timestamps, strata):
+    """按时间戳分位数划分层，无法解析的时间戳单独成一层"""
+    times = pd.to_datetime(pd.Series(timestamps), errors='coerce')
+    valid = times.notna().to_numpy()
+    if not valid.any():
+        return None
+    labels = np.full(len(times), -1)
+    ranks = times[valid].rank(method='first').to_numpy() - 1
+    labels[valid] = (ranks * strata // valid.sum()).astype(int)
+    return labels
+
+
+def _embedding_strata(embeddings, strata, seed):
+    """在embedding的随机子集上训练 MiniBatchKMeans，再为全部文档划分层"""
+    from sklearn.cluster import MiniBatchKMeans
+    
+    rng = np.random.default_rng(seed)
+    strata = min(strata, len(embeddings))
+    fit_rows = rng.choice(len(embeddings), size=min(len(embeddings), STRATA_FIT_DOCUMENTS), replace=False)
+    model = MiniBatchKMeans(n_clusters=strata, batch_size=4096, n_init=1, random_state=seed)
+    model.fit(embeddings[fit_rows])
+    return model.predict(embeddings)
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import threading
+import importlib
+import logging
+
+from models.embedding_registry import get_embedding_registry
+
+logger = logging.getLogger(__name__)
+
+# 分析所需的重量级依赖（导入耗时数秒到数十秒）
+HEAVY_MODULES = ('sentence_transformers', 'umap', 'hdbscan', 'bertopic', 'jieba')
+
+
+class ModelWarmup:
+    """预热分析依赖：导入机器学习库、初始化分词词典并加载embedding模型
+    
+    应用启动时不导入这些依赖，由后台线程预热（或在首次分析时按需导入），
+    服务在预热完成前即可处理上传、停用词和健康检查等请求。
+    """
+    
+    def __init__(self, model_names=None):
+        self.model_names = list(model_names or [])
+        self.status = 'pending'
+        self.started_at = None
+        self.finished_at = None
+        self.errors = {}
+        self.durations = {}
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """在后台线程中预热（每个进程只启动一次）"""
+        with self._lock:
+            if self._thread is not None:
+                return self._thread
+            self._thread = threading.Thread(target=self.run, name='model-warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def run(self):
+        """同步预热"""
+        self.status = 'warming'
+        self.started_at = time.time()
+        
+        for module_name in HEAVY_MODULES:
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(module_name)
+                if module_name == 'jieba':
+                    module.initialize()
+            except Exception as e:
+                self.errors[module_name] = str(e)
+                logger.error(f"预热导入失败: {module_name}, {str(e)}")
+            self.durations[module_name] = round(time.perf_counter() - start, 3)
+        self._apply_torch_threads()
+        
+        registry = get_embedding_registry()
+        for model_name in self.model_names:
+            start = time.perf_counter()
+            if not registry.warm_up([model_name]):
+                self.errors[model_name] = '模型加载失败'
+            self.durations[model_name] = round(time.perf_counter() - start, 3)
+        
+        self.finished_at = time.time()
+        self.status = 'failed' if self.errors else 'completed'
+        logger.info(f"预热结束: {self.status}, 耗时 {self.finished_at - self.started_at:.1f}s")
+    
+    @staticmethod
+    def _apply_torch_threads():
+        """按 TORCH_THREADS 设置PyTorch计算线程数（torch 由 sentence_transformers 导入）"""
+        threads = os.environ.get('TORCH_THREADS')
+        torch = sys.modules.get('torch')
+        if threads and torch is not None:
+            torch.set_num_threads(int(threads))
+    
+    def readiness(self):
+        """依赖与模型是否已就绪（首次分析按需导入/加载后同样视为就绪）"""
+        registry = get_embedding_registry()
+        modules = {name: name in sys.modules for name in HEAVY_MODULES}
+        models = {name: registry.is_loaded(name) for name in self.model_names}
+        return {
+            'ready': all(modules.values()) and all(models.values()),
+            'modules': modules,
+            'models': models,
+            'warmup': {
+                'status': self.status,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'durations': self.durations,
+                'errors': self.errors
+            }
+        }
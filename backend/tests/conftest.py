@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试从仓库根目录或 backend 目录运行时都能导入 models / utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
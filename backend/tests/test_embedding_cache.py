@@ -0,0 +1,47 @@
+import zlib
+
+import numpy as np
+
+from models.embedding_cache import EmbeddingCache
+
+
+class FakeEmbeddingModel:
+    """按文本内容生成确定的向量"""
+    
+    def __init__(self, dim=32):
+        self.dim = dim
+    
+    def encode(self, texts, show_progress_bar=False):
+        return np.stack([
+            np.random.default_rng(zlib.crc32(text.encode('utf-8'))).random(self.dim, dtype=np.float32)
+            for text in texts
+        ])
+
+
+def test_compaction_keeps_total_size_under_target(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path), max_bytes=0)
+    model = FakeEmbeddingModel()
+    texts = [f'document {i}' for i in range(1000)]
+    embeddings, _ = cache.encode(model, 'fake-model', texts)
+    
+    store_dir = cache._store_dir('fake-model')
+    target_bytes = 50 * 1024
+    cache._compact(store_dir, target_bytes)
+    
+    # 记录文件与访问时间文件合计不超过目标
+    assert cache._store_bytes(store_dir) <= target_bytes
+    
+    # 保留的条目命中并返回相同的向量
+    again, stats = cache.encode(model, 'fake-model', texts)
+    assert 0 < stats['hits'] < len(texts)
+    np.testing.assert_array_equal(again, embeddings)
+
+
+def test_encode_stays_under_max_bytes(tmp_path):
+    max_bytes = 64 * 1024
+    cache = EmbeddingCache(cache_dir=str(tmp_path), max_bytes=max_bytes)
+    model = FakeEmbeddingModel()
+    
+    for offset in range(0, 3000, 1000):
+        cache.encode(model, 'fake-model', [f'document {i}' for i in range(offset, offset + 1000)])
+        assert cache.stats()['total_bytes'] <= max_bytes
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetStore:
+    """上传数据集存储
+    
+    按文件内容哈希分配数据集ID，相同内容的重复上传只保存一份；
+    每个数据集目录包含原始文件、元数据（预览信息）和已提取列的列式缓存，
+    超过保留时间或总容量上限时按最近访问时间清理。
+    """
+    
+    META_FILE = 'meta.json'
+    COLUMNS_DIR = 'columns'
+    
+    def __init__(self, root, ttl_seconds=None, max_bytes=None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('DATASET_TTL_HOURS', 72)) * 3600
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('DATASET_MAX_MB', 2048)) * 1024 * 1024)
+        
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._reclaimed = {'datasets': 0, 'bytes': 0}
+        os.makedirs(self.root, exist_ok=True)
+    
+    def save_upload(self, stream, filename, chunk_size=1024 * 1024):
+        """保存上传文件，返回 (数据集ID, 是否为新数据集)"""
+        ext = os.path.splitext(filename)[1].lower()
+        digest = hashlib.sha256()
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            
+            digest.update(ext.encode('utf-8'))
+            dataset_id = digest.hexdigest()[:24]
+            dataset_dir = os.path.join(self.root, dataset_id)
+            
+            with self._lock:
+                if os.path.exists(os.path.join(dataset_dir, self.META_FILE)):
+                    # 重复上传：保留已有数据集（包括已解析的列缓存）
+                    os.remove(tmp_path)
+                    self._touch(dataset_id, filename=filename)
+                    logger.info(f"重复上传，复用数据集: {dataset_id}")
+                    return dataset_id, False
+                
+                os.makedirs(dataset_dir, exist_ok=True)
+                file_path = os.path.join(dataset_dir, f'original{ext}')
+                os.replace(tmp_path, file_path)
+                now = time.time()
+                self._write_meta(dataset_id, {
+                    'dataset_id': dataset_id,
+                    'filename': filename,
+                    'file_name': os.path.basename(file_path),
+                    'size': os.path.getsize(file_path),
+                    'created_at': now,
+                    'last_access': now
+                })
+            
+            logger.info(f"新数据集: {dataset_id} ({filename})")
+            return dataset_id, True
+        
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def get(self, dataset_id):
+        """获取数据集元数据并刷新访问时间，不存在时返回 None"""
+        if not self._valid_id(dataset_id):
+            return None
+        with self._lock:
+            return self._touch(dataset_id)
+    
+    def update_meta(self, dataset_id, **fields):
+        """更新数据集元数据"""
+        with self._lock:
+            meta = self._read_meta(dataset_id)
+            if meta is None:
+                return None
+            meta.update(fields)
+            self._write_meta(dataset_id, meta)
+            # 返回序列化后的结果，保证与之后读取到的内容一致
+            return self._read_meta(dataset_id)
+    
+    def file_path(self, dataset_id):
+        """原始文件路径"""
+        meta = self._read_meta(dataset_id)
+        if meta is None:
+            return None
+        return os.path.join(self.root, dataset_id, meta['file_name'])
+    
+    def columns_dir(self, dataset_id):
+        """列式缓存目录"""
+        return os.path.join(self.root, dataset_id, self.COLUMNS_DIR)
+    
+    def sweep(self):
+        """清理过期数据集，并在超出容量时按最近访问时间淘汰，返回删除的数据集ID"""
+        removed = []
+        now = time.time()
+        with self._lock:
+            datasets = []
+            for dataset_id in os.listdir(self.root):
+                path = os.path.join(self.root, dataset_id)
+                if dataset_id.endswith('.upload') and os.path.isfile(path):
+                    # 中断的上传留下的临时文件
+                    if self.ttl_seconds and now - os.path.getmtime(path) > self.ttl_seconds:
+                        self._reclaimed['bytes'] += os.path.getsize(path)
+                        os.remove(path)
+                    continue
+                meta = self._read_meta(dataset_id)
+                if meta is None:
+                    continue
+                if self.ttl_seconds and now - meta.get('last_access', 0) > self.ttl_seconds:
+                    self._remove(dataset_id)
+                    removed.append(dataset_id)
+                else:
+                    datasets.append((meta.get('last_access', 0), dataset_id, self._dir_bytes(dataset_id)))
+            
+            if self.max_bytes:
+                total = sum(size for _, _, size in datasets)
+                for _, dataset_id, size in sorted(datasets):
+                    if total <= self.max_bytes:
+                        break
+                    self._remove(dataset_id)
+                    removed.append(dataset_id)
+                    total -= size
+        
+        if removed:
+            logger.info(f"已清理数据集: {removed}")
+        return removed
+    
+    def stats(self):
+        """数据集数量、占用空间与累计回收情况"""
+        with self._lock:
+            dataset_ids = [name for name in os.listdir(self.root) if self._valid_id(name)]
+            return {
+                'root': self.root,
+                'datasets': len(dataset_ids),
+                'bytes_held': sum(self._dir_bytes(dataset_id) for dataset_id in dataset_ids),
+                'ttl_seconds': self.ttl_seconds,
+                'max_bytes': self.max_bytes,
+                'datasets_reclaimed': self._reclaimed['datasets'],
+                'bytes_reclaimed': self._reclaimed['bytes']
+            }
+    
+    def _touch(self, dataset_id, **fields):
+        meta = self._read_meta(dataset_id)
+        if meta is None:
+            return None
+        meta.update(fields)
+        meta['last_access'] = time.time()
+        self._write_meta(dataset_id, meta)
+        return meta
+    
+    def _read_meta(self, dataset_id):
+        path = os.path.join(self.root, dataset_id, self.META_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"数据集元数据读取失败: {dataset_id}, {str(e)}")
+            return None
+    
+    def _write_meta(self, dataset_id, meta):
+        path = os.path.join(self.root, dataset_id, self.META_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    
+    def _remove(self, dataset_id):
+        self._reclaimed['datasets'] += 1
+        self._reclaimed['bytes'] += self._dir_bytes(dataset_id)
+        shutil.rmtree(os.path.join(self.root, dataset_id), ignore_errors=True)
+    
+    def _dir_bytes(self, dataset_id):
+        total = 0
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, dataset_id)):
+            for name in filenames:
+                total += os.path.getsize(os.path.join(dirpath, name))
+        return total
+    
+    @staticmethod
+    def _valid_id(dataset_id):
+        return isinstance(dataset_id, str) and len(dataset_id) == 24 and all(c in '0123456789abcdef' for c in dataset_id)
@@ -0,0 +1,98 @@
+import csv
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 支持的表格导出格式及文件扩展名
+EXPORT_FORMATS = {
+    'xlsx': '.xlsx',
+    'csv': '.csv',
+    'parquet': '.parquet'
+}
+
+# Excel 单个工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+
+def write_table(file_path, columns, chunks, file_format='xlsx', column_types=None):
+    """按块写入表格文件，内存占用只与块大小有关
+    
+    Args:
+        columns: 列名列表
+        chunks: 依次产生 {列名: 值列表} 的可迭代对象
+        file_format: xlsx / csv / parquet
+        column_types: {列名: 'string' | 'int' | 'float'}，Parquet 使用，保证各块的列类型一致
+    
+    Returns:
+        写入的数据行数
+    """
+    if file_format == 'xlsx':
+        return _write_xlsx(file_path, columns, chunks)
+    if file_format == 'csv':
+        return _write_csv(file_path, columns, chunks)
+    if file_format == 'parquet':
+        return _write_parquet(file_path, columns, chunks, column_types or {})
+    raise ValueError(f"不支持的导出格式: {file_format}")
+
+
+def _iter_rows(columns, chunk):
+    return zip(*(chunk[name] for name in columns))
+
+
+def _write_xlsx(file_path, columns, chunks):
+    """openpyxl 只写模式逐行写入，超过 Excel 行数上限时续写到新的工作表"""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    total = 0
+    
+    for chunk in chunks:
+        for row in _iter_rows(columns, chunk):
+            if sheet is None or sheet_rows >= EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(title=f'Sheet{len(workbook.worksheets) + 1}')
+                sheet.append(columns)
+                sheet_rows = 1
+            # 去除 Excel 不允许的控制字符
+            sheet.append([ILLEGAL_CHARACTERS_RE.sub('', value) if isinstance(value, str) else value for value in row])
+            sheet_rows += 1
+            total += 1
+    
+    if sheet is None:
+        workbook.create_sheet(title='Sheet1').append(columns)
+    if len(workbook.worksheets) > 1:
+        logger.info(f"导出行数超过Excel单表上限，已分为 {len(workbook.worksheets)} 个工作表")
+    
+    workbook.save(file_path)
+    return total
+
+
+def _write_csv(file_path, columns, chunks):
+    """UTF-8（带BOM，便于Excel识别中文）CSV"""
+    total = 0
+    with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            rows = list(_iter_rows(columns, chunk))
+            writer.writerows(rows)
+            total += len(rows)
+    return total
+
+
+def _write_parquet(file_path, columns, chunks, column_types):
+    """每个块写为一个 row group"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    arrow_types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64()}
+    schema = pa.schema([(name, arrow_types[column_types.get(name, 'string')]) for name in columns])
+    
+    total = 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.table({name: chunk[name] for name in columns}, schema=schema))
+            total += len(chunk[columns[0]])
+    return total
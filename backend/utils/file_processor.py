@@ -1,16 +1,27 @@
 import pandas as pd
 import numpy as np
 import os
-from docx import Document
+import json
+import hashlib
+import zipfile
 import logging
+from xml.etree import ElementTree
 
 logger = logging.getLogger(__name__)
 
+# Word文档XML命名空间
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
 class FileProcessor:
     """文件处理器"""
     
-    def __init__(self):
-        self.supported_formats = ['.xlsx', '.xls', '.docx']
+    def __init__(self, cache_dir=None, preview_rows=10):
+        self.supported_formats = ['.xlsx', '.xls', '.docx', '.csv', '.jsonl', '.parquet']
+        self.preview_rows = preview_rows
+        # CSV/JSONL分块读取的行数
+        self.chunk_size = int(os.environ.get('INGEST_CHUNK_SIZE', 100000))
+        # 已提取列数据的列式缓存目录
+        self.cache_dir = cache_dir or os.environ.get('COLUMN_CACHE_DIR', os.path.join('cache', 'columns'))
     
     def process_file(self, file_path):
         """处理上传的文件"""
@@ -21,90 +32,129 @@ class FileProcessor:
                 return self._process_excel(file_path)
             elif file_ext == '.docx':
                 return self._process_word(file_path)
+            elif file_ext == '.csv':
+                return self._process_csv(file_path)
+            elif file_ext == '.jsonl':
+                return self._process_jsonl(file_path)
+            elif file_ext == '.parquet':
+                return self._process_parquet(file_path)
             else:
                 raise ValueError(f"不支持的文件格式: {file_ext}")
-                
+        
         except Exception as e:
             logger.error(f"文件处理错误: {str(e)}")
             raise
     
     def _process_excel(self, file_path):
-        """处理Excel文件"""
+        """处理Excel文件（只读取预览所需的行）"""
         try:
-            # 读取Excel文件
-            df = pd.read_excel(file_path)
-            
-            # 获取列名
-            columns = df.columns.tolist()
-            
-            # 获取前10行数据预览
-            preview_data = df.head(10).to_dict('records')
+            if os.path.splitext(file_path)[1].lower() == '.xlsx':
+                columns, preview_rows, total_rows = self._preview_xlsx(file_path)
+                preview_data = pd.DataFrame(preview_rows, columns=columns).replace({np.nan: None}).to_dict('records')
+            else:
+                # .xls 不支持流式读取，只解析预览行
+                df = pd.read_excel(file_path, nrows=self.preview_rows)
+                columns = df.columns.tolist()
+                preview_data = df.replace({np.nan: None}).to_dict('records')
+                total_rows = self._count_xls_rows(file_path)
             
             return {
                 'success': True,
                 'columns': columns,
                 'preview': preview_data,
-                'total_rows': len(df),
+                'total_rows': total_rows,
                 'file_type': 'excel'
             }
-            
+        
         except Exception as e:
             logger.error(f"Excel文件处理错误: {str(e)}")
             raise
     
     def _process_word(self, file_path):
-        """处理Word文件"""
+        """处理Word文件（流式解析段落，只保留预览行）"""
         try:
-            doc = Document(file_path)
-            
-            # 提取所有段落文本
-            texts = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    texts.append(paragraph.text.strip())
-            
-            # 创建DataFrame
-            df = pd.DataFrame({
-                'text': texts,
-                'paragraph_id': range(len(texts))
-            })
-            
-            # 获取列名
-            columns = df.columns.tolist()
-            
-            # 获取前10行数据预览
-            preview_data = df.head(10).to_dict('records')
+            preview_data = []
+            total_rows = 0
+            for text in self._iter_docx_paragraphs(file_path):
+                if total_rows < self.preview_rows:
+                    preview_data.append({'text': text, 'paragraph_id': total_rows})
+                total_rows += 1
             
             return {
                 'success': True,
-                'columns': columns,
+                'columns': ['text', 'paragraph_id'],
                 'preview': preview_data,
-                'total_rows': len(df),
+                'total_rows': total_rows,
                 'file_type': 'word'
             }
-            
+        
         except Exception as e:
             logger.error(f"Word文件处理错误: {str(e)}")
             raise
     
-    def extract_texts_from_data(self, file_path, text_column, timestamp_column=None, file_type='excel'):
-        """从文件中提取完整文本数据"""
+    def _process_csv(self, file_path):
+        """处理CSV文件（只解析预览行，分块统计总行数）"""
+        try:
+            df = self._read_csv(file_path, nrows=self.preview_rows)
+            
+            # 只读取第一列分块计数，正确处理带引号的多行字段
+            total_rows = sum(len(chunk) for chunk in self._read_csv(file_path, usecols=[0], chunksize=self.chunk_size))
+            
+            return self._preview_result(df, total_rows, 'csv')
+        
+        except Exception as e:
+            logger.error(f"CSV文件处理错误: {str(e)}")
+            raise
+    
+    def _process_jsonl(self, file_path):
+        """处理JSON Lines文件（只解析预览行）"""
+        try:
+            df = pd.read_json(file_path, lines=True, nrows=self.preview_rows)
+            
+            total_rows = 0
+            with open(file_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        total_rows += 1
+            
+            return self._preview_result(df, total_rows, 'jsonl')
+        
+        except Exception as e:
+            logger.error(f"JSONL文件处理错误: {str(e)}")
+            raise
+    
+    def _process_parquet(self, file_path):
+        """处理Parquet文件（行数取自文件元数据，只读取第一个批次做预览）"""
         try:
-            # 重新读取完整文件数据
-            if file_type == 'excel':
-                df = pd.read_excel(file_path)
-            elif file_type == 'word':
-                doc = Document(file_path)
-                texts = []
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        texts.append(paragraph.text.strip())
-                df = pd.DataFrame({
-                    'text': texts,
-                    'paragraph_id': range(len(texts))
-                })
+            import pyarrow.parquet as pq
+            
+            parquet_file = pq.ParquetFile(file_path)
+            first_batch = next(parquet_file.iter_batches(batch_size=self.preview_rows), None)
+            if first_batch is not None:
+                df = first_batch.to_pandas()
             else:
-                raise ValueError(f"不支持的文件类型: {file_type}")
+                df = pd.DataFrame(columns=parquet_file.schema_arrow.names)
+            
+            return self._preview_result(df, parquet_file.metadata.num_rows, 'parquet')
+        
+        except Exception as e:
+            logger.error(f"Parquet文件处理错误: {str(e)}")
+            raise
+    
+    def _preview_result(self, df, total_rows, file_type):
+        return {
+            'success': True,
+            'columns': df.columns.tolist(),
+            'preview': df.head(self.preview_rows).replace({np.nan: None}).to_dict('records'),
+            'total_rows': int(total_rows),
+            'file_type': file_type
+        }
+    
+    def extract_texts_from_data(self, file_path, text_column, timestamp_column=None, file_type='excel', cache_dir=None):
+        """从文件中提取完整文本数据（首次读取后从列式缓存加载）"""
+        try:
+            columns = [text_column] + ([timestamp_column] if timestamp_column and timestamp_column != text_column else [])
+            df = self._load_columns(file_path, columns, file_type, cache_dir or self.cache_dir)
             
             # 确保文本列存在
             if text_column not in df.columns:
@@ -125,7 +175,192 @@ class FileProcessor:
                 result['timestamps'] = timestamps
             
             return result
-            
+        
         except Exception as e:
             logger.error(f"文本提取错误: {str(e)}")
             raise
+    
+    def _load_columns(self, file_path, columns, file_type, cache_dir):
+        """读取指定列，优先使用列式缓存"""
+        cache_path = self._column_cache_path(cache_dir, file_path, columns)
+        cached = self._read_column_cache(cache_path)
+        if cached is not None:
+            logger.info(f"从列式缓存加载: {columns}")
+            return cached
+        
+        if file_type == 'excel':
+            df = self._read_excel_columns(file_path, columns)
+        elif file_type == 'word':
+            texts = list(self._iter_docx_paragraphs(file_path))
+            df = pd.DataFrame({
+                'text': texts,
+                'paragraph_id': range(len(texts))
+            })
+        elif file_type == 'csv':
+            df = pd.concat(
+                self._read_csv(file_path, usecols=lambda name: name in columns, chunksize=self.chunk_size),
+                ignore_index=True
+            )
+        elif file_type == 'jsonl':
+            df = pd.concat(
+                (
+                    chunk[[column for column in columns if column in chunk.columns]]
+                    for chunk in pd.read_json(file_path, lines=True, chunksize=self.chunk_size)
+                ),
+                ignore_index=True
+            )
+        elif file_type == 'parquet':
+            import pyarrow.parquet as pq
+            
+            names = pq.ParquetFile(file_path).schema_arrow.names
+            df = pq.read_table(file_path, columns=[column for column in columns if column in names]).to_pandas()
+        else:
+            raise ValueError(f"不支持的文件类型: {file_type}")
+        
+        df = df[[column for column in columns if column in df.columns]]
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = self._to_column(df[column].where(df[column].notna(), None).tolist())
+        self._write_column_cache(cache_path, df)
+        return df
+    
+    def _read_excel_columns(self, file_path, columns):
+        """只读取Excel中的指定列"""
+        if os.path.splitext(file_path)[1].lower() != '.xlsx':
+            return pd.read_excel(file_path, usecols=lambda name: name in columns)
+        
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = self._normalize_header(next(rows, ()))
+            positions = {name: i for i, name in enumerate(header) if name in columns}
+            
+            values = {name: [] for name in positions}
+            for row in rows:
+                if not any(cell is not None for cell in row):
+                    continue
+                for name, i in positions.items():
+                    values[name].append(row[i] if i < len(row) else None)
+        finally:
+            workbook.close()
+        
+        return pd.DataFrame({name: self._to_column(column_values) for name, column_values in values.items()})
+    
+    def _preview_xlsx(self, file_path):
+        """只读模式读取表头和前N行"""
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            columns = self._normalize_header(next(rows, ()))
+            
+            preview_rows = []
+            for row in rows:
+                if len(preview_rows) >= self.preview_rows:
+                    break
+                if any(cell is not None for cell in row):
+                    preview_rows.append(list(row[:len(columns)]) + [None] * (len(columns) - len(row)))
+            
+            # 优先使用工作表尺寸信息，缺失时逐行计数
+            if sheet.max_row and sheet.max_row > len(preview_rows):
+                total_rows = sheet.max_row - 1
+            else:
+                total_rows = len(preview_rows) + sum(1 for row in rows if any(cell is not None for cell in row))
+        finally:
+            workbook.close()
+        
+        return columns, preview_rows, total_rows
+    
+    def _read_csv(self, file_path, **kwargs):
+        """读取CSV，UTF-8解码失败时按GB18030重试（兼容国内导出的CSV）"""
+        try:
+            reader = pd.read_csv(file_path, encoding='utf-8-sig', **kwargs)
+            if 'chunksize' in kwargs:
+                # 分块读取时解码错误在迭代中才出现，先取第一块确认编码
+                return self._prefetched(reader)
+            return reader
+        except UnicodeDecodeError:
+            logger.info("CSV不是UTF-8编码，按GB18030读取")
+            return pd.read_csv(file_path, encoding='gb18030', **kwargs)
+    
+    @staticmethod
+    def _prefetched(reader):
+        first = next(reader, None)
+        
+        def chunks():
+            if first is not None:
+                yield first
+            yield from reader
+        
+        return chunks()
+    
+    def _count_xls_rows(self, file_path):
+        """统计.xls行数"""
+        try:
+            import xlrd
+            workbook = xlrd.open_workbook(file_path, on_demand=True)
+            try:
+                return max(workbook.sheet_by_index(0).nrows - 1, 0)
+            finally:
+                workbook.release_resources()
+        except ImportError:
+            return len(pd.read_excel(file_path, usecols=[0]))
+    
+    def _iter_docx_paragraphs(self, file_path):
+        """增量解析word/document.xml，逐个返回非空段落文本"""
+        paragraph_tag = f'{WORD_NAMESPACE}p'
+        text_tag = f'{WORD_NAMESPACE}t'
+        
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open('word/document.xml') as document:
+                for _, element in ElementTree.iterparse(document, events=('end',)):
+                    if element.tag != paragraph_tag:
+                        continue
+                    text = ''.join(node.text or '' for node in element.iter(text_tag)).strip()
+                    element.clear()
+                    if text:
+                        yield text
+    
+    @staticmethod
+    def _normalize_header(header):
+        """与pandas一致地命名空列名"""
+        return [name if name is not None else f'Unnamed: {i}' for i, name in enumerate(header)]
+    
+    @staticmethod
+    def _to_column(values):
+        """转换为可列式存储的Series：混合类型的非空值统一为字符串"""
+        series = pd.Series(values, dtype=object).infer_objects()
+        if series.dtype == object:
+            series = series.map(lambda value: None if value is None else str(value))
+        return series
+    
+    def _column_cache_path(self, cache_dir, file_path, columns):
+        stat = os.stat(file_path)
+        key = json.dumps([os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, columns], ensure_ascii=False)
+        return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+    
+    def _read_column_cache(self, cache_path):
+        try:
+            if os.path.exists(cache_path + '.parquet'):
+                return pd.read_parquet(cache_path + '.parquet')
+            if os.path.exists(cache_path + '.pkl'):
+                return pd.read_pickle(cache_path + '.pkl')
+        except Exception as e:
+            logger.warning(f"列式缓存读取失败，重新解析文件: {str(e)}")
+        return None
+    
+    def _write_column_cache(self, cache_path, df):
+        """写入列式缓存（Parquet，不可用时退回pickle）"""
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            try:
+                df.to_parquet(cache_path + '.parquet', index=False)
+            except ImportError:
+                logger.warning("pyarrow未安装，列式缓存使用pickle格式")
+                df.to_pickle(cache_path + '.pkl')
+        except Exception as e:
+            logger.warning(f"列式缓存写入失败: {str(e)}")
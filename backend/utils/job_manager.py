@@ -0,0 +1,215 @@
+import os
+import time
+import uuid
+import threading
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelledError(Exception):
+    """任务已被取消"""
+
+
+class JobQueueFullError(Exception):
+    """任务队列已满"""
+
+
+# 分析流程各阶段及其在总进度中的权重
+ANALYSIS_STAGES = [
+    ('preprocess', 0.10),
+    ('embed', 0.35),
+    ('sample', 0.02),
+    ('knn', 0.05),
+    ('umap', 0.15),
+    ('hdbscan', 0.10),
+    ('ctfidf', 0.05),
+    ('assign', 0.03),
+    ('visualizations', 0.15)
+]
+
+
+class Job:
+    """单个后台任务的状态"""
+    
+    def __init__(self, job_id, stages):
+        self.id = job_id
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.current_stage = None
+        self.stages = {
+            name: {'status': 'pending', 'progress': 0.0, 'started_at': None, 'finished_at': None}
+            for name, _ in stages
+        }
+        self.cancel_event = threading.Event()
+        self.future = None
+    
+    def to_dict(self, stage_weights):
+        """任务状态快照（不含结果）"""
+        progress = sum(
+            weight * (1.0 if self.stages[name]['status'] == 'completed' else self.stages[name]['progress'])
+            for name, weight in stage_weights
+        )
+        if self.status == 'completed':
+            progress = 1.0
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'current_stage': self.current_stage,
+            'progress': round(progress, 4),
+            'stages': self.stages,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error
+        }
+
+
+class JobProgress:
+    """传给分析流程的进度回调，同时负责检查取消信号"""
+    
+    def __init__(self, job, lock):
+        self._job = job
+        self._lock = lock
+    
+    def __call__(self, stage, progress=0.0):
+        if self._job.cancel_event.is_set():
+            raise JobCancelledError(f"任务 {self._job.id} 已取消")
+        
+        with self._lock:
+            now = time.time()
+            if stage != self._job.current_stage:
+                # 进入新阶段时，之前仍在运行的阶段视为完成
+                for info in self._job.stages.values():
+                    if info['status'] == 'running':
+                        info['status'] = 'completed'
+                        info['progress'] = 1.0
+                        info['finished_at'] = now
+                self._job.current_stage = stage
+            
+            info = self._job.stages.get(stage)
+            if info is not None:
+                if info['status'] == 'pending':
+                    info['status'] = 'running'
+                    info['started_at'] = now
+                info['progress'] = max(info['progress'], min(float(progress), 1.0))
+
+
+class JobManager:
+    """基于线程池的本地任务队列，无需外部消息中间件"""
+    
+    def __init__(self, max_workers=None, max_pending=None, retention_seconds=None, stages=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get('ANALYSIS_WORKERS', 1))
+        if max_pending is None:
+            max_pending = int(os.environ.get('ANALYSIS_MAX_PENDING', 10))
+        if retention_seconds is None:
+            retention_seconds = int(os.environ.get('JOB_RETENTION_SECONDS', 3600))
+        
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.stages = stages or ANALYSIS_STAGES
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis')
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, fn, *args, **kwargs):
+        """提交任务，fn 需接受 progress_callback 关键字参数；返回任务ID"""
+        self._purge_expired()
+        
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status in ('queued', 'running'))
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"任务队列已满（{self.max_pending}）")
+            
+            job = Job(uuid.uuid4().hex, self.stages)
+            self._jobs[job.id] = job
+        
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"任务已提交: {job.id}")
+        return job.id
+    
+    def get(self, job_id):
+        """获取任务状态，不存在时返回 None"""
+        self._purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict(self.stages) if job else None
+    
+    def get_result(self, job_id):
+        """返回 (状态, 结果)，任务不存在时返回 (None, None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, None
+            return job.status, job.result
+    
+    def cancel(self, job_id):
+        """取消任务：排队中的任务直接取消，运行中的任务在下一个阶段检查点停止"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ('completed', 'failed', 'cancelled'):
+                return job.to_dict(self.stages)
+            
+            job.cancel_event.set()
+            if job.status == 'queued' and job.future is not None and job.future.cancel():
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+            logger.info(f"任务取消请求: {job_id}")
+            return job.to_dict(self.stages)
+    
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job.cancel_event.is_set():
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+        
+        progress = JobProgress(job, self._lock)
+        try:
+            result = fn(*args, progress_callback=progress, **kwargs)
+            with self._lock:
+                for info in job.stages.values():
+                    if info['status'] == 'running':
+                        info['status'] = 'completed'
+                        info['progress'] = 1.0
+                        info['finished_at'] = time.time()
+                job.result = result
+                job.status = 'completed'
+            logger.info(f"任务完成: {job.id}")
+        except JobCancelledError:
+            with self._lock:
+                job.status = 'cancelled'
+            logger.info(f"任务已取消: {job.id}")
+        except Exception as e:
+            logger.error(f"任务失败: {job.id}, {str(e)}")
+            logger.error(traceback.format_exc())
+            with self._lock:
+                job.status = 'failed'
+                job.error = str(e)
+        finally:
+            with self._lock:
+                job.finished_at = time.time()
+    
+    def _purge_expired(self):
+        """清理超过保留时间的已结束任务"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at and now - job.finished_at > self.retention_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
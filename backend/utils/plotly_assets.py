@@ -0,0 +1,56 @@
+import re
+import hashlib
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# 共享 plotly.js 的文件名（导出ZIP中的相对路径与后端静态资源名一致）
+PLOTLYJS_ASSET_NAME = 'plotly.min.js'
+
+# plotly 在 include_plotlyjs 为脚本地址时生成的 <script src="..."> 标签
+_SHARED_SCRIPT_PATTERN = re.compile(r'(<script[^>]*\ssrc=")[^"]*plotly\.min\.js(")')
+
+# 静态资源只压缩一次，使用最高压缩级别
+_STATIC_COMPRESS_LEVELS = {'zstd': 19, 'gzip': 9}
+
+
+@lru_cache(maxsize=1)
+def get_plotlyjs_bundle():
+    """返回 (plotly.js 内容字节, ETag)，每个进程只读取一次"""
+    import plotly
+    from plotly.offline import get_plotlyjs
+    
+    content = get_plotlyjs().encode('utf-8')
+    etag = f"plotly-{plotly.__version__}-{hashlib.sha1(content).hexdigest()[:12]}"
+    logger.info(f"plotly.js 已加载: {len(content)} bytes ({etag})")
+    return content, etag
+
+
+@lru_cache(maxsize=None)
+def get_plotlyjs_encoded(encoding=None):
+    """预压缩的 plotly.js（内容不变，每个进程每种编码只以最高压缩级别压缩一次），encoding 为 None 时返回原文"""
+    content, _ = get_plotlyjs_bundle()
+    if encoding is None:
+        return content
+    
+    from utils.response_encoding import compress_bytes
+    
+    compressed = compress_bytes(content, encoding, level=_STATIC_COMPRESS_LEVELS[encoding])
+    logger.info(f"plotly.js 已预压缩: {encoding} {len(content)} -> {len(compressed)} bytes")
+    return compressed
+
+
+def plotlyjs_size():
+    """plotly.js 字节数，用于统计内嵌与共享两种方式的体积差异"""
+    return len(get_plotlyjs_bundle()[0])
+
+
+def point_to_local_plotlyjs(html):
+    """将引用共享 plotly.js 的HTML改为引用同目录下的 plotly.min.js
+    
+    Returns:
+        (新的HTML, 是否引用了共享脚本)
+    """
+    rewritten, count = _SHARED_SCRIPT_PATTERN.subn(rf'\g<1>{PLOTLYJS_ASSET_NAME}\g<2>', html)
+    return rewritten, count > 0
@@ -0,0 +1,242 @@
+import os
+import time
+import threading
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# 直方图分桶：耗时（秒）与内存（字节）
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+BYTES_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(7, 15))  # 128MB ~ 16GB
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # 非 Linux 平台退化为进程生命周期内的峰值（macOS 单位为字节，其余为KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    return None
+
+
+class Measurement:
+    """一段代码的墙钟时间、CPU时间与峰值常驻内存
+    
+    CPU时间为整个进程的CPU时间（包括BLAS/numba等计算线程；并发分析时也包括其他分析）。
+    峰值内存由后台线程按 PROFILE_RSS_INTERVAL_MS 间隔采样（0 表示只在开始和结束时采样）。
+    """
+    
+    def __init__(self, sample_interval=None):
+        if sample_interval is None:
+            sample_interval = float(os.environ.get('PROFILE_RSS_INTERVAL_MS', 50)) / 1000
+        self.sample_interval = sample_interval
+        self.result = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._peak_rss = None
+    
+    def start(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._sample()
+        if self.sample_interval > 0:
+            self._sampler = threading.Thread(target=self._run_sampler, name='rss-sampler', daemon=True)
+            self._sampler.start()
+        return self
+    
+    def stop(self):
+        if self.result is not None:
+            return self.result
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._sample()
+        self.result = {
+            'wall_seconds': round(time.perf_counter() - self._wall_start, 4),
+            'cpu_seconds': round(time.process_time() - self._cpu_start, 4),
+            'peak_rss_bytes': self._peak_rss
+        }
+        return self.result
+    
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self._peak_rss is None or rss > self._peak_rss):
+            self._peak_rss = rss
+    
+    def _run_sampler(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+
+class StageProfiler:
+    """按分析阶段计时
+    
+    包装进度回调：回调报告的阶段发生变化时结束上一阶段并开始新阶段，
+    因此沿用现有的阶段划分（preprocess / embed / sample / knn / umap / hdbscan / ctfidf / assign / visualizations）。
+    """
+    
+    def __init__(self):
+        self.stages = {}
+        self._current = None
+        self._measurement = None
+        self._started = time.perf_counter()
+    
+    def wrap(self, progress_callback=None):
+        """返回记录阶段切换并转发给 progress_callback 的回调"""
+        def report(stage, progress=0.0):
+            if stage != self._current:
+                self._enter(stage)
+            if progress_callback:
+                progress_callback(stage, progress)
+        return report
+    
+    def _enter(self, stage):
+        self._close_stage()
+        self._current = stage
+        self._measurement = Measurement().start()
+    
+    def _close_stage(self):
+        if self._measurement is None:
+            return
+        result = self._measurement.stop()
+        previous = self.stages.get(self._current)
+        if previous is not None:
+            # 同一阶段出现多次（如增量模式分批训练）时累加
+            result = {
+                'wall_seconds': round(previous['wall_seconds'] + result['wall_seconds'], 4),
+                'cpu_seconds': round(previous['cpu_seconds'] + result['cpu_seconds'], 4),
+                'peak_rss_bytes': max(filter(None, (previous['peak_rss_bytes'], result['peak_rss_bytes'])), default=None)
+            }
+        self.stages[self._current] = result
+        self._measurement = None
+    
+    def finish(self, status='completed'):
+        """结束计时，记录到全局指标并返回 timings"""
+        self._close_stage()
+        self._current = None
+        timings = {
+            'total_seconds': round(time.perf_counter() - self._started, 4),
+            'stages': self.stages
+        }
+        get_metrics().observe_analysis(timings, status)
+        return timings
+
+
+def escape_label_value(value):
+    """按 Prometheus 文本格式转义标签值中的反斜杠、双引号与换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Prometheus 直方图（按标签值分组）"""
+    
+    def __init__(self, name, documentation, label, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+    
+    def observe(self, label_value, value):
+        series = self._series.setdefault(label_value, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['counts'][index] += 1
+        series['sum'] += value
+        series['count'] += 1
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_value, series in sorted(self._series.items()):
+            label = f'{self.label}="{escape_label_value(label_value)}"'
+            for bound, count in zip(self.buckets, series['counts']):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+            lines.append(f'{self.name}_sum{{{label}}} {series["sum"]:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {series["count"]}')
+        return lines
+
+
+class MetricsRegistry:
+    """分析流程的聚合指标（每个进程独立），以 Prometheus 文本格式输出"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._analyses = {}
+        self.stage_seconds = Histogram(
+            'bertopic_stage_duration_seconds', '分析各阶段的墙钟时间', 'stage', DURATION_BUCKETS
+        )
+        self.stage_cpu_seconds = Histogram(
+            'bertopic_stage_cpu_seconds', '分析各阶段的进程CPU时间', 'stage', DURATION_BUCKETS
+        )
+        self.stage_peak_rss = Histogram(
+            'bertopic_stage_peak_rss_bytes', '分析各阶段的进程峰值常驻内存', 'stage', BYTES_BUCKETS
+        )
+        self.visualization_seconds = Histogram(
+            'bertopic_visualization_duration_seconds', '各类型可视化的生成时间', 'type', DURATION_BUCKETS
+        )
+        self.analysis_seconds = Histogram(
+            'bertopic_analysis_duration_seconds', '完整分析的墙钟时间', 'status', DURATION_BUCKETS
+        )
+    
+    def observe_analysis(self, timings, status):
+        with self._lock:
+            self._analyses[status] = self._analyses.get(status, 0) + 1
+            self.analysis_seconds.observe(status, timings['total_seconds'])
+            for stage, result in timings['stages'].items():
+                self.stage_seconds.observe(stage, result['wall_seconds'])
+                self.stage_cpu_seconds.observe(stage, result['cpu_seconds'])
+                if result['peak_rss_bytes'] is not None:
+                    self.stage_peak_rss.observe(stage, result['peak_rss_bytes'])
+    
+    def observe_visualization(self, option, seconds):
+        with self._lock:
+            self.visualization_seconds.observe(option, seconds)
+    
+    def render(self):
+        """Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            lines = ['# HELP bertopic_analyses_total 已结束的分析数量', '# TYPE bertopic_analyses_total counter']
+            for status, count in sorted(self._analyses.items()):
+                lines.append(f'bertopic_analyses_total{{status="{escape_label_value(status)}"}} {count}')
+            for histogram in (self.analysis_seconds, self.stage_seconds, self.stage_cpu_seconds,
+                              self.stage_peak_rss, self.visualization_seconds):
+                lines.extend(histogram.render())
+        
+        rss = current_rss()
+        if rss is not None:
+            lines.extend([
+                '# HELP process_resident_memory_bytes 进程常驻内存',
+                '# TYPE process_resident_memory_bytes gauge',
+                f'process_resident_memory_bytes {rss}'
+            ])
+        lines.extend([
+            '# HELP process_cpu_seconds_total 进程CPU时间',
+            '# TYPE process_cpu_seconds_total counter',
+            f'process_cpu_seconds_total {time.process_time():.3f}',
+            '# HELP process_start_time_seconds 进程启动时间',
+            '# TYPE process_start_time_seconds gauge',
+            f'process_start_time_seconds {self._started:.3f}'
+        ])
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """进程内共享的指标注册表"""
+    return _metrics
@@ -0,0 +1,130 @@
+import os
+import gzip
+import time
+import logging
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.warning("orjson 未安装，JSON响应使用标准库序列化")
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 值得压缩的响应类型
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'application/javascript', 'text/plain'}
+
+
+def _default(obj):
+    """orjson 无法直接处理的对象（object数组、非连续数组、numpy标量等）"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    # 日期等其余类型沿用 Flask 默认的处理方式
+    return DefaultJSONProvider.default(obj)
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """直接序列化 NumPy 数组的 JSON provider
+    
+    安装 orjson 时由 orjson 直接编码数组，无需先转换为 Python 列表；
+    响应头 Server-Timing 记录序列化耗时。
+    """
+    
+    default = staticmethod(_default)
+    
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        start = time.perf_counter()
+        body = self._encode(obj)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        response = self._app.response_class(body, mimetype=self.mimetype)
+        response.headers['Server-Timing'] = f'serialize;dur={elapsed_ms:.1f}'
+        if elapsed_ms > 1000:
+            logger.info(f"JSON序列化耗时 {elapsed_ms:.0f}ms, {len(body)} bytes")
+        return response
+    
+    def _encode(self, obj, indent=False):
+        if orjson is None:
+            return super().dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+        
+        # 日期交给 default 处理，与 Flask 默认输出格式保持一致
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+
+def negotiate_encoding(accepted):
+    """按 Accept-Encoding 选择压缩方式（zstd 优先，其次 gzip），都不接受时返回 None"""
+    if zstandard is not None and accepted['zstd']:
+        return 'zstd'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data, encoding, level=None):
+    """按 zstd 或 gzip 压缩，level 默认取 RESPONSE_ZSTD_LEVEL / RESPONSE_GZIP_LEVEL"""
+    if encoding == 'zstd':
+        if level is None:
+            level = int(os.environ.get('RESPONSE_ZSTD_LEVEL', 3))
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if level is None:
+        level = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+    return gzip.compress(data, compresslevel=level)
+
+
+def compress_response(response):
+    """按 Accept-Encoding 压缩响应（zstd 优先，其次 gzip），用作 after_request 钩子
+    
+    已设置 Content-Encoding 的响应（如预压缩的 plotly.js）不再压缩。
+    """
+    from flask import request
+    
+    min_bytes = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code >= 300
+        or response.status_code == 206
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    start = time.perf_counter()
+    compressed = compress_bytes(data, encoding)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # 压缩后内容不再逐字节相同
+        response.set_etag(etag, weak=True)
+    timing = f'compress;dur={elapsed_ms:.1f};desc="{encoding} {len(data)}->{len(compressed)}"'
+    existing = response.headers.get('Server-Timing')
+    response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+    return response
@@ -0,0 +1,151 @@
+import os
+import time
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScratchSpace:
+    """临时文件（导出文件等）的生命周期管理
+    
+    文件在受管目录中创建并登记保留时间，发送完成后立即删除；
+    未被显式释放的文件在过期或目录超出容量上限时由定期清理删除。
+    目录中未登记的文件（例如进程重启前留下的文件）按修改时间和默认保留时间处理。
+    """
+    
+    def __init__(self, root, ttl_seconds=None, max_bytes=None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('SCRATCH_TTL_MINUTES', 60)) * 60
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('SCRATCH_MAX_MB', 2048)) * 1024 * 1024)
+        
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._artifacts = {}
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'released': 0, 'swept': 0, 'bytes_reclaimed': 0, 'sweeps': 0}
+        os.makedirs(self.root, exist_ok=True)
+    
+    def create(self, suffix='', ttl_seconds=None):
+        """创建一个空的临时文件并返回路径"""
+        fd, path = tempfile.mkstemp(dir=self.root, suffix=suffix)
+        os.close(fd)
+        with self._lock:
+            self._artifacts[path] = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+            self._stats['created'] += 1
+        return path
+    
+    def release(self, path):
+        """删除临时文件（例如 send_file 发送完成后）"""
+        with self._lock:
+            self._artifacts.pop(path, None)
+            if self._delete(path):
+                self._stats['released'] += 1
+    
+    def sweep(self):
+        """删除过期文件，并在超出容量上限时按创建时间从旧到新删除，返回删除的文件数"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            files = []
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if not os.path.isfile(path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                expires_at = self._artifacts.get(path, stat.st_mtime + self.ttl_seconds)
+                if self.ttl_seconds and expires_at <= now:
+                    if self._delete(path):
+                        removed += 1
+                else:
+                    files.append((stat.st_mtime, path, stat.st_size))
+            
+            if self.max_bytes:
+                total = sum(size for _, _, size in files)
+                for mtime, path, size in sorted(files):
+                    if total <= self.max_bytes:
+                        break
+                    if now - mtime < 60:
+                        # 刚写入的文件可能仍在发送中
+                        continue
+                    if self._delete(path):
+                        removed += 1
+                    total -= size
+            
+            # 已不存在的文件不再跟踪
+            for path in [path for path in self._artifacts if not os.path.exists(path)]:
+                del self._artifacts[path]
+            self._stats['swept'] += removed
+            self._stats['sweeps'] += 1
+        
+        if removed:
+            logger.info(f"临时文件清理: 删除 {removed} 个文件 ({self.root})")
+        return removed
+    
+    def stats(self):
+        """当前占用与累计回收情况"""
+        with self._lock:
+            files = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+            sizes = [os.path.getsize(path) for path in files if os.path.isfile(path)]
+            return {
+                'root': self.root,
+                'files_held': len(sizes),
+                'bytes_held': sum(sizes),
+                'ttl_seconds': self.ttl_seconds,
+                'max_bytes': self.max_bytes,
+                **self._stats
+            }
+    
+    def _delete(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"临时文件删除失败: {path}, {str(e)}")
+            return False
+        self._artifacts.pop(path, None)
+        self._stats['bytes_reclaimed'] += size
+        return True
+
+
+def start_periodic_sweep(tasks, interval_seconds=None):
+    """在后台线程中定期执行清理任务（tasks 为无参数可调用对象列表）"""
+    if interval_seconds is None:
+        interval_seconds = float(os.environ.get('SCRATCH_SWEEP_INTERVAL', 300))
+    if interval_seconds <= 0:
+        return None
+    
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            for task in tasks:
+                try:
+                    task()
+                except Exception as e:
+                    logger.warning(f"定期清理失败: {str(e)}")
+    
+    thread = threading.Thread(target=run, name='scratch-sweeper', daemon=True)
+    thread.start()
+    return thread
+
+
+_scratch_space = None
+_scratch_space_lock = threading.Lock()
+
+
+def get_scratch_space():
+    """进程内共享的临时文件空间"""
+    global _scratch_space
+    with _scratch_space_lock:
+        if _scratch_space is None:
+            root = os.environ.get('SCRATCH_DIR') or os.path.join(tempfile.gettempdir(), 'bertopic-scratch')
+            _scratch_space = ScratchSpace(root)
+        return _scratch_space
@@ -1,9 +1,113 @@
 import os
 import json
+import hashlib
+import threading
 import logging
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# 叶子标记（字典树中表示一个短语结束）
+_PHRASE_END = None
+
+
+class StopwordIndex:
+    """冻结的停用词索引
+    
+    words 为 frozenset，供分词后逐词 O(1) 过滤；phrase_trie 为多字符短语的字典树，
+    用于分词前整体移除短语。version 为内容指纹，停用词变化时随之变化。
+    """
+    
+    def __init__(self, words, version=None):
+        self.words = frozenset(word.strip() for word in words if word and word.strip())
+        self.version = version or self.fingerprint(self.words)
+        self._phrase_trie = None
+    
+    def __contains__(self, word):
+        return word in self.words
+    
+    def __len__(self):
+        return len(self.words)
+    
+    @property
+    def phrase_trie(self):
+        """多字符短语字典树（中文多字词或含空格的短语），首次访问时构建"""
+        if self._phrase_trie is None:
+            trie = {}
+            for phrase in self.words:
+                if not self._is_phrase(phrase):
+                    continue
+                node = trie
+                for char in phrase:
+                    node = node.setdefault(char, {})
+                node[_PHRASE_END] = True
+            self._phrase_trie = trie
+        return self._phrase_trie
+    
+    def remove_phrases(self, text):
+        """最长匹配移除文本中的停用短语（分词前使用）"""
+        trie = self.phrase_trie
+        if not trie:
+            return text
+        
+        result = []
+        i = 0
+        length = len(text)
+        while i < length:
+            node = trie
+            j = i
+            match_end = 0
+            while j < length and text[j] in node:
+                node = node[text[j]]
+                j += 1
+                if _PHRASE_END in node:
+                    match_end = j
+            if match_end:
+                result.append(' ')
+                i = match_end
+            else:
+                result.append(text[i])
+                i += 1
+        return ''.join(result)
+    
+    @staticmethod
+    def _is_phrase(word):
+        if len(word) < 2:
+            return False
+        # 英文单词只按整词过滤，避免误删其他单词中的片段
+        return ' ' in word or not word.isascii()
+    
+    @staticmethod
+    def fingerprint(words):
+        digest = hashlib.sha1('\n'.join(sorted(words)).encode('utf-8')).hexdigest()
+        return digest[:16]
+
+
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+_INDEX_CACHE_SIZE = 16
+
+
+def get_stopword_index(words):
+    """根据停用词列表获取索引，内容相同的列表复用同一个已构建的索引"""
+    if isinstance(words, StopwordIndex):
+        return words
+    
+    unique_words = frozenset(word.strip() for word in words if word and word.strip())
+    version = StopwordIndex.fingerprint(unique_words)
+    with _index_cache_lock:
+        index = _index_cache.get(version)
+        if index is not None:
+            _index_cache.move_to_end(version)
+            return index
+    
+    index = StopwordIndex(unique_words, version)
+    with _index_cache_lock:
+        _index_cache[version] = index
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
 class StopwordsManager:
     """停用词管理器"""
     
@@ -0,0 +1,155 @@
+import os
+import re
+import math
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.stopwords_manager import get_stopword_index
+
+logger = logging.getLogger(__name__)
+
+# 预编译的清洗正则
+NUMBER_PATTERN = re.compile(r'\d+')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+ENGLISH_PATTERN = re.compile(r'[a-zA-Z]')
+
+SUPPORTED_SEGMENTERS = ('jieba', 'pkuseg', 'thulac')
+
+# 每个进程内的分词器实例（只构建一次）
+_segmenters = {}
+
+# 进程池worker中的预处理参数，由 _init_worker 设置
+_worker_state = {}
+
+
+def get_segmenter(name):
+    """获取分词函数（text -> 空格分隔的词串），同一进程内只构建一次"""
+    if name in _segmenters:
+        return _segmenters[name]
+    
+    segment = None
+    if name == 'pkuseg':
+        try:
+            import pkuseg
+            seg = pkuseg.pkuseg()
+            segment = lambda text: ' '.join(seg.cut(text))
+        except ImportError:
+            logger.warning("pkuseg未安装，使用jieba替代")
+    elif name == 'thulac':
+        try:
+            import thulac
+            thu = thulac.thulac(seg_only=True)
+            segment = lambda text: thu.cut(text, text=True)
+        except ImportError:
+            logger.warning("thulac未安装，使用jieba替代")
+    elif name != 'jieba':
+        # 未知分词器：不分词
+        segment = lambda text: text
+    
+    if segment is None:
+        import jieba
+        jieba.initialize()
+        segment = lambda text: ' '.join(jieba.cut(text))
+    
+    _segmenters[name] = segment
+    return segment
+
+
+def preprocess_text(text, cleaning_config, segment, stopwords=None, stop_phrases=None):
+    """清洗并分词单条文本
+    
+    stopwords 为停用词集合；stop_phrases 为 StopwordIndex，分词前移除其中的多字符短语。
+    """
+    # 基本清理
+    if cleaning_config.get('removeNumbers', True):
+        text = NUMBER_PATTERN.sub('', text)
+    
+    if cleaning_config.get('removePunctuation', True):
+        text = PUNCTUATION_PATTERN.sub('', text)
+    
+    if cleaning_config.get('toLowerCase', True):
+        text = text.lower()
+    
+    # 去除英文字符（中文文档）
+    if cleaning_config.get('removeEnglishChars', False):
+        text = ENGLISH_PATTERN.sub('', text)
+    
+    # 分词前移除停用短语
+    if stop_phrases is not None:
+        text = stop_phrases.remove_phrases(text)
+    
+    # 中文分词
+    text = segment(text)
+    
+    # 应用停用词
+    if stopwords:
+        text = ' '.join(word for word in text.split() if word not in stopwords)
+    
+    return text
+
+
+def _init_worker(cleaning_config, stopwords, stop_phrases):
+    """进程池初始化：每个worker只构建一次分词器"""
+    _worker_state['cleaning_config'] = cleaning_config
+    _worker_state['stopwords'] = stopwords
+    _worker_state['stop_phrases'] = stop_phrases
+    _worker_state['segment'] = get_segmenter(cleaning_config.get('segmenter', 'jieba'))
+
+
+def _preprocess_chunk(texts):
+    segment = _worker_state['segment']
+    cleaning_config = _worker_state['cleaning_config']
+    stopwords = _worker_state['stopwords']
+    stop_phrases = _worker_state['stop_phrases']
+    return [preprocess_text(text, cleaning_config, segment, stopwords, stop_phrases) for text in texts]
+
+
+class TextPreprocessor:
+    """文本预处理引擎
+    
+    小语料在当前进程内处理；超过阈值时按块分发到进程池并按原顺序拼接结果。
+    """
+    
+    def __init__(self, workers=None, parallel_threshold=None, chunk_size=None):
+        if workers is None:
+            workers = int(os.environ.get('PREPROCESS_WORKERS', os.cpu_count() or 1))
+        if parallel_threshold is None:
+            parallel_threshold = int(os.environ.get('PREPROCESS_PARALLEL_THRESHOLD', 5000))
+        
+        self.workers = max(1, workers)
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+    
+    def process(self, texts, cleaning_config=None, stopwords=None, workers=None):
+        """预处理文本列表，返回与输入顺序一致的结果
+        
+        stopwords 可以是词列表或 StopwordIndex；removeStopPhrases 开启时分词前先移除停用短语。
+        """
+        cleaning_config = cleaning_config or {}
+        workers = max(1, workers or self.workers)
+        
+        stopword_index = get_stopword_index(stopwords) if stopwords else None
+        stopword_set = stopword_index.words if stopword_index else None
+        stop_phrases = None
+        if stopword_index and cleaning_config.get('removeStopPhrases', False) and stopword_index.phrase_trie:
+            stop_phrases = stopword_index
+        
+        if workers == 1 or len(texts) < self.parallel_threshold:
+            segment = get_segmenter(cleaning_config.get('segmenter', 'jieba'))
+            return [preprocess_text(text, cleaning_config, segment, stopword_set, stop_phrases) for text in texts]
+        
+        chunk_size = self.chunk_size or max(500, math.ceil(len(texts) / (workers * 4)))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        logger.info(f"并行预处理: {len(texts)} 条文本, {workers} 个进程, {len(chunks)} 个分块")
+        
+        processed_texts = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(cleaning_config, stopword_set, stop_phrases)
+        ) as executor:
+            # map 按提交顺序返回结果
+            for chunk_result in executor.map(_preprocess_chunk, chunks):
+                processed_texts.extend(chunk_result)
+        
+        return processed_texts
@@ -44,6 +44,19 @@ const AnalysisEngine = ({ data, onNext, onBack, onResultsGenerated }) => {
     { name: t('analysis.steps.complete'), description: t('analysis.steps.completeDesc') }
   ];
 
+  // Backend job stages mapped onto the displayed steps
+  const stageToStep = {
+    preprocess: 0,
+    embed: 1,
+    sample: 2,
+    knn: 2,
+    umap: 2,
+    hdbscan: 2,
+    ctfidf: 2,
+    assign: 2,
+    visualizations: 3
+  };
+
   const getSelectedVisualizations = () => {
     const selected = [];
     Object.entries(data.visualizationOptions).forEach(([key, value]) => {
@@ -79,6 +92,7 @@ const AnalysisEngine = ({ data, onNext, onBack, onResultsGenerated }) => {
     try {
       // Prepare analysis data - use complete data instead of preview data
       const analysisData = {
+        dataset_id: data.dataset_id, // Uploaded dataset ID
         file_path: data.file_path, // Use correct file path
         file_type: data.file_type || 'excel', // Pass file type
         text_column: data.selectedTextColumn,
@@ -86,27 +100,34 @@ const AnalysisEngine = ({ data, onNext, onBack, onResultsGenerated }) => {
         config: data.config,
         preprocessing_config: data.preprocessingConfig,
         stopwords: data.stopwords,
-        visualization_options: getSelectedVisualizations()
+        visualization_options: getSelectedVisualizations(),
+        lazy_visualizations: true, // Render visualizations on demand in the results view
+        include_documents: false // Documents are paged from the server and exports reference analysis_id
       };
 
-      // Phased progress display
-      for (let i = 0; i < analysisSteps.length - 1; i++) {
-        setCurrentStep(i);
-        setProgress((i / (analysisSteps.length - 1)) * 100);
-        
-        // Update elapsed time and remaining time
-        const elapsed = Math.floor((Date.now() - startTime) / 1000);
-        setElapsedTime(elapsed);
-        
-        const remaining = Math.max(0, Math.floor(totalTime - elapsed));
-        setRemainingTime(remaining);
-        
-        // Simulate time for each step
+      // Submit analysis as a background job and poll its progress
+      const submitResponse = await axios.post('http://localhost:5001/api/analyze', { ...analysisData, async: true });
+      const jobId = submitResponse.data.job_id;
+      const analysisStart = Date.now();
+
+      let job = submitResponse.data;
+      while (!['completed', 'failed', 'cancelled'].includes(job.status)) {
         await new Promise(resolve => setTimeout(resolve, 2000));
+        job = (await axios.get(`http://localhost:5001/api/jobs/${jobId}`)).data;
+
+        setCurrentStep(stageToStep[job.current_stage] ?? 0);
+        setProgress((job.progress || 0) * 100);
+
+        const elapsed = Math.floor((Date.now() - analysisStart) / 1000);
+        setElapsedTime(elapsed);
+        setRemainingTime(Math.max(0, Math.floor(totalTime - elapsed)));
       }
 
-      // Send analysis request
-      const response = await axios.post('http://localhost:5001/api/analyze', analysisData);
+      if (job.status !== 'completed') {
+        throw new Error(job.error || `Analysis ${job.status}`);
+      }
+
+      const response = await axios.get(`http://localhost:5001/api/jobs/${jobId}/result`);
       
       if (response.data.success) {
         setResults(response.data);
@@ -114,7 +135,7 @@ const AnalysisEngine = ({ data, onNext, onBack, onResultsGenerated }) => {
         setCurrentStep(analysisSteps.length - 1);
         
         // Calculate total elapsed time
-        const totalElapsed = Math.floor((Date.now() - startTime) / 1000);
+        const totalElapsed = Math.floor((Date.now() - analysisStart) / 1000);
         setElapsedTime(totalElapsed);
         setRemainingTime(0);
         
@@ -168,6 +189,9 @@ const AnalysisEngine = ({ data, onNext, onBack, onResultsGenerated }) => {
             <Chip label={`${t('analysis.timestampColumn')}: ${data.selectedTimestampColumn}`} color="info" />
           )}
           <Chip label={`${t('analysis.minTopicSize')}: ${data.config.basic.minTopicSize}`} />
+          {data.config.reduction && data.config.clustering && (
+            <Chip label={`${t('configuration.engines.title')}: ${data.config.reduction.engine} + ${data.config.clustering.engine}`} />
+          )}
           <Chip label={`${t('analysis.selectedVisualizations')}: ${getSelectedVisualizations().length}${t('analysis.items')}`} />
         </Box>
         
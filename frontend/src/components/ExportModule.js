@@ -14,6 +14,8 @@ import {
   Chip,
   List,
   ListItem,
+  TextField,
+  MenuItem,
   ListItemIcon,
   ListItemText,
   Divider
@@ -34,6 +36,7 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
   const { t } = useTranslation();
   const [exporting, setExporting] = useState({});
   const [exportProgress, setExportProgress] = useState({});
+  const [annotatedFormat, setAnnotatedFormat] = useState('xlsx');
 
   const getAvailableVisualizations = () => {
     if (!results?.visualizations) return [];
@@ -68,11 +71,13 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
           texts: results?.texts || data?.texts || [],
           topics: results?.topics || data?.topics || [],
           probabilities: results?.probabilities || data?.probabilities || [],
-          topic_info: results?.topic_info || data?.topic_info || []
+          topic_info: results?.topic_info || data?.topic_info || [],
+          format: annotatedFormat
         };
       } else if (exportType === 'visualizations') {
         // Export visualization results
         exportData = {
+          analysis_id: results?.analysis_id,
           visualizations: results?.visualizations || data?.visualizations || {}
         };
       } else if (exportType === 'topic_details') {
@@ -85,9 +90,15 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
       
       console.log('Final export data:', exportData);
 
-      const response = await axios.post(`http://localhost:5001/api/export/${exportType}`, exportData, {
-        responseType: 'blob'
-      });
+      // Stored analyses are exported server-side without re-uploading the results
+      const response = results?.analysis_id
+        ? await axios.get(`http://localhost:5001/api/results/${results.analysis_id}/export/${exportType}`, {
+          params: exportType === 'annotated_data' ? { format: annotatedFormat } : {},
+          responseType: 'blob'
+        })
+        : await axios.post(`http://localhost:5001/api/export/${exportType}`, exportData, {
+          responseType: 'blob'
+        });
 
       clearInterval(progressInterval);
       setExportProgress(prev => ({ ...prev, [exportType]: 100 }));
@@ -104,7 +115,9 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
       // Add appropriate file extension based on export type
       if (exportType === 'visualizations') {
         filename += '.zip';
-      } else if (exportType === 'annotated_data' || exportType === 'topic_details') {
+      } else if (exportType === 'annotated_data') {
+        filename += `.${annotatedFormat}`;
+      } else if (exportType === 'topic_details') {
         filename += '.xlsx';
       }
       
@@ -164,7 +177,8 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
     icon, 
     exportType, 
     color = 'primary',
-    disabled = false 
+    disabled = false,
+    children
   }) => (
     <Card sx={{ height: '100%' }}>
       <CardContent>
@@ -179,6 +193,8 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
           {description}
         </Typography>
         
+        {children}
+
         <Box sx={{ display: 'flex', alignItems: 'center', mb: 2 }}>
           <Typography variant="caption" color="text.secondary">
             Estimated size: {getFileSizeEstimate(exportType)}
@@ -277,7 +293,20 @@ const ExportModule = ({ results, data, onBack, onReset }) => {
             icon={<ExcelIcon color="success" />}
             exportType="annotated_data"
             color="success"
-          />
+          >
+            <TextField
+              select
+              size="small"
+              label="Format"
+              value={annotatedFormat}
+              onChange={(event) => setAnnotatedFormat(event.target.value)}
+              sx={{ mb: 2, minWidth: 160 }}
+            >
+              <MenuItem value="xlsx">Excel (.xlsx)</MenuItem>
+              <MenuItem value="csv">CSV (.csv)</MenuItem>
+              <MenuItem value="parquet">Parquet (.parquet)</MenuItem>
+            </TextField>
+          </ExportCard>
         </Grid>
         
         <Grid item xs={12} md={4}>
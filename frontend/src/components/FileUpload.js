@@ -36,19 +36,18 @@ const FileUpload = ({ onNext, onDataLoaded }) => {
   const [selectedTimestampColumn, setSelectedTimestampColumn] = useState('');
   const [loading, setLoading] = useState(false);
   const [totalRows, setTotalRows] = useState(0);  // 添加总行数状态
+  const [fileType, setFileType] = useState('excel');
+  const [datasetId, setDatasetId] = useState(null);
 
   const onDrop = useCallback(async (acceptedFiles) => {
     const file = acceptedFiles[0];
     if (!file) return;
 
-    // 检查文件格式
-    const allowedTypes = [
-      'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-      'application/vnd.ms-excel',
-      'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-    ];
+    // 检查文件格式（CSV/JSONL/Parquet 的MIME类型因浏览器而异，按扩展名判断）
+    const allowedExtensions = ['.xlsx', '.xls', '.docx', '.csv', '.jsonl', '.parquet'];
+    const extension = file.name.slice(file.name.lastIndexOf('.')).toLowerCase();
     
-    if (!allowedTypes.includes(file.type)) {
+    if (!allowedExtensions.includes(extension)) {
       toast.error(t('errors.fileFormat'));
       return;
     }
@@ -75,6 +74,8 @@ const FileUpload = ({ onNext, onDataLoaded }) => {
       setPreviewData(response.data.preview);
       setColumns(response.data.columns);
       setTotalRows(response.data.total_rows || 0);  // 保存总行数到状态
+      setFileType(response.data.file_type || 'excel');
+      setDatasetId(response.data.dataset_id);
       
       // 显示文档统计信息
       const totalRows = response.data.total_rows || 0;
@@ -94,7 +95,10 @@ const FileUpload = ({ onNext, onDataLoaded }) => {
     accept: {
       'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': ['.xlsx'],
       'application/vnd.ms-excel': ['.xls'],
-      'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ['.docx']
+      'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ['.docx'],
+      'text/csv': ['.csv'],
+      'application/x-ndjson': ['.jsonl'],
+      'application/vnd.apache.parquet': ['.parquet']
     },
     multiple: false
   });
@@ -111,8 +115,9 @@ const FileUpload = ({ onNext, onDataLoaded }) => {
       columns: columns,
       selectedTextColumn: selectedTextColumn,
       selectedTimestampColumn: selectedTimestampColumn || null,
-      file_path: uploadedFile.name,
-      file_type: uploadedFile.type.includes('word') ? 'word' : 'excel',
+      dataset_id: datasetId,
+      file_path: datasetId,
+      file_type: fileType,
       total_rows: totalRows || 0  // 使用实际的总行数，而不是预览数据长度
     };
 
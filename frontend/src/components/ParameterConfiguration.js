@@ -26,13 +26,36 @@ import {
   Settings as SettingsIcon
 } from '@mui/icons-material';
 
+// Corpora at or above this size default to the large corpus mode
+const LARGE_CORPUS_THRESHOLD = 200000;
+
+// Engines that scale linearly with the number of documents
+const LARGE_CORPUS_ENGINES = { reduction: 'incremental_pca', clustering: 'minibatch_kmeans' };
+const DEFAULT_ENGINES = { reduction: 'umap', clustering: 'hdbscan' };
+
+// Corpora at or above this size default to fitting on a sample and assigning the rest
+const SAMPLE_FIT_THRESHOLD = 1000000;
+
 const ParameterConfiguration = ({ data, onNext, onBack, onConfigUpdated }) => {
   const { t } = useTranslation();
+  const initialEngines = (data?.total_rows || 0) >= LARGE_CORPUS_THRESHOLD ? LARGE_CORPUS_ENGINES : DEFAULT_ENGINES;
   const [config, setConfig] = useState({
     basic: {
       minTopicSize: 10,
       embeddingModel: 'auto'
     },
+    reduction: {
+      engine: initialEngines.reduction
+    },
+    clustering: {
+      engine: initialEngines.clustering,
+      nClusters: 50
+    },
+    sampling: {
+      enabled: (data?.total_rows || 0) >= SAMPLE_FIT_THRESHOLD,
+      sampleSize: 100000,
+      strategy: 'random'
+    },
     umap: {
       nNeighbors: 15,
       nComponents: 5,
@@ -72,6 +95,18 @@ const ParameterConfiguration = ({ data, onNext, onBack, onConfigUpdated }) => {
     }));
   };
 
+  const isLargeCorpusMode = config.reduction.engine === LARGE_CORPUS_ENGINES.reduction
+    && config.clustering.engine === LARGE_CORPUS_ENGINES.clustering;
+
+  const handleLargeCorpusModeChange = (enabled) => {
+    const engines = enabled ? LARGE_CORPUS_ENGINES : DEFAULT_ENGINES;
+    setConfig(prev => ({
+      ...prev,
+      reduction: { ...prev.reduction, engine: engines.reduction },
+      clustering: { ...prev.clustering, engine: engines.clustering }
+    }));
+  };
+
   const handleVisualizationChange = (option, checked) => {
     setVisualizationOptions(prev => ({
       ...prev,
@@ -153,122 +188,232 @@ const ParameterConfiguration = ({ data, onNext, onBack, onConfigUpdated }) => {
         </AccordionDetails>
       </Accordion>
 
-      {/* UMAP Parameters */}
-      <Accordion>
+      {/* Dimensionality Reduction and Clustering Engines */}
+      <Accordion defaultExpanded={isLargeCorpusMode || config.sampling.enabled}>
         <AccordionSummary expandIcon={<ExpandMoreIcon />}>
           <Typography variant="h6">
-            {t('configuration.umap.title')}
+            {t('configuration.engines.title')}
             <HelpIcon sx={{ ml: 1, fontSize: 16 }} />
           </Typography>
         </AccordionSummary>
         <AccordionDetails>
-          <Box sx={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: 3 }}>
-            <Box>
-              <Typography gutterBottom>
-                {t('configuration.umap.nNeighbors')}: {config.umap.nNeighbors}
-              </Typography>
-              <Slider
-                value={config.umap.nNeighbors}
-                onChange={(e, value) => handleConfigChange('umap', 'nNeighbors', value)}
-                min={5}
-                max={50}
-                step={1}
-                marks={[
-                  { value: 5, label: '5' },
-                  { value: 15, label: '15' },
-                  { value: 30, label: '30' },
-                  { value: 50, label: '50' }
-                ]}
-              />
-            </Box>
-
-            <Box>
-              <Typography gutterBottom>
-                {t('configuration.umap.nComponents')}: {config.umap.nComponents}
-              </Typography>
-              <Slider
-                value={config.umap.nComponents}
-                onChange={(e, value) => handleConfigChange('umap', 'nComponents', value)}
-                min={2}
-                max={10}
-                step={1}
-                marks={[
-                  { value: 2, label: '2' },
-                  { value: 5, label: '5' },
-                  { value: 10, label: '10' }
-                ]}
-              />
-            </Box>
-
-            <Box>
-              <Typography gutterBottom>
-                {t('configuration.umap.minDist')}: {config.umap.minDist}
-              </Typography>
-              <Slider
-                value={config.umap.minDist}
-                onChange={(e, value) => handleConfigChange('umap', 'minDist', value)}
-                min={0.0}
-                max={1.0}
-                step={0.01}
-                marks={[
-                  { value: 0.0, label: '0.0' },
-                  { value: 0.5, label: '0.5' },
-                  { value: 1.0, label: '1.0' }
-                ]}
+          <FormControlLabel
+            control={
+              <Switch
+                checked={isLargeCorpusMode}
+                onChange={(e) => handleLargeCorpusModeChange(e.target.checked)}
               />
-            </Box>
+            }
+            label={t('configuration.engines.largeCorpusMode')}
+          />
+          <Alert severity="info" sx={{ my: 2 }}>
+            {t('configuration.engines.largeCorpusModeDesc')}
+          </Alert>
 
+          <Box sx={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: 3 }}>
             <FormControl fullWidth>
-              <InputLabel>{t('configuration.umap.metric')}</InputLabel>
+              <InputLabel>{t('configuration.engines.reduction')}</InputLabel>
               <Select
-                value={config.umap.metric}
-                onChange={(e) => handleConfigChange('umap', 'metric', e.target.value)}
-                label={t('configuration.umap.metric')}
+                value={config.reduction.engine}
+                onChange={(e) => handleConfigChange('reduction', 'engine', e.target.value)}
+                label={t('configuration.engines.reduction')}
               >
-                <MenuItem value="cosine">{t('configuration.umap.cosine')}</MenuItem>
-                <MenuItem value="euclidean">{t('configuration.umap.euclidean')}</MenuItem>
-                <MenuItem value="manhattan">{t('configuration.umap.manhattan')}</MenuItem>
+                <MenuItem value="umap">{t('configuration.engines.umap')}</MenuItem>
+                <MenuItem value="pca">{t('configuration.engines.pca')}</MenuItem>
+                <MenuItem value="incremental_pca">{t('configuration.engines.incrementalPca')}</MenuItem>
+                <MenuItem value="truncated_svd">{t('configuration.engines.truncatedSvd')}</MenuItem>
               </Select>
             </FormControl>
-          </Box>
-        </AccordionDetails>
-      </Accordion>
-
-      {/* HDBSCAN Parameters */}
-      <Accordion>
-        <AccordionSummary expandIcon={<ExpandMoreIcon />}>
-          <Typography variant="h6">
-            {t('configuration.hdbscan.title')}
-            <HelpIcon sx={{ ml: 1, fontSize: 16 }} />
-          </Typography>
-        </AccordionSummary>
-        <AccordionDetails>
-          <Box sx={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: 3 }}>
-            <TextField
-              label={t('configuration.hdbscan.minClusterSize')}
-              type="number"
-              value={config.hdbscan.minClusterSize}
-              onChange={(e) => handleConfigChange('hdbscan', 'minClusterSize', parseInt(e.target.value))}
-              fullWidth
-              inputProps={{ min: 2, max: 100 }}
-            />
 
             <FormControl fullWidth>
-              <InputLabel>{t('configuration.hdbscan.metric')}</InputLabel>
+              <InputLabel>{t('configuration.engines.clustering')}</InputLabel>
               <Select
-                value={config.hdbscan.metric}
-                onChange={(e) => handleConfigChange('hdbscan', 'metric', e.target.value)}
-                label={t('configuration.hdbscan.metric')}
+                value={config.clustering.engine}
+                onChange={(e) => handleConfigChange('clustering', 'engine', e.target.value)}
+                label={t('configuration.engines.clustering')}
               >
-                <MenuItem value="euclidean">{t('configuration.hdbscan.euclidean')}</MenuItem>
-                <MenuItem value="manhattan">{t('configuration.hdbscan.manhattan')}</MenuItem>
-                <MenuItem value="cosine">{t('configuration.hdbscan.cosine')}</MenuItem>
+                <MenuItem value="hdbscan">{t('configuration.engines.hdbscan')}</MenuItem>
+                <MenuItem value="minibatch_kmeans">{t('configuration.engines.minibatchKmeans')}</MenuItem>
+                <MenuItem value="birch">{t('configuration.engines.birch')}</MenuItem>
               </Select>
             </FormControl>
+
+            {config.clustering.engine !== 'hdbscan' && (
+              <TextField
+                label={t('configuration.engines.nClusters')}
+                type="number"
+                value={config.clustering.nClusters}
+                onChange={(e) => handleConfigChange('clustering', 'nClusters', parseInt(e.target.value))}
+                helperText={t('configuration.engines.nClustersDesc')}
+                fullWidth
+                inputProps={{ min: 2, max: 500 }}
+              />
+            )}
           </Box>
+
+          <FormControlLabel
+            sx={{ mt: 3 }}
+            control={
+              <Switch
+                checked={config.sampling.enabled}
+                onChange={(e) => handleConfigChange('sampling', 'enabled', e.target.checked)}
+              />
+            }
+            label={t('configuration.engines.sampleFit')}
+          />
+          <Typography variant="body2" color="text.secondary" sx={{ mb: 2 }}>
+            {t('configuration.engines.sampleFitDesc')}
+          </Typography>
+
+          {config.sampling.enabled && (
+            <Box sx={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: 3 }}>
+              <TextField
+                label={t('configuration.engines.sampleSize')}
+                type="number"
+                value={config.sampling.sampleSize}
+                onChange={(e) => handleConfigChange('sampling', 'sampleSize', parseInt(e.target.value))}
+                helperText={t('configuration.engines.sampleSizeDesc')}
+                fullWidth
+                inputProps={{ min: 1000, step: 1000 }}
+              />
+
+              <FormControl fullWidth>
+                <InputLabel>{t('configuration.engines.sampleStrategy')}</InputLabel>
+                <Select
+                  value={config.sampling.strategy}
+                  onChange={(e) => handleConfigChange('sampling', 'strategy', e.target.value)}
+                  label={t('configuration.engines.sampleStrategy')}
+                >
+                  <MenuItem value="random">{t('configuration.engines.sampleRandom')}</MenuItem>
+                  <MenuItem value="time">{t('configuration.engines.sampleTime')}</MenuItem>
+                  <MenuItem value="embedding">{t('configuration.engines.sampleEmbedding')}</MenuItem>
+                </Select>
+              </FormControl>
+            </Box>
+          )}
         </AccordionDetails>
       </Accordion>
 
+      {/* UMAP Parameters */}
+      {config.reduction.engine === 'umap' && (
+        <Accordion>
+          <AccordionSummary expandIcon={<ExpandMoreIcon />}>
+            <Typography variant="h6">
+              {t('configuration.umap.title')}
+              <HelpIcon sx={{ ml: 1, fontSize: 16 }} />
+            </Typography>
+          </AccordionSummary>
+          <AccordionDetails>
+            <Box sx={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: 3 }}>
+              <Box>
+                <Typography gutterBottom>
+                  {t('configuration.umap.nNeighbors')}: {config.umap.nNeighbors}
+                </Typography>
+                <Slider
+                  value={config.umap.nNeighbors}
+                  onChange={(e, value) => handleConfigChange('umap', 'nNeighbors', value)}
+                  min={5}
+                  max={50}
+                  step={1}
+                  marks={[
+                    { value: 5, label: '5' },
+                    { value: 15, label: '15' },
+                    { value: 30, label: '30' },
+                    { value: 50, label: '50' }
+                  ]}
+                />
+              </Box>
+
+              <Box>
+                <Typography gutterBottom>
+                  {t('configuration.umap.nComponents')}: {config.umap.nComponents}
+                </Typography>
+                <Slider
+                  value={config.umap.nComponents}
+                  onChange={(e, value) => handleConfigChange('umap', 'nComponents', value)}
+                  min={2}
+                  max={10}
+                  step={1}
+                  marks={[
+                    { value: 2, label: '2' },
+                    { value: 5, label: '5' },
+                    { value: 10, label: '10' }
+                  ]}
+                />
+              </Box>
+
+              <Box>
+                <Typography gutterBottom>
+                  {t('configuration.umap.minDist')}: {config.umap.minDist}
+                </Typography>
+                <Slider
+                  value={config.umap.minDist}
+                  onChange={(e, value) => handleConfigChange('umap', 'minDist', value)}
+                  min={0.0}
+                  max={1.0}
+                  step={0.01}
+                  marks={[
+                    { value: 0.0, label: '0.0' },
+                    { value: 0.5, label: '0.5' },
+                    { value: 1.0, label: '1.0' }
+                  ]}
+                />
+              </Box>
+
+              <FormControl fullWidth>
+                <InputLabel>{t('configuration.umap.metric')}</InputLabel>
+                <Select
+                  value={config.umap.metric}
+                  onChange={(e) => handleConfigChange('umap', 'metric', e.target.value)}
+                  label={t('configuration.umap.metric')}
+                >
+                  <MenuItem value="cosine">{t('configuration.umap.cosine')}</MenuItem>
+                  <MenuItem value="euclidean">{t('configuration.umap.euclidean')}</MenuItem>
+                  <MenuItem value="manhattan">{t('configuration.umap.manhattan')}</MenuItem>
+                </Select>
+              </FormControl>
+            </Box>
+          </AccordionDetails>
+        </Accordion>
+      )}
+
+      {/* HDBSCAN Parameters */}
+      {config.clustering.engine === 'hdbscan' && (
+        <Accordion>
+          <AccordionSummary expandIcon={<ExpandMoreIcon />}>
+            <Typography variant="h6">
+              {t('configuration.hdbscan.title')}
+              <HelpIcon sx={{ ml: 1, fontSize: 16 }} />
+            </Typography>
+          </AccordionSummary>
+          <AccordionDetails>
+            <Box sx={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: 3 }}>
+              <TextField
+                label={t('configuration.hdbscan.minClusterSize')}
+                type="number"
+                value={config.hdbscan.minClusterSize}
+                onChange={(e) => handleConfigChange('hdbscan', 'minClusterSize', parseInt(e.target.value))}
+                fullWidth
+                inputProps={{ min: 2, max: 100 }}
+              />
+
+              <FormControl fullWidth>
+                <InputLabel>{t('configuration.hdbscan.metric')}</InputLabel>
+                <Select
+                  value={config.hdbscan.metric}
+                  onChange={(e) => handleConfigChange('hdbscan', 'metric', e.target.value)}
+                  label={t('configuration.hdbscan.metric')}
+                >
+                  <MenuItem value="euclidean">{t('configuration.hdbscan.euclidean')}</MenuItem>
+                  <MenuItem value="manhattan">{t('configuration.hdbscan.manhattan')}</MenuItem>
+                  <MenuItem value="cosine">{t('configuration.hdbscan.cosine')}</MenuItem>
+                </Select>
+              </FormControl>
+            </Box>
+          </AccordionDetails>
+        </Accordion>
+      )}
+
       {/* Advanced Parameters */}
       <Accordion>
         <AccordionSummary expandIcon={<ExpandMoreIcon />}>
@@ -17,7 +17,12 @@ import {
   Card,
   CardContent,
   Grid,
-  Alert
+  Alert,
+  TablePagination,
+  FormControl,
+  InputLabel,
+  Select,
+  MenuItem
 } from '@mui/material';
 import {
   BarChart as BarChartIcon,
@@ -25,10 +30,12 @@ import {
   Timeline as TimelineIcon,
   AccountTree as AccountTreeIcon,
   GridView as HeatMapIcon,
-  Visibility as VisibilityIcon
+  Visibility as VisibilityIcon,
+  Article as ArticleIcon
 } from '@mui/icons-material';
 import Plot from 'react-plotly.js';
 import { useEffect, useRef } from 'react';
+import axios from 'axios';
 
 const ResultsDisplay = ({ results, onNext, onBack }) => {
   const { t } = useTranslation();
@@ -53,6 +60,16 @@ const ResultsDisplay = ({ results, onNext, onBack }) => {
       content: <OverviewTab results={results} />
     });
 
+    // Documents are fetched page by page from the stored analysis
+    if (results.analysis_id) {
+      tabs.push({
+        id: 'documents_list',
+        label: t('results.documentList'),
+        icon: <ArticleIcon />,
+        content: <DocumentsListTab analysisId={results.analysis_id} topicInfo={results.topic_info || []} />
+      });
+    }
+
     // Dynamically add tabs based on generated visualizations
     if (results.visualizations?.topics) {
       tabs.push({
@@ -265,9 +282,165 @@ const OverviewTab = ({ results }) => {
   );
 };
 
+// 文档列表Tab组件 - 分页查询后端保存的分析结果
+const DocumentsListTab = ({ analysisId, topicInfo }) => {
+  const { t } = useTranslation();
+  const [topic, setTopic] = useState('');
+  const [page, setPage] = useState(0);
+  const [rowsPerPage, setRowsPerPage] = useState(25);
+  const [documents, setDocuments] = useState(null);
+  const [total, setTotal] = useState(0);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    const params = {
+      offset: page * rowsPerPage,
+      limit: rowsPerPage,
+      fields: 'index,text,topic,probability'
+    };
+    if (topic !== '') {
+      params.topic = topic;
+    }
+
+    axios.get(`http://localhost:5001/api/results/${analysisId}/documents`, { params })
+      .then((response) => {
+        if (!cancelled) {
+          setDocuments(response.data.documents);
+          setTotal(response.data.total);
+          setError(null);
+        }
+      })
+      .catch((err) => {
+        if (!cancelled) {
+          setError(err.response?.data?.error || err.message);
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [analysisId, topic, page, rowsPerPage]);
+
+  if (error) {
+    return <Alert severity="warning">{error}</Alert>;
+  }
+
+  return (
+    <Box>
+      <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', mb: 2 }}>
+        <Typography variant="h6">
+          {t('results.documentList')}
+        </Typography>
+        <FormControl size="small" sx={{ minWidth: 200 }}>
+          <InputLabel>{t('results.filterByTopic')}</InputLabel>
+          <Select
+            value={topic}
+            label={t('results.filterByTopic')}
+            onChange={(event) => {
+              setTopic(event.target.value);
+              setPage(0);
+            }}
+          >
+            <MenuItem value="">{t('results.allTopics')}</MenuItem>
+            {topicInfo.map((info) => (
+              <MenuItem key={info.Topic} value={info.Topic}>
+                {info.Topic === -1 ? t('results.noiseDocuments') : `${info.Topic}: ${info.Name}`}
+              </MenuItem>
+            ))}
+          </Select>
+        </FormControl>
+      </Box>
+
+      {documents === null ? (
+        <Alert severity="info">Loading documents...</Alert>
+      ) : (
+        <TableContainer>
+          <Table size="small">
+            <TableHead>
+              <TableRow>
+                <TableCell>#</TableCell>
+                <TableCell>{t('results.documentText')}</TableCell>
+                <TableCell>{t('results.topicId')}</TableCell>
+                <TableCell>{t('results.probability')}</TableCell>
+              </TableRow>
+            </TableHead>
+            <TableBody>
+              {documents.map((doc) => (
+                <TableRow key={doc.index}>
+                  <TableCell>{doc.index + 1}</TableCell>
+                  <TableCell sx={{ maxWidth: 600 }}>{doc.text}</TableCell>
+                  <TableCell>
+                    <Chip label={doc.topic} size="small" color={doc.topic === -1 ? 'default' : 'primary'} />
+                  </TableCell>
+                  <TableCell>{doc.probability == null ? '-' : doc.probability.toFixed(3)}</TableCell>
+                </TableRow>
+              ))}
+            </TableBody>
+          </Table>
+        </TableContainer>
+      )}
+
+      <TablePagination
+        component="div"
+        count={total}
+        page={page}
+        rowsPerPage={rowsPerPage}
+        rowsPerPageOptions={[25, 50, 100]}
+        onPageChange={(event, newPage) => setPage(newPage)}
+        onRowsPerPageChange={(event) => {
+          setRowsPerPage(parseInt(event.target.value, 10));
+          setPage(0);
+        }}
+      />
+    </Box>
+  );
+};
+
+// 按需加载的可视化：首次显示时从后端获取，html格式统一返回HTML字符串
+const useResolvedVisualization = (visualization, format = 'json') => {
+  const normalize = (value) => (
+    format === 'html' && value && typeof value === 'object' ? value.html : value
+  );
+  const [resolved, setResolved] = useState(visualization?.lazy ? null : normalize(visualization));
+
+  useEffect(() => {
+    if (!visualization?.lazy) {
+      setResolved(normalize(visualization));
+      return undefined;
+    }
+
+    let cancelled = false;
+    setResolved(null);
+    // HTML 引用后端共享的 plotly.js，浏览器只需下载一次
+    const params = format === 'html' ? { format, plotlyjs: 'shared' } : { format };
+    axios.get(`http://localhost:5001${visualization.url}`, { params })
+      .then((response) => {
+        if (!cancelled) {
+          setResolved(format === 'json' ? { data: response.data } : response.data);
+        }
+      })
+      .catch((error) => {
+        if (!cancelled) {
+          setResolved(`Visualization failed: ${error.response?.data?.error || error.message}`);
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [visualization, format]);
+
+  return resolved;
+};
+
 // 可视化Tab组件 - 使用Plotly React组件
-const TopicsVisualizationTab = ({ visualization }) => {
+const TopicsVisualizationTab = ({ visualization: visualizationHandle }) => {
   const { t } = useTranslation();
+  const visualization = useResolvedVisualization(visualizationHandle);
+  
+  if (visualization === null) {
+    return <Alert severity="info">Loading visualization...</Alert>;
+  }
   
   if (typeof visualization === 'string' && visualization.includes('failed')) {
     return (
@@ -320,8 +493,13 @@ const TopicsVisualizationTab = ({ visualization }) => {
   );
 };
 
-const BarchartVisualizationTab = ({ visualization }) => {
+const BarchartVisualizationTab = ({ visualization: visualizationHandle }) => {
   const { t } = useTranslation();
+  const visualization = useResolvedVisualization(visualizationHandle);
+  
+  if (visualization === null) {
+    return <Alert severity="info">Loading visualization...</Alert>;
+  }
   
   if (typeof visualization === 'string' && visualization.includes('failed')) {
     return (
@@ -372,8 +550,13 @@ const BarchartVisualizationTab = ({ visualization }) => {
   );
 };
 
-const HeatmapVisualizationTab = ({ visualization }) => {
+const HeatmapVisualizationTab = ({ visualization: visualizationHandle }) => {
   const { t } = useTranslation();
+  const visualization = useResolvedVisualization(visualizationHandle);
+  
+  if (visualization === null) {
+    return <Alert severity="info">Loading visualization...</Alert>;
+  }
   
   if (typeof visualization === 'string' && visualization.includes('failed')) {
     return (
@@ -424,8 +607,13 @@ const HeatmapVisualizationTab = ({ visualization }) => {
   );
 };
 
-const DocumentsVisualizationTab = ({ visualization }) => {
+const DocumentsVisualizationTab = ({ visualization: visualizationHandle }) => {
   const { t } = useTranslation();
+  const visualization = useResolvedVisualization(visualizationHandle);
+  
+  if (visualization === null) {
+    return <Alert severity="info">Loading visualization...</Alert>;
+  }
   
   if (typeof visualization === 'string' && visualization.includes('failed')) {
     return (
@@ -476,8 +664,13 @@ const DocumentsVisualizationTab = ({ visualization }) => {
   );
 };
 
-const HierarchyVisualizationTab = ({ visualization }) => {
+const HierarchyVisualizationTab = ({ visualization: visualizationHandle }) => {
   const { t } = useTranslation();
+  const visualization = useResolvedVisualization(visualizationHandle);
+  
+  if (visualization === null) {
+    return <Alert severity="info">Loading visualization...</Alert>;
+  }
   
   if (typeof visualization === 'string' && visualization.includes('failed')) {
     return (
@@ -528,9 +721,10 @@ const HierarchyVisualizationTab = ({ visualization }) => {
   );
 };
 
-const TopicsOverTimeVisualizationTab = ({ visualization }) => {
+const TopicsOverTimeVisualizationTab = ({ visualization: visualizationHandle }) => {
   const { t } = useTranslation();
   const containerRef = useRef(null);
+  const visualization = useResolvedVisualization(visualizationHandle, 'html');
   
   useEffect(() => {
     if (containerRef.current && visualization && typeof visualization === 'string' && !visualization.includes('failed')) {
@@ -545,6 +739,10 @@ const TopicsOverTimeVisualizationTab = ({ visualization }) => {
     }
   }, [visualization]);
   
+  if (visualization === null) {
+    return <Alert severity="info">Loading visualization...</Alert>;
+  }
+  
   if (typeof visualization === 'string' && visualization.includes('failed')) {
     return (
       <Box>